@@ -1,4 +1,5 @@
 # 标准库
+import asyncio
 import json
 import time
 
@@ -11,20 +12,28 @@ logger = get_logger("server.api.app")
 
 # 第三方库
 import uvicorn
-from fastapi import FastAPI, UploadFile, File, Form, Query, Request, Body
+from fastapi import FastAPI, UploadFile, File, Form, Query, Request, Body, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+from starlette.websockets import WebSocketState
 
 # 本地模块
 from .files.service import file_service
+from .files.config import config as file_config
 from .speech.recognize import speech_service
+from .speech.jobs import recognition_jobs
+from .speech.config import speech_config
+from .speech.streaming import StreamingSession, pcm16_to_float
 from .models import (
     BaseResponse,
     FileResponse, 
     FileListResponse,
-    RecognitionProgressResponse
+    RecognitionProgressResponse,
+    SystemStatusResponse,
+    BatchRecognitionRequest
 )
 from .files.export import export_service
 from .speech.hotwords import hotwords_manager
@@ -45,6 +54,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def load_speech_models():
+    """服务启动时加载识别模型（或启动模型进程池），避免第一个识别请求等待"""
+    # 上次退出时未结束的识别任务已经丢失，恢复这些文件的状态以便重新识别
+    file_service.reset_interrupted_recognitions()
+    speech_service.start()
+
 # 添加缓存中间件
 @app.middleware("http")
 async def add_cache_headers(request: Request, call_next):
@@ -119,22 +135,16 @@ async def upload_file(
             logger.error(error_msg)
             return {"code": 400, "message": error_msg}
             
-        # 读取文件内容
-        try:
-            logger.debug("开始读取文件内容...")
-            contents = await file.read()
-            file_size = len(contents)
-            logger.info(f"文件读取完成, 大小: {file_size} bytes")
-            
-            if file_size == 0:
-                error_msg = "文件内容为空"
-                logger.error(error_msg)
-                return {"code": 400, "message": error_msg}
-                
-        except Exception as e:
-            error_msg = f"读取文件失败: {str(e)}"
-            logger.error(error_msg, exc_info=True)
+        # 检查声明的文件大小，实际大小在分块写入时检查
+        declared_size = getattr(file, "size", None)
+        if declared_size == 0:
+            error_msg = "文件内容为空"
+            logger.error(error_msg)
             return {"code": 400, "message": error_msg}
+        if declared_size and declared_size > file_config.max_upload_bytes:
+            error_msg = f"文件超过大小上限 {file_config.max_upload_bytes // 1024 ** 2}MB"
+            logger.error(error_msg)
+            return {"code": 413, "message": error_msg}
         
         # 解析选项
         try:
@@ -145,16 +155,17 @@ async def upload_file(
             logger.error(error_msg)
             return {"code": 400, "message": error_msg}
         
-        # 保存文件
+        # 保存文件：在线程池中把上传内容分块复制到磁盘，不整体读入内存
         logger.info("开始保存文件...")
-        result = file_service.save_uploaded_file(contents, file.filename, upload_options)
+        result = await run_in_threadpool(file_service.save_uploaded_file, file.file, file.filename, upload_options)
         logger.info(f"文件保存结果: {result.get('code')} - {result.get('message')}")
         
-        # 如果选择了自动识别，开始识别
-        if result["code"] == 200 and upload_options.get("action") == "recognize":
+        # 如果选择了自动识别，开始识别（已复用相同内容的识别结果时跳过）
+        if result["code"] == 200 and upload_options.get("action") == "recognize" \
+                and result["data"]["status"] != "已完成":
             logger.info("启动自动识别任务...")
-            # TODO: 启动异步识别任务
-            pass
+            recognition = file_service.start_recognition(result["data"]["file_id"])
+            result["data"]["recognition"] = recognition.get("data")
         
         logger.info("=== 文件上传处理完成 ===")
         return result
@@ -227,6 +238,17 @@ async def delete_transcript(file_id: str):
     pass
 
 # 2. 语音识别 API
+# 批量识别路由需在 /recognize/{file_id} 之前注册
+@app.post("/api/v1/asr/recognize/batch", response_model=FileResponse)
+async def start_batch_recognition(request: BatchRecognitionRequest):
+    """批量提交识别任务，按时长从长到短调度"""
+    return file_service.start_batch_recognition(request.file_ids, request.status)
+
+@app.get("/api/v1/asr/batches/{batch_id}", response_model=FileResponse)
+async def get_batch_recognition(batch_id: str):
+    """获取批量识别的汇总进度：总时长、已处理时长和预计剩余时间"""
+    return file_service.get_batch_recognition(batch_id)
+
 @app.post("/api/v1/asr/recognize/{file_id}", response_model=BaseResponse)
 async def start_recognition(file_id: str):
     return file_service.start_recognition(file_id)
@@ -235,6 +257,95 @@ async def start_recognition(file_id: str):
 async def get_recognition_progress(file_id: str):
     return file_service.get_recognition_progress(file_id)
 
+@app.websocket("/api/v1/ws/asr/progress/{file_id}")
+async def recognition_progress_ws(websocket: WebSocket, file_id: str):
+    """推送识别进度和已完成的句子
+    
+    连接后先发送一次快照（type=snapshot，包含已完成的全部句子），
+    之后推送 type=progress 和 type=segments 增量事件，识别结束后关闭连接。
+    """
+    await websocket.accept()
+    job = recognition_jobs.get_job_by_file(file_id)
+    if not job:
+        # 没有识别任务，返回一次当前状态后关闭
+        await websocket.send_json({"type": "snapshot", "data": file_service.get_recognition_progress(file_id)["data"]})
+        await websocket.close()
+        return
+    
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    snapshot, unsubscribe = job.progress.subscribe(
+        lambda event: loop.call_soon_threadsafe(events.put_nowait, event)
+    )
+    try:
+        await websocket.send_json({"type": "snapshot", "data": {**snapshot, "job_id": job.job_id}})
+        finished = snapshot["stage"] in ("done", "failed")
+        while not finished:
+            event = await events.get()
+            await websocket.send_json(event)
+            finished = event["type"] == "progress" and event["data"]["stage"] in ("done", "failed")
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.debug(f"识别进度连接已断开: {file_id}")
+    finally:
+        unsubscribe()
+
+@app.websocket("/api/v1/asr/stream")
+async def recognition_stream_ws(websocket: WebSocket, language: str = "zh"):
+    """实时语音识别
+    
+    客户端以二进制消息发送16kHz单声道16bit小端PCM，发送 {"type": "end"} 表示音频结束。
+    服务端在每段语音结束后推送 type=final 结果，语音进行中推送 type=partial 结果，
+    音频结束并输出全部结果后发送 type=done 并关闭连接。
+    """
+    await websocket.accept()
+    session = StreamingSession(language)
+    loop = asyncio.get_running_loop()
+    logger.info(f"实时识别连接已建立，语言: {language}")
+    try:
+        await websocket.send_json({"type": "ready", "data": {"sample_rate": 16000, "format": "s16le"}})
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                # 模型推理在线程池中执行，不阻塞事件循环
+                events = await loop.run_in_executor(None, session.feed, pcm16_to_float(message["bytes"]))
+                for event in events:
+                    await websocket.send_json(event)
+            elif message.get("text") and json.loads(message["text"]).get("type") == "end":
+                for event in await loop.run_in_executor(None, session.finish):
+                    await websocket.send_json(event)
+                await websocket.send_json({
+                    "type": "done",
+                    "data": {"segment_count": session.segment_count, "duration": session.received_ms / 1000}
+                })
+                await websocket.close()
+                break
+    except WebSocketDisconnect:
+        logger.debug("实时识别连接已断开")
+    except Exception as e:
+        logger.error(f"实时识别失败: {str(e)}", exc_info=True)
+        # 客户端可能已经断开（发送失败本身也会走到这里），连接仍打开时才通知客户端
+        if (websocket.client_state == WebSocketState.CONNECTED
+                and websocket.application_state == WebSocketState.CONNECTED):
+            try:
+                await websocket.send_json({"type": "error", "message": f"实时识别失败: {str(e)}"})
+                await websocket.close()
+            except (WebSocketDisconnect, RuntimeError):
+                logger.debug("实时识别连接已断开，未能发送错误信息")
+    logger.info(f"实时识别连接结束，语音段数: {session.segment_count}")
+
+@app.get("/api/v1/asr/jobs", response_model=FileResponse)
+async def get_recognition_jobs():
+    """获取识别任务列表和队列状态"""
+    return file_service.get_recognition_jobs()
+
+@app.get("/api/v1/asr/jobs/{job_id}", response_model=FileResponse)
+async def get_recognition_job(job_id: str):
+    """获取识别任务状态"""
+    return file_service.get_recognition_job(job_id)
+
 # 3. 回收站管理
 @app.get("/api/v1/trash", response_model=FileListResponse)
 async def get_trash_files(
@@ -261,31 +372,63 @@ async def clear_trash():
 async def get_languages():
     return speech_service.get_languages()
 
-@app.get("/api/v1/system/status", response_model=BaseResponse)
+@app.get("/api/v1/system/status", response_model=SystemStatusResponse)
 async def get_system_status():
-    # TODO: 实现系统状态获取
-    pass
+    """获取识别队列和模型进程池状态（含每个进程的利用率）"""
+    return speech_service.get_system_status()
 
 # 热词管理
 @app.get("/api/v1/hotwords")
 async def get_hotwords():
-    """获取热词内容"""
-    return hotwords_manager.get_content()
+    """获取热词内容，以及当前生效的纠错模型版本"""
+    from .speech.text_correction import text_corrector
+    result = hotwords_manager.get_content()
+    if result.get('code') == 0:
+        result['data']['correction'] = text_corrector.get_status()
+    return result
 
 @app.post("/api/v1/hotwords")
 async def update_hotwords(data: dict = Body(...)):
     """更新热词内容"""
     logger.info("收到热词更新请求")
-    logger.debug(f"解析的时间戳: lastModified={last_modified}")
     
     content = data.get('content')
     last_modified = data.get('lastModified')
+    logger.debug(f"解析的时间戳: lastModified={last_modified}")
     
     if not content:
         logger.error("内容为空")
         return {"code": 1, "message": "内容不能为空"}
         
-    return hotwords_manager.update_content(content, last_modified)
+    from .speech.text_correction import text_corrector
+    previous_model = text_corrector.model
+    result = hotwords_manager.update_content(content, last_modified)
+    if result.get('code') == 0:
+        # 后台重建纠错模型和分词词典，完成后再切换，正在进行的识别不受影响
+        text_corrector.reload_async()
+        result['data'] = {'correction': text_corrector.get_status()}
+        if speech_config.recorrect_archive_on_hotwords_update:
+            # 切换完成后，重新纠正已保存转写中受影响的句子
+            from .speech.recorrection import archive_recorrector
+            archive_recorrector.schedule(previous_model)
+            result['data']['recorrection'] = archive_recorrector.get_status()
+    return result
+
+@app.get("/api/v1/hotwords/recorrection")
+async def get_recorrection_status():
+    """获取已保存转写重新纠正的进度"""
+    from .speech.recorrection import archive_recorrector
+    return {"code": 0, "message": "success", "data": archive_recorrector.get_status()}
+
+@app.post("/api/v1/hotwords/recorrection")
+async def start_recorrection(data: dict = Body(default={})):
+    """用当前热词重新纠正已保存的转写
+
+    full 为 true 时检查所有目标词，否则只检查上次重新纠正以来变化的目标词
+    """
+    from .speech.recorrection import archive_recorrector
+    archive_recorrector.schedule(full=bool((data or {}).get('full')))
+    return {"code": 0, "message": "success", "data": archive_recorrector.get_status()}
 
 @app.post("/api/v1/hotwords/validate")
 async def validate_hotwords(data: dict = Body(...)):
@@ -10,16 +10,31 @@ class FileConfig:
         self.storage_root = os.path.join(self.root_dir, "storage")
         self.uploads_dir = os.path.join(self.storage_root, "uploads")
         self.audio_dir = os.path.join(self.uploads_dir, "audio")
+        self.pcm_dir = os.path.join(self.uploads_dir, "pcm")  # 解码后的16kHz PCM缓存
+        self.upload_tmp_dir = os.path.join(self.uploads_dir, "tmp")  # 上传过程中的临时文件
         self.trash_dir = os.path.join(self.storage_root, "trash")
         self.metadata_file = os.path.join(self.storage_root, "metadata.json")
         
+        # 上传配置：按块写入磁盘，单个文件大小上限
+        self.upload_chunk_bytes = 1024 * 1024
+        self.max_upload_bytes = 4 * 1024 ** 3
+        
+        # 上传去重：内容与已有文件相同时引用原音频并复用已完成的识别结果
+        # 单次上传可通过 options.dedup 覆盖
+        self.dedup_uploads = True
+        
         # 添加识别结果存储目录
         self.transcripts_dir = os.path.join(self.storage_root, "transcripts")
+        # 纠错结果缓存目录，每个 keywords 版本一个文件
+        self.correction_cache_dir = os.path.join(self.storage_root, "correction_cache")
+        # 编译后的纠错模型目录，可通过环境变量 CORRECTION_COMPILED_DIR 指定（测试时使用临时目录）
+        self.compiled_dir = os.environ.get("CORRECTION_COMPILED_DIR") or os.path.join(self.storage_root, "compiled")
         
         
         # 确保目录存在
         os.makedirs(self.uploads_dir, exist_ok=True)
         os.makedirs(self.audio_dir, exist_ok=True)
+        os.makedirs(self.pcm_dir, exist_ok=True)
         os.makedirs(self.trash_dir, exist_ok=True)
         os.makedirs(self.transcripts_dir, exist_ok=True)
 
@@ -0,0 +1,63 @@
+import os
+import threading
+from typing import Dict, List, Optional
+from .metadata import MetadataManager
+from ..speech.storage import transcript_manager
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+class ContentIndex:
+    """音频内容哈希索引
+
+    记录 content_hash -> file_id 列表，首次使用时从文件元数据重建。
+    文件移入回收站时元数据会被删除，因此查找时只返回元数据和音频文件都还在的文件。
+    """
+    def __init__(self):
+        self.metadata = MetadataManager()
+        self._index: Optional[Dict[str, List[str]]] = None
+        self._lock = threading.Lock()
+
+    def _ensure_index(self) -> Dict[str, List[str]]:
+        if self._index is None:
+            index = {}
+            for meta in self.metadata.metadata.values():
+                if meta.get('content_hash') and meta.get('file_id'):
+                    index.setdefault(meta['content_hash'], []).append(meta['file_id'])
+            self._index = index
+            logger.debug(f"内容哈希索引已重建，共 {len(index)} 个哈希")
+        return self._index
+
+    def add(self, content_hash: str, file_id: str):
+        with self._lock:
+            file_ids = self._ensure_index().setdefault(content_hash, [])
+            if file_id not in file_ids:
+                file_ids.append(file_id)
+
+    def find(self, content_hash: str, language: str = None) -> Optional[Dict]:
+        """查找内容相同的已有文件
+
+        优先返回已有转写结果（且识别语言一致）的文件。
+
+        Returns:
+            {"metadata": 文件元数据, "transcript": 原始识别结果或 None}，没有可用文件时返回 None
+        """
+        with self._lock:
+            file_ids = list(self._ensure_index().get(content_hash, []))
+
+        fallback = None
+        for file_id in reversed(file_ids):
+            meta = self.metadata.get_by_file_id(file_id)
+            if not meta or meta.get('content_hash') != content_hash or not os.path.exists(meta.get('path', '')):
+                continue
+            if meta.get('status') == '已完成':
+                transcript = (transcript_manager.get_transcript(file_id) or {}).get('original')
+                result_language = ((transcript or {}).get('data') or {}).get('language')
+                if transcript and (language is None or result_language in (None, language)):
+                    return {"metadata": meta, "transcript": transcript}
+            if fallback is None:
+                fallback = {"metadata": meta, "transcript": None}
+        return fallback
+
+# 创建全局实例
+content_index = ContentIndex()
@@ -4,4 +4,8 @@ class FileServiceError(Exception):
 
 class FileNotFoundError(FileServiceError):
     """文件不存在异常"""
-    pass 
\ No newline at end of file
+    pass
+
+class FileTooLargeError(FileServiceError):
+    """上传文件超过大小上限"""
+    pass
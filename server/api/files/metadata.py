@@ -1,5 +1,6 @@
 import os
 import json
+import threading
 from .config import config
 from ..logger import get_logger
 
@@ -7,6 +8,7 @@ logger = get_logger(__name__)
 
 class MetadataManager:
     _instance = None
+    _lock = threading.RLock()  # 识别工作线程与请求线程会同时写元数据
     
     def __new__(cls):
         if cls._instance is None:
@@ -47,26 +49,28 @@ class MetadataManager:
     
     def update(self, filename, data):
         """更新元数据"""
-        # 每次更新前都重新加载
-        self.metadata = self._load()  
-        
-        logger.info(f"更新元数据: {filename}")
-        logger.debug(f"更新内容: {data}")
-        
-        self.metadata[filename] = data
-        self.save()
-        logger.debug("元数据更新完成")
+        with self._lock:
+            # 每次更新前都重新加载
+            self.metadata = self._load()  
+            
+            logger.info(f"更新元数据: {filename}")
+            logger.debug(f"更新内容: {data}")
+            
+            self.metadata[filename] = data
+            self.save()
+            logger.debug("元数据更新完成")
     
     def delete(self, filename):
         """删除元数据"""
-        if filename in self.metadata:
-            logger.info(f"删除元数据: {filename}")
-            del self.metadata[filename]
-            self.save()
-            # 删除后重新加载确保内存与文件同步
-            self.reload()
-        else:
-            logger.debug(f"尝试删除不存在的元数据: {filename}")
+        with self._lock:
+            if filename in self.metadata:
+                logger.info(f"删除元数据: {filename}")
+                del self.metadata[filename]
+                self.save()
+                # 删除后重新加载确保内存与文件同步
+                self.reload()
+            else:
+                logger.debug(f"尝试删除不存在的元数据: {filename}")
     
     def get(self, filename):
         """获取元数据"""
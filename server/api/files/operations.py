@@ -1,8 +1,14 @@
+import hashlib
+import io
 import os
+import uuid
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, Dict, Tuple
 from .config import config
 from .metadata import MetadataManager
+from .dedup import content_index
+from .exceptions import FileTooLargeError
+from ..speech.storage import transcript_manager
 from ..utils import generate_target_filename
 from ..logger import get_logger
 
@@ -82,7 +88,16 @@ class FileOperations:
         return get_audio_duration(file_path)
     
     def save_uploaded_file(self, file_content, options):
-        """保存上传的文件"""
+        """保存上传的文件
+        
+        上传内容按固定大小分块写入临时文件，同时计算哈希并检查大小上限，
+        内存占用与文件大小无关。
+        
+        Args:
+            file_content: 文件的二进制内容，或可分块读取的二进制文件对象
+            options: 上传选项，必须包含 original_filename
+        """
+        temp_path = None
         try:
             logger.info("=== 开始保存上传文件 ===")
             logger.debug(f"接收到的选项: {options}")
@@ -114,18 +129,32 @@ class FileOperations:
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
             logger.debug(f"确保目录存在: {os.path.dirname(file_path)}")
             
-            # 保存文件
-            logger.info(f"开始写入文件: {file_path}")
-            try:
-                with open(file_path, 'wb') as f:
-                    f.write(file_content)
-                logger.info("文件写入成功")
-            except Exception as e:
-                logger.error(f"文件写入失败", exc_info=True)
-                raise
-            
-            # 获取音频时长
-            duration = self.get_audio_duration(file_path)
+            # 分块写入临时文件，同时计算内容哈希
+            if isinstance(file_content, (bytes, bytearray)):
+                file_content = io.BytesIO(file_content)
+            temp_path = self._temp_upload_path(target_filename)
+            content_hash, size = self._write_stream(file_content, temp_path)
+            if size == 0:
+                error_msg = "文件内容为空"
+                logger.error(error_msg)
+                return {"code": 400, "message": error_msg}
+            logger.info(f"文件写入成功，大小: {size} bytes")
+            
+            # 查找内容相同的已有文件
+            dedup = options.get('dedup', self.config.dedup_uploads)
+            duplicate = content_index.find(content_hash, options.get('language')) if dedup else None
+            
+            # 保存文件：重复内容优先硬链接到已有音频，不再占用额外空间
+            if duplicate and self._link_existing(duplicate['metadata']['path'], file_path):
+                logger.info(f"上传内容与已有文件相同: {duplicate['metadata']['file_id']}，已引用原音频")
+            else:
+                os.replace(temp_path, file_path)
+                temp_path = None
+            
+            # 获取音频时长，重复内容直接沿用已有文件的时长
+            duration = duplicate['metadata'].get('duration') if duplicate else None
+            if duration is None:
+                duration = self.get_audio_duration(file_path)
             logger.info(f"音频时长: {duration if duration else '未知'}秒")
             
             # 构建返回信息
@@ -136,15 +165,23 @@ class FileOperations:
                 'display_full_name': cleaned_full_name,
                 'storage_name': target_filename,
                 'extension': ext,
-                'size': len(file_content),
+                'size': size,
                 'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 'status': '已上传',
                 'path': file_path,
                 'duration': duration,
                 'duration_str': f"{int(duration//60)}:{int(duration%60):02d}" if duration else "未知",
-                'options': options
+                'options': options,
+                'content_hash': content_hash
             }
             
+            # 已有相同内容的识别结果时直接复制，无需重新识别
+            if duplicate:
+                file_info['duplicate_of'] = duplicate['metadata']['file_id']
+                if duplicate['transcript'] and transcript_manager.save_result(timestamp, duplicate['transcript']):
+                    file_info['status'] = '已完成'
+                    logger.info(f"已复用文件 {file_info['duplicate_of']} 的识别结果")
+            
             # 保存元数据
             logger.debug(f"准备构建元数据内容")
             metadata_content = {
@@ -160,12 +197,16 @@ class FileOperations:
                 'date': file_info['date'],
                 'status': file_info['status'],
                 'path': file_info['path'],
-                'options': file_info['options']
+                'options': file_info['options'],
+                'content_hash': content_hash
             }
+            if duplicate:
+                metadata_content['duplicate_of'] = file_info['duplicate_of']
             logger.debug(f"构建的元数据内容: {metadata_content}")
             
             logger.info(f"开始更新元数据 - 文件名: {target_filename}")
             self.metadata.update(target_filename, metadata_content)
+            content_index.add(content_hash, file_info['file_id'])
             logger.info("元数据更新完成")
             
             logger.debug(f"文件信息: {file_info}")
@@ -176,12 +217,54 @@ class FileOperations:
                 'data': file_info
             }
             
+        except FileTooLargeError as e:
+            logger.error(str(e))
+            return {
+                'code': 413,
+                'message': str(e)
+            }
         except Exception as e:
             logger.error(f"保存文件失败: {str(e)}", exc_info=True)
             return {
                 'code': 500,
                 'message': f"保存文件失败: {str(e)}"
             }
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def _temp_upload_path(self, target_filename: str) -> str:
+        os.makedirs(self.config.upload_tmp_dir, exist_ok=True)
+        return os.path.join(self.config.upload_tmp_dir, f"{uuid.uuid4().hex}_{target_filename}.part")
+    
+    def _write_stream(self, source, temp_path: str) -> Tuple[str, int]:
+        """分块复制上传内容，返回 (SHA-256, 字节数)
+        
+        Raises:
+            FileTooLargeError: 超过上传大小上限
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with open(temp_path, 'wb') as f:
+            while True:
+                chunk = source.read(self.config.upload_chunk_bytes)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > self.config.max_upload_bytes:
+                    raise FileTooLargeError(f"文件超过大小上限 {self.config.max_upload_bytes // 1024 ** 2}MB")
+                digest.update(chunk)
+                f.write(chunk)
+        return digest.hexdigest(), size
+    
+    def _link_existing(self, source_path: str, file_path: str) -> bool:
+        """为已有音频创建硬链接，文件系统不支持时返回 False"""
+        try:
+            os.link(source_path, file_path)
+            return True
+        except OSError as e:
+            logger.warning(f"创建硬链接失败，改为写入新文件: {str(e)}")
+            return False
     
     def get_file_list(self, page=1, page_size=20, query=None) -> Dict:
         """获取文件列表"""
@@ -1,5 +1,5 @@
 # 标准库导入
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 from ..logger import get_logger
 import os
 from datetime import datetime
@@ -20,6 +20,7 @@ from .exceptions import FileNotFoundError, FileServiceError
 # 相关服务导入
 from ..speech.storage import transcript_manager
 from ..speech.recognize import speech_service
+from ..speech.jobs import recognition_jobs, JobQueueFullError, FILE_STATUS_MAP, JOB_QUEUED, JOB_FAILED
 from ..utils import generate_target_filename, get_audio_metadata, safe_write_json, ensure_dir
 
 logger = get_logger(__name__)
@@ -37,12 +38,17 @@ class FileService:
         ensure_dir(storage_dir)
     
     def save_uploaded_file(self, file_content, filename, options=None):
-        """保存上传的文件，生成标准文件ID"""
+        """保存上传的文件，生成标准文件ID
+        Args:
+            file_content: 文件的二进制内容，或可分块读取的二进制文件对象
+            filename: 原始文件名
+            options: 上传选项
+        """
         try:
             logger.info(f"开始处理文件上传: {filename}")
             
             # 验证参数
-            if not file_content:
+            if file_content is None or file_content == b"":
                 error_msg = "文件内容为空"
                 logger.error(error_msg)
                 return {"code": 422, "message": error_msg}
@@ -249,7 +255,7 @@ class FileService:
             "message": "识别结果不存在"
         }
     
-    def process_audio(self, audio_file: bytes, language: str = "auto", file_id: str = None) -> Dict:
+    def process_audio(self, audio_file: Union[str, bytes], language: str = "auto", file_id: str = None) -> Dict:
         """处理音频文件，进行语音识别"""
         try:                
             # 调用语音识别服务
@@ -295,9 +301,9 @@ class FileService:
             raise FileServiceError(f"获取文件信息失败: {str(e)}")
     
     def start_recognition(self, file_id: str) -> Dict:
-        """开始语音识别"""
+        """提交语音识别任务，立即返回任务ID"""
         try:
-            logger.info(f"开始识别 file_id: {file_id}")
+            logger.info(f"提交识别任务 file_id: {file_id}")
             # 获取文件路径
             file_info = self.get_file_path(file_id)
             if file_info["code"] != 200:
@@ -311,31 +317,145 @@ class FileService:
             language = metadata.get("options", {}).get("language", "zh")
             logger.debug(f"识别语言: {language}")
             
-            # 读取音频文件
-            with open(file_path, "rb") as f:
-                audio_content = f.read()
-            logger.debug(f"已读取音频文件，大小: {len(audio_content)} 字节")
+            previous = self._mark_recognizing([file_id])
+            try:
+                job = recognition_jobs.submit(file_id, self._run_recognition, file_id, file_path, language)
+            except JobQueueFullError as e:
+                self.update_file_status(file_id, previous[file_id])
+                return {
+                    "code": 503,
+                    "message": str(e)
+                }
             
-            # 调用语音识别服务
-            logger.info(f"准备调用语音识别服务，file_id: {file_id}")
-            result = speech_service.process_audio(audio_content, language, file_id=file_id)
+            return {
+                "code": 200,
+                "message": "识别任务已提交",
+                "data": {
+                    **job.to_dict(),
+                    "queue_position": recognition_jobs.queue_position(job)
+                }
+            }
             
-            # 如果识别成功，更新文件状态和保存结果
-            if result["code"] == 200:
-                logger.info(f"识别成功，更新文件状态为已完成")
-                self.update_file_status(file_id, "已完成")
-                transcript_manager.save_result(file_id, result)
-            else:
-                logger.error(f"识别失败: {result}")
+        except Exception as e:
+            logger.error(f"提交识别任务失败: {str(e)}", exc_info=True)
+            return {
+                "code": 500,
+                "message": f"识别失败: {str(e)}"
+            }
+    
+    def start_batch_recognition(self, file_ids: List[str] = None, status: str = None) -> Dict:
+        """批量提交识别任务
+        Args:
+            file_ids: 文件ID列表
+            status: 未指定 file_ids 时，提交所有处于该状态的文件，例如 "已上传"
+        Returns:
+            Dict: 批次ID及汇总进度
+        """
+        try:
+            if not file_ids and not status:
+                return {"code": 400, "message": "需要指定 file_ids 或 status"}
             
-            return result
+            if not file_ids:
+                file_ids = [
+                    meta["file_id"] for meta in list(self.metadata.metadata.values())
+                    if meta.get("file_id") and meta.get("status") == status
+                ]
+            logger.info(f"批量提交识别任务，文件数: {len(file_ids)}")
+            
+            items, missing = [], []
+            for file_id in dict.fromkeys(file_ids):  # 去重并保持顺序
+                file_info = self.get_file_path(file_id)
+                if file_info["code"] != 200:
+                    missing.append({"file_id": file_id, "reason": file_info.get("message", "文件不存在")})
+                    continue
+                metadata = self.metadata.get_by_file_id(file_id) or {}
+                language = metadata.get("options", {}).get("language", "zh")
+                items.append({
+                    "file_id": file_id,
+                    "duration": metadata.get("duration") or 0,
+                    "args": (file_id, file_info["data"]["path"], language)
+                })
+            
+            previous = self._mark_recognizing([item["file_id"] for item in items])
+            batch = recognition_jobs.submit_batch(items, self._run_recognition)
+            for item in batch.rejected:
+                self.update_file_status(item["file_id"], previous[item["file_id"]])
+            batch.rejected.extend(missing)
+            return {
+                "code": 200,
+                "message": "批量识别任务已提交",
+                "data": batch.to_dict()
+            }
             
         except Exception as e:
-            logger.error(f"识别失败: {str(e)}", exc_info=True)
+            logger.error(f"批量提交识别任务失败: {str(e)}", exc_info=True)
             return {
+                "code": 500,
+                "message": f"批量识别失败: {str(e)}"
+            }
+    
+    def get_batch_recognition(self, batch_id: str) -> Dict:
+        """获取批量识别的汇总进度"""
+        batch = recognition_jobs.get_batch(batch_id)
+        if not batch:
+            return {"code": 404, "message": f"批次不存在: {batch_id}"}
+        return {
+            "code": 200,
+            "message": "success",
+            "data": batch.to_dict()
+        }
+    
+    def _mark_recognizing(self, file_ids: List[str]) -> Dict[str, str]:
+        """提交识别任务前把文件状态保存为识别中，返回各文件原来的状态，提交失败时用于恢复
+
+        任务可能提交后立即执行并写入最终状态，所以要在提交之前保存。
+        """
+        previous = {}
+        for file_id in file_ids:
+            previous[file_id] = (self.metadata.get_by_file_id(file_id) or {}).get("status") or "已上传"
+            self.update_file_status(file_id, "识别中")
+        return previous
+    
+    def reset_interrupted_recognitions(self) -> int:
+        """服务启动时恢复上次未结束的识别：状态为识别中的文件，已有转写结果的恢复为已完成，否则恢复为已上传
+        
+        Returns:
+            int: 恢复的文件数
+        """
+        interrupted = [meta["file_id"] for meta in list(self.metadata.metadata.values())
+                       if meta.get("file_id") and meta.get("status") == "识别中"]
+        for file_id in interrupted:
+            transcript = transcript_manager.get_transcript(file_id) or {}
+            self.update_file_status(file_id, "已完成" if "original" in transcript else "已上传")
+        if interrupted:
+            logger.info(f"已恢复 {len(interrupted)} 个上次未完成识别的文件状态")
+        return len(interrupted)
+    
+    def _run_recognition(self, file_id: str, file_path: str, language: str, progress=None) -> Dict:
+        """在识别工作线程中执行识别并保存结果"""
+        try:
+            # 调用语音识别服务，音频由 ffmpeg 直接从文件流式解码
+            logger.info(f"准备调用语音识别服务，file_id: {file_id}")
+            result = speech_service.process_audio(file_path, language, file_id=file_id, progress=progress)
+        except Exception as e:
+            logger.error(f"识别失败: {str(e)}", exc_info=True)
+            result = {
                 "code": 500,
                 "message": f"识别失败: {str(e)}"
             }
+        
+        # 如果识别成功，更新文件状态和保存结果
+        if result["code"] == 200:
+            logger.info(f"识别成功，更新文件状态为已完成")
+            if progress:
+                progress.set_stage("saving")
+            transcript_manager.save_result(file_id, result)
+            self.update_file_status(file_id, "已完成")
+        else:
+            logger.error(f"识别失败: {result}")
+            self.update_file_status(file_id, "失败")
+        
+        return result
     
     def get_recognition_progress(self, file_id: str) -> Dict:
         """获取识别进度
@@ -345,21 +465,43 @@ class FileService:
             Dict: 包含进度信息的字典
         """
         try:
-            # 获取文件详情
-            file_info = self.get_file_detail(file_id)
-            if file_info["code"] != 200:
+            # 优先使用识别任务中的实时状态
+            job = recognition_jobs.get_job_by_file(file_id)
+            if job:
+                snapshot = job.progress.snapshot()
+                if job.state == JOB_QUEUED:
+                    message = f"排队中，前方还有 {max(0, recognition_jobs.queue_position(job) - 1)} 个任务"
+                elif job.state == JOB_FAILED:
+                    message = job.error or "识别失败"
+                else:
+                    message = snapshot["current_segment"]
                 return {
-                    "code": file_info["code"],
-                    "message": file_info["message"],
+                    "code": 200,
+                    "message": "success",
+                    "data": {
+                        **snapshot,
+                        "status": FILE_STATUS_MAP[job.state],
+                        "state": job.state,
+                        "job_id": job.job_id,
+                        "message": message
+                    }
+                }
+            
+            # 没有任务记录时（如服务重启后），读取文件元数据中的最终状态
+            metadata = self.metadata.get_by_file_id(file_id)
+            if not metadata:
+                return {
+                    "code": 404,
+                    "message": "文件不存在",
                     "data": {
                         "progress": 0,
                         "status": "error",
-                        "message": file_info["message"]
+                        "message": "文件不存在"
                     }
                 }
             
             # 获取文件状态
-            status = file_info["data"]["status"]
+            status = metadata.get("status", "未识别")
             
             # 根据状态返回进度信息
             if status == "已完成":
@@ -372,16 +514,14 @@ class FileService:
                         "message": "识别完成"
                     }
                 }
-            elif status == "识别中":
-                # 这里可以根据实际情况计算进度
-                # 目前简单返回 50% 进度
+            elif status == "失败":
                 return {
                     "code": 200,
                     "message": "success",
                     "data": {
-                        "progress": 50,
+                        "progress": 0,
                         "status": status,
-                        "message": "正在识别..."
+                        "message": "识别失败，可重新识别"
                     }
                 }
             else:
@@ -407,6 +547,31 @@ class FileService:
                 }
             }
     
+    def get_recognition_jobs(self) -> Dict:
+        """获取识别任务列表和队列统计"""
+        return {
+            "code": 200,
+            "message": "success",
+            "data": {
+                "items": recognition_jobs.list_jobs(),
+                "stats": recognition_jobs.get_stats()
+            }
+        }
+    
+    def get_recognition_job(self, job_id: str) -> Dict:
+        """获取单个识别任务状态"""
+        job = recognition_jobs.get_job(job_id)
+        if not job:
+            return {"code": 404, "message": "识别任务不存在"}
+        return {
+            "code": 200,
+            "message": "success",
+            "data": {
+                **job.to_dict(),
+                "queue_position": recognition_jobs.queue_position(job)
+            }
+        }
+    
     def get_audio_file(self, file_id: str):
         """获取音频文件"""
         logger.info(f"获取音频文件 - file_id: {file_id}")
@@ -491,6 +656,12 @@ class FileService:
         Returns:
             Dict: 包含保存结果的响应
         """
+        # 读取到写入期间持有转写文件锁，与热词更新后的后台重新纠正互斥
+        with transcript_manager.lock(file_id):
+            return self._save_content(file_id, data)
+    
+    def _save_content(self, file_id: str, data: dict) -> dict:
+        """在持有转写文件锁时保存文件内容"""
         try:
             logger.info(f"保存文件内容 - file_id: {file_id}")
             logger.debug(f"数据类型: {type(data)}")
@@ -654,6 +825,17 @@ class FileService:
                 if "merged" in segments_data:
                     for segment in segments_data["merged"]:  # 从 merged 字段里取数组
                         updated_segments.extend(segment.get("subSegments", []))
+                # 文本与识别结果中任何一句都不同的段落是用户修改过的，热词变化后不再自动重新纠正
+                # 未修改的段落保留识别时的纠错记录（前端不回传该字段）
+                original_corrections = {s.get("text"): s["corrections"] for s in original_segments
+                                        if s.get("corrections")}
+                original_texts = {s.get("text") for s in original_segments}
+                for segment in updated_segments:
+                    if segment.get("text") not in original_texts:
+                        segment["edited"] = True
+                        segment.pop("corrections", None)
+                    elif "corrections" not in segment and segment.get("text") in original_corrections:
+                        segment["corrections"] = original_corrections[segment["text"]]
                 logger.debug(f"更新后段落数量: {len(updated_segments)}")
             
             else:
@@ -695,6 +877,10 @@ class FileService:
                                 
                                 # 只更新文本内容
                                 updated_segments[i]["text"] = new_text
+                                if new_text != old_text:
+                                    updated_segments[i]["edited"] = True
+                                    # 纠错记录的位置对应旧文本
+                                    updated_segments[i].pop("corrections", None)
                                 found = True
                                 break
                         except Exception as e:
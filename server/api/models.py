@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field
 
 # 基础响应模型
@@ -75,4 +75,12 @@ class RecognitionProgressResponse(BaseResponse):
                     "message": "正在识别..."
                 }
             }
-        } 
\ No newline at end of file
+        } 
+# 系统状态响应模型
+class SystemStatusResponse(BaseResponse):
+    data: Dict[str, Any] = Field(..., description="识别队列和模型进程池状态")
+
+# 批量识别请求模型
+class BatchRecognitionRequest(BaseModel):
+    file_ids: Optional[List[str]] = Field(None, description="文件ID列表")
+    status: Optional[str] = Field(None, description="未指定 file_ids 时，识别所有处于该状态的文件，例如 已上传")
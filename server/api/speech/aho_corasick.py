@@ -0,0 +1,190 @@
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Sequence, Set, Tuple
+
+class AhoCorasick:
+    """Aho-Corasick 多模式匹配自动机
+
+    构建一次后，对任意文本只需一次线性扫描即可找出所有模式的出现位置，
+    耗时与模式数量无关。
+    """
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]  # 在该状态结束的模式序号
+        for index, pattern in enumerate(self.patterns):
+            if pattern:
+                self._add(pattern, index)
+        self._build()
+
+    def _add(self, pattern: str, index: int):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(index)
+
+    def _build(self):
+        """广度优先计算失败指针，并把失败状态的输出合并进来"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail if fail != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """遍历所有匹配（可重叠）
+
+        Yields:
+            (开始位置, 模式序号)
+        """
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self.patterns
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                yield position - len(patterns[index]) + 1, index
+
+    def find_longest_leftmost(self, text: str, accept: Callable[[int], bool] = None) -> List[Tuple[int, int, int]]:
+        """最左最长、互不重叠的匹配
+
+        从左到右扫描，每个位置取从该位置开始的最长匹配，匹配之后从其结束位置继续。
+
+        Args:
+            text: 待匹配文本
+            accept: 判断模式在本次匹配中是否可用，不可用的模式会让位给更短的模式
+
+        Returns:
+            [(开始位置, 结束位置, 模式序号), ...]，按位置排序
+        """
+        longest: Dict[int, int] = {}  # 开始位置 -> 最长可用模式
+        for start, index in self.iter_matches(text):
+            best = longest.get(start)
+            if best is not None and len(self.patterns[best]) >= len(self.patterns[index]):
+                continue
+            if accept is None or accept(index):
+                longest[start] = index
+
+        matches = []
+        position = 0
+        for start in sorted(longest):
+            if start < position:
+                continue
+            index = longest[start]
+            end = start + len(self.patterns[index])
+            matches.append((start, end, index))
+            position = end
+        return matches
+
+class ContextMatcher:
+    """上下文词出现情况
+
+    所有目标词的上下文词编译进一个自动机，每句话只扫描一次，得到一个位图（Python int），
+    第 i 位表示第 i 个上下文词在句中出现。每个目标词预先算好自己上下文词的掩码，
+    判断上下文条件只需一次按位与，不再对整句逐个做子串查找。
+    """
+    def __init__(self, target_words: Dict[str, Tuple[List[str], List[str], float, List[str]]]):
+        words: Dict[str, int] = {}
+        self.masks: Dict[str, int] = {}  # 目标词 -> 上下文词掩码，0 表示没有上下文要求
+        for target_word, (_, context_words, _, _) in target_words.items():
+            # 空的上下文词在任何句子中都"出现"，等同于没有上下文要求
+            if not context_words or '' in context_words:
+                continue
+            mask = 0
+            for word in context_words:
+                mask |= 1 << words.setdefault(word, len(words))
+            self.masks[target_word] = mask
+        self._automaton = AhoCorasick(list(words))
+
+    def scan(self, text: str) -> int:
+        """返回句中出现的上下文词位图"""
+        present = 0
+        for _, index in self._automaton.iter_matches(text):
+            present |= 1 << index
+        return present
+
+    def allows(self, target_word: str, present: int) -> bool:
+        """目标词的上下文条件是否满足"""
+        mask = self.masks.get(target_word, 0)
+        return not mask or bool(mask & present)
+
+class OriginalWordReplacer:
+    """原词替换
+
+    把配置中所有原词编译进一个自动机，按最左最长、互不重叠的规则一次扫描完成替换。
+    带上下文词的目标词只有在句子中出现任一上下文词时才替换；同一原词对应多个目标词时，
+    取配置中第一个满足上下文条件的目标词。
+    """
+    def __init__(self, target_words: Dict[str, Tuple[List[str], List[str], float, List[str]]],
+                 context: ContextMatcher = None):
+        self.context = context or ContextMatcher(target_words)
+        candidates: Dict[str, List[str]] = {}
+        for target_word, (_, _, _, orig_words) in target_words.items():
+            for orig in orig_words:
+                if orig and not orig.isspace():
+                    candidates.setdefault(orig, []).append(target_word)
+        self._candidates = list(candidates.values())
+        self._automaton = AhoCorasick(list(candidates))
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def replace(self, text: str, present: int = None) -> Tuple[str, Set[int], List[Tuple[str, str]]]:
+        """替换文本中的原词
+
+        Args:
+            text: 待替换的文本
+            present: 文本中出现的上下文词位图，为空时按需扫描
+
+        Returns:
+            (替换后的文本, 替换后文本中目标词占据的位置, [(原词, 目标词), ...])
+        """
+        chosen: Dict[int, str] = {}  # 模式序号 -> 本句中可用的目标词
+
+        def accept(index: int) -> bool:
+            nonlocal present
+            if index not in chosen:
+                target = None
+                for target_word in self._candidates[index]:
+                    if target_word in self.context.masks and present is None:
+                        present = self.context.scan(text)
+                    if self.context.allows(target_word, present or 0):
+                        target = target_word
+                        break
+                chosen[index] = target
+            return chosen[index] is not None
+
+        matches = self._automaton.find_longest_leftmost(text, accept)
+        if not matches:
+            return text, set(), []
+
+        parts = []
+        replaced_positions = set()
+        replacements = []
+        last = 0
+        length = 0
+        for start, end, index in matches:
+            parts.append(text[last:start])
+            length += start - last
+            target = chosen[index]
+            parts.append(target)
+            replaced_positions.update(range(length, length + len(target)))
+            length += len(target)
+            replacements.append((text[start:end], target))
+            last = end
+        parts.append(text[last:])
+        return ''.join(parts), replaced_positions, replacements
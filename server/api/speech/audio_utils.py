@@ -1,5 +1,9 @@
 import io
 import logging
+import subprocess
+import threading
+from typing import Optional, Union
+import numpy as np
 from pydub import AudioSegment
 
 logger = logging.getLogger(__name__)
@@ -10,6 +14,7 @@ class AudioConverter:
     TARGET_SAMPLE_RATE = 16000
     TARGET_CHANNELS = 1
     TARGET_FORMAT = "wav"  # PCM 16bit
+    DECODE_CHUNK_BYTES = 1 << 20  # ffmpeg 输出每次读取1MB
     
     @classmethod
     def convert_audio(cls, audio_bytes: bytes) -> bytes:
@@ -42,4 +47,108 @@ class AudioConverter:
             
         except Exception as e:
             logger.error(f"音频转换失败: {str(e)}", exc_info=True)
-            raise RuntimeError(f"音频转换失败: {str(e)}") 
\ No newline at end of file
+            raise RuntimeError(f"音频转换失败: {str(e)}")
+
+    @classmethod
+    def probe_duration(cls, file_path: str) -> Optional[float]:
+        """用 ffprobe 读取音频时长（秒），失败时返回 None"""
+        try:
+            result = subprocess.run([
+                'ffprobe',
+                '-v', 'quiet',
+                '-show_entries', 'format=duration',
+                '-of', 'default=noprint_wrappers=1:nokey=1',
+                file_path
+            ], capture_output=True, text=True, encoding='utf-8', errors='ignore')
+            if result.returncode == 0 and result.stdout.strip():
+                return float(result.stdout.strip())
+        except (OSError, ValueError) as e:
+            logger.debug(f"ffprobe 获取时长失败: {str(e)}")
+        return None
+
+    @classmethod
+    def decode_to_array(cls, source: Union[str, bytes], duration: float = None) -> np.ndarray:
+        """用单个 ffmpeg 进程把音频解码为16kHz单声道float32数组
+        
+        ffmpeg 输出的 s16le 数据按块读取，直接转换写入预先分配的数组，
+        峰值内存约为一份 float32 PCM，不再生成中间的 AudioSegment 和 WAV 副本。
+        
+        Args:
+            source: 音频文件路径，或音频文件的二进制数据（通过 stdin 传给 ffmpeg）
+            duration: 音频时长（秒），用于预分配；为空时对文件路径调用 ffprobe 获取
+            
+        Returns:
+            float32 数组，取值范围 -1 到 1
+        """
+        from_bytes = isinstance(source, (bytes, bytearray))
+        if duration is None and not from_bytes:
+            duration = cls.probe_duration(source)
+        
+        # 预分配时多留1秒余量，时长未知时按60秒起步并按需扩容
+        capacity = int(((duration or 59) + 1) * cls.TARGET_SAMPLE_RATE)
+        buffer = np.empty(capacity, dtype=np.float32)
+        filled = 0
+        
+        command = [
+            'ffmpeg', '-v', 'error',
+            '-i', 'pipe:0' if from_bytes else source,
+            '-vn',
+            '-ac', str(cls.TARGET_CHANNELS),
+            '-ar', str(cls.TARGET_SAMPLE_RATE),
+            '-f', 's16le',
+            'pipe:1'
+        ]
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if from_bytes else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        
+        writer = None
+        if from_bytes:
+            # 单独线程写 stdin，避免与读取 stdout 互相阻塞
+            def feed():
+                try:
+                    process.stdin.write(source)
+                except (BrokenPipeError, OSError):
+                    pass
+                finally:
+                    process.stdin.close()
+            writer = threading.Thread(target=feed, daemon=True)
+            writer.start()
+        
+        try:
+            leftover = b''
+            while True:
+                chunk = process.stdout.read(cls.DECODE_CHUNK_BYTES)
+                if not chunk:
+                    break
+                if leftover:
+                    chunk = leftover + chunk
+                usable = len(chunk) - len(chunk) % 2
+                leftover = chunk[usable:]
+                samples = np.frombuffer(chunk, dtype='<i2', count=usable // 2)
+                
+                if filled + len(samples) > len(buffer):
+                    new_capacity = max(len(buffer) * 2, filled + len(samples))
+                    logger.debug(f"解码缓冲区扩容: {len(buffer)} -> {new_capacity}")
+                    buffer = np.resize(buffer, new_capacity)
+                np.multiply(samples, 1 / 32768.0, out=buffer[filled:filled + len(samples)], casting='unsafe')
+                filled += len(samples)
+            
+            stderr = process.stderr.read()
+            returncode = process.wait()
+        finally:
+            if process.poll() is None:
+                process.kill()
+            if writer:
+                writer.join()
+        
+        if returncode != 0:
+            message = stderr.decode('utf-8', errors='ignore').strip()
+            logger.error(f"ffmpeg 解码失败: {message}")
+            raise RuntimeError(f"音频解码失败: {message}")
+        
+        logger.info(f"音频解码完成: {filled / cls.TARGET_SAMPLE_RATE:.2f}秒, {cls.TARGET_SAMPLE_RATE}Hz 单声道")
+        return buffer[:filled]
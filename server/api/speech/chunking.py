@@ -0,0 +1,38 @@
+from typing import Dict, List, Tuple
+
+def plan_windows(vad_segments: List[List[int]], total_ms: int, window_ms: int) -> List[Tuple[int, int]]:
+    """按VAD切分结果把长音频划分为识别窗口
+
+    窗口边界放在两段语音之间静音的中点，保证不会切断任何一段语音。
+
+    Args:
+        vad_segments: VAD输出的语音段 [[开始毫秒, 结束毫秒], ...]，按时间排序
+        total_ms: 音频总时长（毫秒）
+        window_ms: 目标窗口长度（毫秒）
+
+    Returns:
+        [(窗口开始毫秒, 窗口结束毫秒), ...]，首尾相接覆盖整段音频
+    """
+    windows = []
+    window_start = 0
+    for i, (_, seg_end) in enumerate(vad_segments[:-1]):
+        if seg_end - window_start >= window_ms:
+            next_start = vad_segments[i + 1][0]
+            boundary = (seg_end + next_start) // 2
+            windows.append((window_start, boundary))
+            window_start = boundary
+    windows.append((window_start, total_ms))
+    return windows
+
+def shift_sentences(sentences: List[Dict], offset_ms: int, speaker_map: Dict[int, int] = None) -> List[Dict]:
+    """把窗口内的句子时间戳平移到整段音频的时间轴上，并替换说话人编号"""
+    for sentence in sentences:
+        sentence["start"] = int(sentence["start"]) + offset_ms
+        sentence["end"] = int(sentence["end"]) + offset_ms
+        sentence["timestamp"] = [
+            [int(ts[0]) + offset_ms, int(ts[1]) + offset_ms]
+            for ts in sentence.get("timestamp", [])
+        ]
+        if speaker_map is not None:
+            sentence["spk"] = speaker_map.get(sentence["spk"], sentence["spk"])
+    return sentences
@@ -0,0 +1,94 @@
+class SpeechConfig:
+    """语音识别服务配置类"""
+    def __init__(self):
+        # 识别任务队列配置
+        # recognition_workers: 同时执行识别任务的工作线程数
+        #   模型实例共享同一组CPU核心，默认1个，避免多个任务争抢核心
+        #   启用模型进程池时至少与模型进程数相同，保证每个进程都有任务可做
+        # recognition_queue_size: 排队任务数上限，超过后拒绝提交（背压）
+        # recognition_job_history: 内存中保留的已结束任务数量
+        self.recognition_workers = 1
+        self.recognition_queue_size = 100
+        self.recognition_job_history = 200
+        
+        # 长音频分窗识别配置
+        # window_seconds: 每个识别窗口的目标时长，窗口边界对齐到VAD静音处
+        #   每识别完一个窗口就推送一次进度和已完成的句子
+        # speaker_match_threshold: 跨窗口对齐说话人时的声纹余弦相似度阈值
+        self.window_seconds = 180
+        self.speaker_match_threshold = 0.6
+        
+        # 模型进程池配置
+        # parallel_workers: 模型进程数，每个进程加载一份模型（约1GB内存）
+        #   启用后API进程不再加载模型，VAD、各窗口识别和实时识别都分发到模型进程执行
+        #   0 表示不启用，模型加载在API进程内，识别任务和实时识别的模型调用逐个执行
+        # parallel_worker_threads: 每个进程的推理线程数，0 表示物理核心数平均分配
+        # window_max_attempts: 单个窗口的最大尝试次数，失败时只重试该窗口
+        # model_threads: 当前进程内模型的推理线程数，0 表示物理核心数-1
+        #   由模型进程在加载模型前设置，一般不需要手动修改
+        self.parallel_workers = 0
+        self.parallel_worker_threads = 0
+        self.window_max_attempts = 2
+        self.model_threads = 0
+        
+        # 批量文本纠错配置
+        # correction_workers: 纠错进程数，0 表示不启用，所有句子在当前进程内逐句纠正
+        #   每个进程加载一份纠错模型和分词器；只在未启用模型进程池、识别在API进程内进行时生效，
+        #   模型进程池中各窗口的纠错本身已经并行
+        # correction_chunk_size: 每次分发给一个纠错进程的句子数
+        # correction_batch_min_sentences: 句子数达到该值才使用纠错进程池，句子少时进程间通信不划算
+        self.correction_workers = 0
+        self.correction_chunk_size = 100
+        self.correction_batch_min_sentences = 200
+        
+        # 拼音缓存配置
+        # pinyin_cache_size: 分词得到的普通词的拼音缓存条目上限，按最近使用淘汰，0 表示不缓存
+        #   目标词的拼音不计入上限，始终常驻；每个条目约 250-400 字节
+        self.pinyin_cache_size = 50000
+        
+        # 纠错结果缓存配置
+        # correction_cache_size: 按 (keywords版本, 句子原文) 缓存的纠错结果条目上限，按最近使用淘汰，0 表示不缓存
+        #   重新纠错已保存的转写、识别内容重复的录音时，相同句子只需一次查找
+        # correction_cache_persist: 是否把纠错结果追加写入 storage/correction_cache，重启后继续使用
+        self.correction_cache_size = 100000
+        self.correction_cache_persist = False
+        
+        # 已保存转写的重新纠正
+        # recorrect_archive_on_hotwords_update: 热词保存后，在后台只对可能受影响的句子重新纠错并更新 original.json
+        #   用户手动修改过的段落不处理
+        self.recorrect_archive_on_hotwords_update = True
+        
+        # 拼音相似度匹配配置
+        # similarity_length_tolerance: 允许与分词结果音节数相差的音节数，用于纠正识别时多出或漏掉的字
+        #   0 表示只匹配音节数相同的目标词，目前最多为 1；音节数不同时至少扣除一次插入或删除，
+        #   只有阈值较低的目标词（如 4 个字、阈值 0.75 以下）才可能匹配。默认关闭：打开后原本不会改动的
+        #   句子也可能被替换，纠错结果和已有转写重新纠正的结果都会变化，需要时设为 1
+        self.similarity_length_tolerance = 0
+        # match_cache_size: 按词缓存相似度匹配结果（不含上下文检查）的条目上限，达到上限时清空，0 表示不缓存
+        #   转写中同一个词反复出现，命中时不再转换拼音和查询候选索引
+        self.match_cache_size = 50000
+        
+        # 分词器配置
+        # segmenter_backend: 纠错时使用的分词方式，第一次纠错时才加载
+        #   pkuseg: 准确率最高，加载约 2 秒，每个进程常驻内存较大
+        #   dag: 前缀词典 + 有向无环图，复用 pypinyin 已加载的词组表，初始化快、内存小，未登录词切分略差
+        #   window: 不分词，按目标词字数滑动窗口匹配，不受分词边界影响，长句较慢
+        #   trie: 不分词，整句转换为音节后沿目标词音节前缀树查找近音片段，不受分词边界影响，
+        #     召回最高；只处理纯汉字目标词
+        self.segmenter_backend = "pkuseg"
+        
+        # PCM缓存配置
+        # pcm_cache_max_bytes: 解码后PCM缓存的总大小上限，超过后按最近使用时间淘汰
+        #   float32 PCM 每小时音频约 230MB
+        self.pcm_cache_max_bytes = 10 * 1024 ** 3
+        
+        # 实时识别配置
+        # stream_vad_chunk_ms: 流式VAD每次处理的音频长度
+        # stream_partial_interval_ms: 语音段未结束时输出中间结果的间隔，0 表示只输出最终结果
+        # stream_idle_keep_ms: 静音期间保留的音频长度，VAD报告的语音开始点可能略早于当前块
+        self.stream_vad_chunk_ms = 200
+        self.stream_partial_interval_ms = 1000
+        self.stream_idle_keep_ms = 3000
+
+# 创建全局配置实例
+speech_config = SpeechConfig()
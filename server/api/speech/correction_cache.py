@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, TextIO, Tuple
+from ..logger import get_logger
+from .config import speech_config
+from .correction_spans import CorrectionResult
+
+logger = get_logger(__name__)
+
+def cache_version(keywords_version: Optional[str], segmenter_backend: str,
+                  length_tolerance: int, format_version: int) -> Optional[str]:
+    """缓存版本标识：keywords 内容、分词方式、长度容差或模型格式任一变化，纠错结果都可能不同"""
+    if keywords_version is None:
+        return None
+    key = f"{keywords_version}|{segmenter_backend}|{length_tolerance}|{format_version}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+class CorrectionCache:
+    """句子级纠错结果缓存
+
+    以 (缓存版本, 句子原文) 为键缓存纠正后的文本和替换位置，缓存版本见 cache_version。同一份转写重新纠错、
+    重新剪辑的录音识别出相同句子时只需一次字典查找。内存中按最近使用淘汰；
+    指定 cache_dir 时同时追加写入 <版本>-<文件格式>.jsonl，重启后或其他进程第一次用到该版本时读回。
+    keywords、分词方式或长度容差变化后版本不同，旧结果自然不会再命中。
+    """
+    # 磁盘上最多保留的版本文件数，按最近修改时间保留
+    MAX_VERSION_FILES = 5
+    # 缓存文件格式版本，纠正位置的格式变化后旧文件不再读取
+    FILE_FORMAT = 2
+
+    def __init__(self, max_size: int = None, cache_dir: str = None):
+        self.max_size = speech_config.correction_cache_size if max_size is None else max_size
+        self.cache_dir = cache_dir
+        self._entries: "OrderedDict[Tuple[str, str], CorrectionResult]" = OrderedDict()
+        self._loaded_versions = set()  # 已从磁盘读回的版本
+        self._files: Dict[str, TextIO] = {}  # 版本 -> 追加写入的文件
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _path_for(self, version: str) -> str:
+        return os.path.join(self.cache_dir, f"{version}-{self.FILE_FORMAT}.jsonl")
+
+    def _store(self, key: Tuple[str, str], result: CorrectionResult):
+        """加入内存缓存，调用方持有锁"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        self._entries[key] = result
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load_version(self, version: str):
+        """第一次用到某个版本时从磁盘读回，调用方持有锁"""
+        self._loaded_versions.add(version)
+        path = self._path_for(version)
+        if not os.path.exists(path):
+            return
+        loaded = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        item = json.loads(line)
+                        result = (item["r"], [tuple(span) for span in item["s"]])
+                    except (ValueError, KeyError, TypeError):
+                        continue  # 跳过写入中断产生的不完整行
+                    self._store((version, item["t"]), result)
+                    loaded += 1
+        except OSError as e:
+            logger.warning(f"读取纠错结果缓存失败: {path}, {str(e)}")
+            return
+        logger.info(f"从磁盘加载纠错结果缓存: {loaded} 条，版本: {version}")
+
+    def _append(self, version: str, text: str, result: CorrectionResult):
+        """追加写入磁盘，调用方持有锁"""
+        f = self._files.get(version)
+        if f is None:
+            self._prune_files(version)
+            f = open(self._path_for(version), 'a', encoding='utf-8')
+            self._files[version] = f
+        # 每条一行并立即写出，多个进程同时追加时行之间不会交错；中断留下的半行在读回时跳过
+        f.write(json.dumps({"t": text, "r": result[0], "s": result[1]}, ensure_ascii=False) + "\n")
+        f.flush()
+
+    def _prune_files(self, current: str):
+        """删除较旧版本的缓存文件"""
+        try:
+            names = [name for name in os.listdir(self.cache_dir)
+                     if name.endswith('.jsonl') and name != os.path.basename(self._path_for(current))]
+            paths = sorted((os.path.join(self.cache_dir, name) for name in names),
+                           key=os.path.getmtime, reverse=True)
+            for path in paths[self.MAX_VERSION_FILES - 1:]:
+                version = os.path.basename(path)[:-len('.jsonl')].rsplit('-', 1)[0]
+                old = self._files.pop(version, None)
+                if old is not None:
+                    old.close()
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"清理纠错结果缓存失败: {str(e)}")
+
+    def get(self, version: Optional[str], text: str) -> Optional[CorrectionResult]:
+        """查找缓存，未命中时返回 None"""
+        if not self.enabled or version is None:
+            return None
+        key = (version, text)
+        with self._lock:
+            if self.cache_dir and version not in self._loaded_versions:
+                self._load_version(version)
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, version: Optional[str], text: str, result: CorrectionResult, persist: bool = True):
+        """保存纠错结果
+
+        Args:
+            persist: 是否写入磁盘；结果来自已经写过磁盘的其他进程时为 False
+        """
+        if not self.enabled or version is None:
+            return
+        key = (version, text)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._store(key, result)
+            if self.cache_dir and persist:
+                try:
+                    self._append(version, text, result)
+                except OSError as e:
+                    logger.warning(f"写入纠错结果缓存失败: {str(e)}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        """清空内存中的缓存，磁盘文件保留"""
+        with self._lock:
+            self._entries.clear()
+            self._loaded_versions.clear()
+
+    def close(self):
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_size": self.max_size,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "persistent": bool(self.cache_dir)
+            }
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import pickle
+from typing import Dict, List, Optional, Tuple
+from .aho_corasick import ContextMatcher, OriginalWordReplacer
+from .config import speech_config
+from .pinyin_index import PinyinCandidateIndex
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+def keywords_version(keywords_path: str) -> Optional[str]:
+    """keywords 文件内容的 SHA-256，文件不存在时返回 None"""
+    if not os.path.exists(keywords_path):
+        return None
+    with open(keywords_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+class CorrectionModel:
+    """编译后的纠错模型
+
+    把目标词拼音表、上下文词自动机、原词替换自动机、拼音候选索引和分词词典词表打包成一个对象，
+    以 pickle 形式保存。启动时只要 keywords 内容没变，就直接加载这个文件，
+    不再调用 pypinyin、解析 YAML 或重建索引；多个工作进程加载同一个文件即可。
+    """
+    # 模型结构变化时递增，旧文件会被自动重新编译
+    FORMAT_VERSION = 6
+
+    def __init__(self, version: Optional[str],
+                 target_words: Dict[str, Tuple[List[str], List[str], float, List[str]]],
+                 dict_words: Optional[List[str]] = None,
+                 config_mtime: float = 0.0):
+        self.format_version = self.FORMAT_VERSION
+        self.version = version  # keywords 内容哈希
+        self.target_words = target_words  # {目标词: (拼音列表, 上下文词, 阈值, 原词列表)}
+        self.dict_words = dict_words  # 分词器自定义词典，None 表示未随模型编译
+        self.config_mtime = config_mtime  # 编译时 correction_config.yaml 的修改时间
+        self.segmenter = None  # 按本模型词典初始化的分词器，第一次纠错时创建，不随模型保存
+        self.segmenter_error = None  # 分词器初始化失败的原因，失败后不再重试
+        # 词 -> 相似度达到阈值的目标词，不随模型保存；热重载后随旧模型一起丢弃
+        self.match_cache: Dict[tuple, List[Tuple[int, float]]] = {}
+
+        self.original_words_map: Dict[str, str] = {}  # 原词 -> 目标词
+        for target_word, (_, _, _, orig_words) in target_words.items():
+            for orig in orig_words:
+                self.original_words_map[orig] = target_word
+        self.context_matcher = ContextMatcher(target_words)
+        self.original_replacer = OriginalWordReplacer(target_words, self.context_matcher)
+        self.candidate_index = PinyinCandidateIndex(target_words)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['segmenter'] = None
+        state['segmenter_error'] = None
+        state['match_cache'] = {}
+        return state
+
+    def cache_matches(self, key: tuple, matches: List[Tuple[int, float]]):
+        """缓存一个词的匹配结果，条目数达到上限时整体清空（不需要加锁，也不会无限增长）"""
+        if speech_config.match_cache_size <= 0:
+            return
+        if len(self.match_cache) >= speech_config.match_cache_size:
+            self.match_cache.clear()
+        self.match_cache[key] = matches
+
+    def save(self, path: str):
+        """原子写入：先写临时文件再替换，避免其他进程读到半个文件"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path: str, version: str, config_mtime: float = 0.0) -> Optional['CorrectionModel']:
+        """加载编译好的模型，文件不存在、格式过期或与当前 keywords 不一致时返回 None"""
+        if not version or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                model = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"读取编译后的纠错模型失败，将重新编译: {str(e)}")
+            return None
+
+        if (not isinstance(model, cls) or getattr(model, 'format_version', None) != cls.FORMAT_VERSION
+                or model.version != version or config_mtime > model.config_mtime):
+            logger.info("编译后的纠错模型已过期，需要重新编译")
+            return None
+        return model
@@ -0,0 +1,121 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from ..logger import get_logger
+from .config import speech_config
+
+logger = get_logger(__name__)
+
+def init_correction_worker():
+    """纠错进程初始化：加载编译后的纠错模型和分词器"""
+    from .text_correction import text_corrector
+    # 分词器默认在第一次纠错时加载，纠错进程启动时提前加载，避免第一批句子等待
+    text_corrector.get_segmenter()
+    logger.info(f"纠错进程已就绪，纠错模型版本: {text_corrector.model.version}")
+
+def correct_chunk(texts: List[str], version: Optional[str]) -> List[Tuple[str, list]]:
+    """在纠错进程中纠正一批句子，返回 (纠正后的文本, 替换位置)
+
+    Args:
+        texts: 待纠正的句子
+        version: 调用方使用的纠错模型版本，进程内版本不同时先重新加载
+    """
+    from .text_correction import text_corrector
+    if text_corrector.model.version != version:
+        text_corrector.reload()
+    model = text_corrector.model
+    if model.version != version:
+        raise RuntimeError(f"纠错模型版本不一致: {model.version} != {version}")
+    return [text_corrector.correct_text_with_spans(text, model) for text in texts]
+
+class CorrectionPool:
+    """批量文本纠错进程池
+
+    纠错（分词、拼音转换、相似度计算）是纯 Python 计算，受 GIL 限制只能用满一个核心。
+    句子较多时把句子按块分发到多个预先加载了纠错模型的进程，再按原顺序拼回。
+    未启用、句子太少或进程池出错时返回 None，由调用方在当前进程内逐句纠正。
+    只在主进程中启用，模型工作进程内不会再创建子进程。
+    """
+    def __init__(self, workers: int = None, chunk_size: int = None, min_sentences: int = None,
+                 func: Callable = correct_chunk, initializer: Callable = init_correction_worker):
+        self.workers = speech_config.correction_workers if workers is None else workers
+        self.chunk_size = chunk_size or speech_config.correction_chunk_size
+        self.min_sentences = speech_config.correction_batch_min_sentences if min_sentences is None else min_sentences
+        self._func = func
+        self._initializer = initializer
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.batches = 0  # 通过进程池完成的批次数
+        self.sentences = 0  # 通过进程池纠正的句子数
+        self.fallbacks = 0  # 进程池出错后回退到单进程的次数
+        self.busy_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0 and multiprocessing.parent_process() is None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self._initializer
+                )
+                logger.info(f"纠错进程池已启动: {self.workers} 个进程")
+            return self._executor
+
+    def correct_texts(self, texts: List[str], version: Optional[str]) -> Optional[List]:
+        """按块并行纠正句子
+
+        Returns:
+            与 texts 一一对应的纠正结果；未使用进程池时返回 None
+        """
+        if not self.enabled or len(texts) < max(1, self.min_sentences):
+            return None
+
+        start_time = time.time()
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        try:
+            executor = self._get_executor()
+            futures = [executor.submit(self._func, chunk, version) for chunk in chunks]
+            results = []
+            for future in futures:
+                results.extend(future.result())
+        except Exception as e:
+            logger.warning(f"纠错进程池执行失败，改为单进程纠错: {type(e).__name__}: {e}")
+            self.fallbacks += 1
+            self.shutdown()
+            return None
+
+        elapsed = time.time() - start_time
+        self.batches += 1
+        self.sentences += len(texts)
+        self.busy_seconds += elapsed
+        logger.info(f"纠错进程池完成 {len(texts)} 个句子（{len(chunks)} 块），耗时: {elapsed*1000:.2f}ms")
+        return results
+
+    def get_stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "running": self._executor is not None,
+            "chunk_size": self.chunk_size,
+            "min_sentences": self.min_sentences,
+            "batches": self.batches,
+            "sentences": self.sentences,
+            "fallbacks": self.fallbacks,
+            "busy_seconds": round(self.busy_seconds, 3)
+        }
+
+    def shutdown(self):
+        """关闭进程池，下次使用时重新创建"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+# 创建全局实例
+correction_pool = CorrectionPool()
@@ -0,0 +1,57 @@
+from typing import Dict, List, Optional, Tuple
+
+# 纠正规则
+RULE_ORIGINAL = "original"  # 原词替换
+RULE_PINYIN = "pinyin"  # 拼音相似度匹配
+
+# 一处纠正：(在纠正后文本中的偏移, 替换后的字数, 原文, 替换后的词, 规则, 相似度)
+# 原词替换没有相似度，为 None
+Span = Tuple[int, int, str, str, str, Optional[float]]
+CorrectionResult = Tuple[str, List[Span]]
+
+def make_span(offset: int, original: str, target: str, rule: str, similarity: float = None) -> Span:
+    return (offset, len(target), original, target, rule, similarity)
+
+def span_to_dict(span: Span) -> Dict:
+    """转换为保存在转写段落中的格式"""
+    offset, length, original, target, rule, similarity = span
+    return {
+        "offset": offset,
+        "length": length,
+        "original": original,
+        "target": target,
+        "rule": rule,
+        "similarity": None if similarity is None else round(similarity, 4)
+    }
+
+def span_from_dict(item: Dict) -> Span:
+    return (item["offset"], item["length"], item["original"], item["target"], item["rule"], item.get("similarity"))
+
+def rebase_spans(old_spans: List[Span], new_spans: List[Span]) -> List[Span]:
+    """文本再次纠正后，合并新旧两次的纠正位置
+
+    old_spans 的偏移相对于再次纠正前的文本，new_spans 相对于再次纠正后的文本。
+    旧的纠正按新纠正造成的字数变化平移，与新纠正重叠的旧纠正被新纠正取代。
+    """
+    # 新纠正在再次纠正前文本中的范围，以及到该处为止的字数变化
+    replaced = []
+    delta = 0
+    for offset, length, original, _, _, _ in sorted(new_spans, key=lambda s: s[0]):
+        start = offset - delta
+        replaced.append((start, start + len(original), delta + length - len(original)))
+        delta += length - len(original)
+
+    result = list(new_spans)
+    for span in old_spans:
+        offset, length = span[0], span[1]
+        shift = 0
+        overlapped = False
+        for start, end, shift_after in replaced:
+            if start < offset + length and offset < end:
+                overlapped = True
+                break
+            if end <= offset:
+                shift = shift_after
+        if not overlapped:
+            result.append((offset + shift,) + tuple(span[1:]))
+    return sorted(result, key=lambda s: s[0])
@@ -0,0 +1,305 @@
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+from ..logger import get_logger
+from .config import speech_config
+from .progress import RecognitionProgress
+
+logger = get_logger(__name__)
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# 任务状态到文件状态的映射（前端依赖文件状态字符串）
+FILE_STATUS_MAP = {
+    JOB_QUEUED: "识别中",
+    JOB_RUNNING: "识别中",
+    JOB_DONE: "已完成",
+    JOB_FAILED: "失败",
+}
+
+class JobQueueFullError(Exception):
+    """识别任务队列已满"""
+    pass
+
+class RecognitionJob:
+    """识别任务"""
+    def __init__(self, file_id: str, func: Callable, args: tuple):
+        self.job_id = uuid.uuid4().hex
+        self.file_id = file_id
+        self.func = func
+        self.args = args
+        self.state = JOB_QUEUED
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = RecognitionProgress()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (JOB_DONE, JOB_FAILED)
+
+    def to_dict(self) -> Dict:
+        """转换为API返回格式"""
+        return {
+            "job_id": self.job_id,
+            "file_id": self.file_id,
+            "state": self.state,
+            "status": FILE_STATUS_MAP[self.state],
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress.snapshot(),
+        }
+
+class RecognitionBatch:
+    """批量识别任务
+
+    汇总一组识别任务的进度。已结束（成功或失败）的文件按全部时长计入已处理，
+    执行中的文件按已识别时长计入，预计剩余时间按批次开始以来的处理速度估算。
+    """
+    def __init__(self, jobs: List[RecognitionJob], durations: Dict[str, float], rejected: List[Dict]):
+        self.batch_id = uuid.uuid4().hex
+        self.jobs = jobs
+        self.durations = durations  # file_id -> 音频时长（秒）
+        self.rejected = rejected    # 未能提交的文件及原因
+        self.created_at = time.time()
+
+    @property
+    def finished(self) -> bool:
+        return all(job.finished for job in self.jobs)
+
+    def to_dict(self, include_jobs: bool = True) -> Dict:
+        total_seconds = sum(self.durations.get(job.file_id, 0) for job in self.jobs)
+        processed_seconds = 0.0
+        counts = {state: 0 for state in FILE_STATUS_MAP}
+        for job in self.jobs:
+            counts[job.state] += 1
+            duration = self.durations.get(job.file_id, 0)
+            if job.finished:
+                processed_seconds += duration
+            elif job.state == JOB_RUNNING:
+                processed_seconds += min(job.progress.decoded_seconds, duration)
+
+        elapsed = time.time() - self.created_at
+        remaining_time = None
+        if self.finished:
+            remaining_time = 0
+        elif processed_seconds > 0:
+            remaining_time = round(elapsed * (total_seconds - processed_seconds) / processed_seconds, 1)
+
+        data = {
+            "batch_id": self.batch_id,
+            "finished": self.finished,
+            "file_count": len(self.jobs),
+            "jobs": counts,
+            "total_seconds": round(total_seconds, 2),
+            "processed_seconds": round(processed_seconds, 2),
+            "progress": int(processed_seconds / total_seconds * 100) if total_seconds > 0 else (100 if self.finished else 0),
+            "elapsed": round(elapsed, 1),
+            "remaining_time": remaining_time,
+            "rejected": self.rejected,
+            "created_at": self.created_at,
+        }
+        if include_jobs:
+            data["items"] = [
+                {
+                    "job_id": job.job_id,
+                    "file_id": job.file_id,
+                    "state": job.state,
+                    "status": FILE_STATUS_MAP[job.state],
+                    "duration": self.durations.get(job.file_id, 0),
+                    "progress": job.progress.snapshot()["progress"] if not job.finished else 100,
+                    "error": job.error,
+                } for job in self.jobs
+            ]
+        return data
+
+class RecognitionJobManager:
+    """识别任务管理器
+
+    任务提交后立即返回，由固定数量的工作线程从有界队列中取出执行。
+    任务状态只保存在这里，文件元数据只在任务结束时写入最终状态。
+    任务函数以关键字参数 progress 接收该任务的 RecognitionProgress。
+    """
+    def __init__(self, max_workers: int = None, max_queue_size: int = None, history_size: int = None):
+        self.max_workers = max_workers or max(speech_config.recognition_workers, speech_config.parallel_workers)
+        self.max_queue_size = max_queue_size or speech_config.recognition_queue_size
+        self.history_size = history_size or speech_config.recognition_job_history
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._jobs: "OrderedDict[str, RecognitionJob]" = OrderedDict()
+        self._file_jobs: Dict[str, str] = {}  # file_id -> 最近的 job_id
+        self._batches: "OrderedDict[str, RecognitionBatch]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+
+    def _ensure_workers(self):
+        """按需启动工作线程"""
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"recognition-worker-{i}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            logger.info(f"识别工作线程已启动: {self.max_workers} 个, 队列上限: {self.max_queue_size}")
+
+    def submit(self, file_id: str, func: Callable, *args) -> RecognitionJob:
+        """提交识别任务
+
+        同一文件已有排队或执行中的任务时直接返回该任务。
+
+        Raises:
+            JobQueueFullError: 队列已满
+        """
+        self._ensure_workers()
+        with self._lock:
+            existing = self._get_active_job(file_id)
+            if existing:
+                logger.info(f"文件已有进行中的识别任务: {file_id} -> {existing.job_id}")
+                return existing
+
+            job = RecognitionJob(file_id, func, args)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                logger.warning(f"识别队列已满({self.max_queue_size})，拒绝任务: {file_id}")
+                raise JobQueueFullError(f"识别队列已满，请稍后重试（上限 {self.max_queue_size}）")
+
+            self._jobs[job.job_id] = job
+            self._file_jobs[file_id] = job.job_id
+            self._trim_history()
+
+        logger.info(f"识别任务已提交: {job.job_id}, file_id: {file_id}, 排队数: {self._queue.qsize()}")
+        return job
+
+    def _get_active_job(self, file_id: str) -> Optional[RecognitionJob]:
+        job_id = self._file_jobs.get(file_id)
+        job = self._jobs.get(job_id) if job_id else None
+        if job and not job.finished:
+            return job
+        return None
+
+    def _trim_history(self):
+        """只保留有限数量的已结束任务"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            job = self._jobs.pop(job_id)
+            if self._file_jobs.get(job.file_id) == job_id:
+                del self._file_jobs[job.file_id]
+
+    def _worker_loop(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._run_job(job)
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job: RecognitionJob):
+        job.state = JOB_RUNNING
+        job.started_at = time.time()
+        logger.info(f"开始执行识别任务: {job.job_id}, file_id: {job.file_id}")
+        try:
+            result = job.func(*job.args, progress=job.progress)
+            if isinstance(result, dict) and result.get("code", 200) != 200:
+                job.error = result.get("message", "识别失败")
+                job.state = JOB_FAILED
+            else:
+                job.state = JOB_DONE
+        except Exception as e:
+            logger.error(f"识别任务执行异常: {job.job_id}, {str(e)}", exc_info=True)
+            job.error = str(e)
+            job.state = JOB_FAILED
+        finally:
+            job.finished_at = time.time()
+            if job.state == JOB_DONE:
+                job.progress.set_stage("done")
+            else:
+                job.progress.fail(job.error)
+            logger.info(f"识别任务结束: {job.job_id}, 状态: {job.state}, 耗时: {job.finished_at - job.started_at:.2f}秒")
+
+    def submit_batch(self, items: List[Dict], func: Callable) -> RecognitionBatch:
+        """批量提交识别任务
+
+        按音频时长从长到短提交（LPT调度）：最长的文件最先开始，短文件填补各工作线程
+        的空闲时间，整批完成时间最短。队列放不下的文件记录在 rejected 中。
+
+        Args:
+            items: [{"file_id": ..., "duration": 秒, "args": 传给 func 的参数元组}, ...]
+            func: 任务函数
+        """
+        jobs, rejected, durations = [], [], {}
+        for item in sorted(items, key=lambda item: item.get("duration") or 0, reverse=True):
+            try:
+                job = self.submit(item["file_id"], func, *item["args"])
+            except JobQueueFullError as e:
+                rejected.append({"file_id": item["file_id"], "reason": str(e)})
+                continue
+            jobs.append(job)
+            durations[item["file_id"]] = item.get("duration") or 0
+
+        batch = RecognitionBatch(jobs, durations, rejected)
+        with self._lock:
+            self._batches[batch.batch_id] = batch
+            while len(self._batches) > self.history_size:
+                self._batches.popitem(last=False)
+        logger.info(f"批量识别已提交: {batch.batch_id}, 文件数: {len(jobs)}, 被拒绝: {len(rejected)}, "
+                    f"总时长: {sum(durations.values()):.0f}秒")
+        return batch
+
+    def get_batch(self, batch_id: str) -> Optional[RecognitionBatch]:
+        return self._batches.get(batch_id)
+
+    def get_job(self, job_id: str) -> Optional[RecognitionJob]:
+        return self._jobs.get(job_id)
+
+    def get_job_by_file(self, file_id: str) -> Optional[RecognitionJob]:
+        """获取文件最近一次的识别任务"""
+        job_id = self._file_jobs.get(file_id)
+        return self._jobs.get(job_id) if job_id else None
+
+    def queue_position(self, job: RecognitionJob) -> int:
+        """任务在队列中的位置，从1开始；不在排队时返回0"""
+        if job.state != JOB_QUEUED:
+            return 0
+        with self._lock:
+            queued = [j for j in self._jobs.values() if j.state == JOB_QUEUED]
+        for i, j in enumerate(queued, 1):
+            if j is job:
+                return i
+        return 0
+
+    def list_jobs(self) -> List[Dict]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in reversed(jobs)]
+
+    def get_stats(self) -> Dict:
+        """获取队列统计信息"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {state: 0 for state in FILE_STATUS_MAP}
+        for job in jobs:
+            counts[job.state] += 1
+        return {
+            "workers": self.max_workers,
+            "queue_size": self._queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "jobs": counts,
+        }
+
+# 创建全局实例
+recognition_jobs = RecognitionJobManager()
@@ -3,6 +3,7 @@ from funasr import AutoModel
 from torch.cuda import is_available, get_device_name, get_device_properties
 import logging
 import psutil  # 添加这个导入来获取更详细的CPU信息
+from .config import speech_config
 
 __all__ = ['model']
 
@@ -90,7 +91,8 @@ class ModelService:
             logger.info(f"GPU显存总量: {get_device_properties(0).total_memory / 1024**2:.0f}MB")
         else:
             # CPU模式下的配置
-            recommended_cpu = max(1, physical_cores - 1)
+            # 多进程识别时由进程池为每个进程分配线程预算
+            recommended_cpu = speech_config.model_threads or max(1, physical_cores - 1)
             config = {
                 "device": device,
                 "batch_size_s": 60,  # CPU模式下会被强制为单个处理
@@ -108,7 +110,7 @@ class ModelService:
             logger.info("=== CPU模式配置 ===")
             logger.info(f"使用CPU模式")
             logger.info(f"物理核心数: {physical_cores}")
-            logger.info(f"建议使用的核心数: {recommended_cpu} (物理核心数-1)")
+            logger.info(f"使用的核心数: {recommended_cpu}" + ("" if speech_config.model_threads else " (物理核心数-1)"))
         
         self.model = AutoModel(
             model=model_path,
@@ -0,0 +1,168 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple, Union
+import numpy as np
+from ..logger import get_logger
+from ..files.config import config as file_config
+from .audio_utils import AudioConverter
+from .config import speech_config
+
+logger = get_logger(__name__)
+
+HASH_CHUNK_BYTES = 1 << 20
+
+def hash_file(file_path: str) -> str:
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class PcmCache:
+    """解码后PCM的缓存
+
+    原始音频解码为16kHz单声道 float32 后以 .npy 保存，按音频内容的 SHA-256 命名，
+    同一段音频重新识别（修改热词、切换语言）时直接内存映射读取，不再调用 ffmpeg。
+    模型进程也通过文件路径映射同一份数据，窗口不需要在进程间复制。
+    缓存总大小超过上限时按最近使用时间淘汰，正在使用的条目不会被淘汰。
+    """
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        self.cache_dir = cache_dir or file_config.pcm_dir
+        self.max_bytes = speech_config.pcm_cache_max_bytes if max_bytes is None else max_bytes
+        self._hashes: Dict[Tuple[str, int, int], str] = {}  # (路径, 大小, 修改时间) -> 内容哈希
+        self._pinned: Dict[str, int] = {}  # 正在使用的条目及引用计数
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def content_key(self, source: Union[str, bytes]) -> str:
+        """音频内容的哈希，文件路径按 (大小, 修改时间) 记住已算过的结果"""
+        if isinstance(source, (bytes, bytearray)):
+            return hashlib.sha256(source).hexdigest()
+        stat = os.stat(source)
+        file_key = (os.path.abspath(source), stat.st_size, stat.st_mtime_ns)
+        key = self._hashes.get(file_key)
+        if key is None:
+            key = hash_file(source)
+            self._hashes[file_key] = key
+        return key
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """读取缓存，返回只读的内存映射数组；不存在或已损坏时返回 None"""
+        path = self.path_for(key)
+        try:
+            speech = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            logger.warning(f"PCM缓存损坏，已删除: {path}, {str(e)}")
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)  # 更新最近使用时间，用于淘汰
+        except OSError:
+            pass
+        return speech
+
+    def put(self, key: str, speech: np.ndarray) -> np.ndarray:
+        """写入缓存并返回内存映射数组，写入过程中断不会留下不完整的文件"""
+        path = self.path_for(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.save(f, np.asarray(speech, dtype=np.float32))
+        os.replace(temp_path, path)
+        self.evict(keep=key)
+        return np.load(path, mmap_mode='r')
+
+    @contextmanager
+    def open(self, source: Union[str, bytes]) -> Iterator[Tuple[np.ndarray, str]]:
+        """获取音频的PCM，缓存未命中时解码并写入缓存
+
+        使用期间该条目不会被淘汰。
+
+        Yields:
+            (内存映射的 float32 PCM, 缓存文件路径)
+        """
+        key = self.content_key(source)
+        with self._lock:
+            self._pinned[key] = self._pinned.get(key, 0) + 1
+        try:
+            speech = self.get(key)
+            if speech is not None:
+                self.hits += 1
+                logger.info(f"PCM缓存命中: {key[:12]}")
+            else:
+                self.misses += 1
+                logger.info(f"PCM缓存未命中，开始解码: {key[:12]}")
+                speech = self.put(key, AudioConverter.decode_to_array(source))
+            yield speech, self.path_for(key)
+        finally:
+            with self._lock:
+                self._pinned[key] -= 1
+                if not self._pinned[key]:
+                    del self._pinned[key]
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.npy'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name[:-4], path))
+        return entries
+
+    def evict(self, keep: str = None) -> int:
+        """按最近使用时间淘汰，直到总大小不超过上限
+
+        Returns:
+            淘汰的条目数
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _, _ in entries)
+        removed = 0
+        for _, size, key, path in entries:
+            if total <= self.max_bytes:
+                break
+            with self._lock:
+                pinned = key == keep or key in self._pinned
+            if pinned:
+                continue
+            if self._remove(path):
+                total -= size
+                removed += 1
+        if removed:
+            logger.info(f"PCM缓存淘汰 {removed} 个条目，当前大小: {total / 1024 ** 2:.1f}MB")
+        return removed
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError as e:
+            # Windows 下其他进程仍在映射的文件无法删除，留到下次淘汰
+            logger.debug(f"删除PCM缓存失败: {path}, {str(e)}")
+            return False
+
+    def get_stats(self) -> Dict:
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+# 创建全局实例
+pcm_cache = PcmCache()
@@ -0,0 +1,89 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Mapping
+from .config import speech_config
+
+def _entry_bytes(word: str, pinyin_list: List[str]) -> int:
+    """估算一个缓存条目占用的内存（键、列表和各音节字符串）"""
+    return sys.getsizeof(word) + sys.getsizeof(pinyin_list) + sum(sys.getsizeof(p) for p in pinyin_list)
+
+class PinyinCache:
+    """词语拼音缓存
+
+    分两层：目标词的拼音常驻（随纠错模型整体替换），分词得到的普通词按最近使用淘汰，
+    条目数不超过 max_size，长期运行时内存不会随处理过的文本量增长。
+    """
+    def __init__(self, convert: Callable[[str], List[str]], max_size: int = None):
+        self.convert = convert
+        self.max_size = speech_config.pinyin_cache_size if max_size is None else max_size
+        self._pinned: Dict[str, List[str]] = {}
+        self._pinned_bytes = 0
+        self._entries: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._entries_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def pin(self, pinyins: Mapping[str, List[str]]):
+        """替换常驻的拼音（一般为当前纠错模型的目标词拼音表）"""
+        pinned = dict(pinyins)
+        pinned_bytes = sum(_entry_bytes(word, py) for word, py in pinned.items())
+        with self._lock:
+            self._pinned = pinned
+            self._pinned_bytes = pinned_bytes
+
+    def get(self, word: str) -> List[str]:
+        """获取词语的拼音，未缓存时转换并加入缓存"""
+        with self._lock:
+            pinyin_list = self._pinned.get(word)
+            if pinyin_list is None:
+                pinyin_list = self._entries.get(word)
+                if pinyin_list is not None:
+                    self._entries.move_to_end(word)
+            if pinyin_list is not None:
+                self.hits += 1
+                return pinyin_list
+            self.misses += 1
+
+        pinyin_list = self.convert(word)
+        if self.max_size <= 0:
+            return pinyin_list
+
+        with self._lock:
+            if word not in self._entries:
+                self._entries[word] = pinyin_list
+                self._entries_bytes += _entry_bytes(word, pinyin_list)
+                while len(self._entries) > self.max_size:
+                    old_word, old_pinyin = self._entries.popitem(last=False)
+                    self._entries_bytes -= _entry_bytes(old_word, old_pinyin)
+                    self.evictions += 1
+        return pinyin_list
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._pinned or word in self._entries
+
+    def __len__(self) -> int:
+        return len(self._pinned) + len(self._entries)
+
+    def clear(self):
+        """清空可淘汰的条目，常驻拼音保留"""
+        with self._lock:
+            self._entries.clear()
+            self._entries_bytes = 0
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_size": self.max_size,
+                "size": len(self._entries),
+                "pinned": len(self._pinned),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_bytes": self._entries_bytes,
+                "pinned_memory_bytes": self._pinned_bytes
+            }
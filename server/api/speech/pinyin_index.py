@@ -0,0 +1,446 @@
+import threading
+from typing import Dict, List, Sequence, Tuple
+import Levenshtein
+import numpy as np
+
+def syllable_similarity(p1: str, p2: str) -> float:
+    """单个音节的相似度：1 - 编辑距离/较长音节长度"""
+    max_len = max(len(p1), len(p2))
+    if max_len == 0:
+        return 1.0
+    return 1 - (Levenshtein.distance(p1, p2) / max_len)
+
+def pinyin_similarity(py1: Sequence[str], py2: Sequence[str]) -> float:
+    """计算两个拼音列表的相似度
+
+    逐个音节计算 1 - 编辑距离/较长音节长度，再取平均；音节数不同时返回 0。
+
+    Returns:
+        相似度分数 (0-1)
+    """
+    if len(py1) != len(py2):
+        return 0.0
+
+    total_similarity = 0.0
+    for p1, p2 in zip(py1, py2):
+        total_similarity += syllable_similarity(p1, p2)
+
+    return total_similarity / len(py1)
+
+class SyllableTable:
+    """音节编号表和音节相似度矩阵
+
+    目标词中出现的每个音节分配一个整数编号，预先算好任意两个音节之间的相似度
+    （TONE3 音节约 1300 个）。输入词中不在表里的音节（例如英文片段）按需计算一行并缓存。
+    句子中汉字的读音不在表里时用 encode 分配从表大小开始的编号，对应的行追加保存，
+    汉字读音有限，追加的行数不会超过 TONE3 音节数。
+    """
+    # 按需计算的行最多缓存的数量
+    MAX_EXTRA_ROWS = 10000
+
+    def __init__(self, syllables: Sequence[str]):
+        self.syllables: List[str] = list(dict.fromkeys(syllables))
+        self.ids: Dict[str, int] = {syllable: i for i, syllable in enumerate(self.syllables)}
+        size = len(self.syllables)
+        self.matrix = np.ones((size, size), dtype=np.float64)
+        for i, p1 in enumerate(self.syllables):
+            for j in range(i + 1, size):
+                self.matrix[i, j] = self.matrix[j, i] = syllable_similarity(p1, self.syllables[j])
+        self._reset_extra()
+
+    def _reset_extra(self):
+        size = len(self.syllables)
+        self._extra_rows: Dict[str, np.ndarray] = {}
+        self._encoded: Dict[str, int] = {}  # 不在表中的音节 -> 追加的编号
+        # 表内的行和追加的行连续存放，按编号取相似度只需一次下标运算；matrix 是其中前 size 行
+        self._rows = np.empty((size + 64, size), dtype=np.float64)
+        self._rows[:size] = self.matrix
+        self.matrix = self._rows[:size]
+        self._encode_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_extra_rows', '_encoded', '_rows', '_encode_lock'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset_extra()
+
+    def row(self, syllable: str) -> np.ndarray:
+        """音节与表中所有音节的相似度"""
+        index = self.ids.get(syllable)
+        if index is not None:
+            return self.matrix[index]
+        row = self._extra_rows.get(syllable)
+        if row is None:
+            row = np.array([syllable_similarity(syllable, p) for p in self.syllables], dtype=np.float64)
+            if len(self._extra_rows) < self.MAX_EXTRA_ROWS:
+                self._extra_rows[syllable] = row
+        return row
+
+    def encode(self, syllable: str) -> int:
+        """音节编号，不在表中的音节追加一行相似度，编号从表大小开始"""
+        index = self.ids.get(syllable, self._encoded.get(syllable))
+        if index is not None:
+            return index
+        with self._encode_lock:
+            index = self._encoded.get(syllable)
+            if index is None:
+                size = len(self.syllables)
+                index = size + len(self._encoded)
+                if index == len(self._rows):
+                    # 容量翻倍；先替换数组再发布编号，其他线程拿到编号时数组中一定已有这一行
+                    grown = np.empty((2 * index, size), dtype=np.float64)
+                    grown[:index] = self._rows[:index]
+                    self._rows = grown
+                    self.matrix = grown[:size]
+                self._rows[index] = self.row(syllable)
+                self._encoded[syllable] = index
+        return index
+
+    def similarities(self, syllable_ids: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """按 encode 得到的编号逐对取相似度，只读取用到的元素"""
+        rows = self._rows
+        return np.take(rows, syllable_ids * rows.shape[1] + columns)
+
+class _CandidateGroup:
+    """字数和音节数都相同的一组目标词"""
+    def __init__(self):
+        self.ids: List[int] = []
+        self.pinyins: List[Sequence[str]] = []
+        self.thresholds: List[float] = []
+        self.postings: Dict[Tuple[int, str], List[int]] = {}  # (音节位置, 音节) -> 组内行号
+        self.max_syllable_len = 0  # 组内最长音节的长度
+        self.min_threshold = 1.0  # 组内最低相似度阈值
+
+    def add(self, index: int, pinyin_list: Sequence[str], threshold: float):
+        row = len(self.ids)
+        self.ids.append(index)
+        self.pinyins.append(pinyin_list)
+        self.thresholds.append(threshold)
+        for position, syllable in enumerate(pinyin_list):
+            self.postings.setdefault((position, syllable), []).append(row)
+            self.max_syllable_len = max(self.max_syllable_len, len(syllable))
+        self.min_threshold = min(self.min_threshold, threshold)
+
+    def compile(self, table: SyllableTable):
+        """转换为数组：音节编号矩阵 (目标词数, 音节数)"""
+        self.ids = np.array(self.ids, dtype=np.int64)
+        self.thresholds = np.array(self.thresholds, dtype=np.float64)
+        self.syllable_ids = np.array([[table.ids[p] for p in pinyin_list] for pinyin_list in self.pinyins],
+                                     dtype=np.int32).reshape(len(self.ids), -1)
+        del self.pinyins
+
+    def candidate_rows(self, word_pinyin: Sequence[str]) -> np.ndarray:
+        """可能达到阈值的组内行号，按配置顺序排列
+
+        一个音节不完全相同时，它的相似度至少损失 1/L（L 为两个音节中较长者的长度），
+        所以要达到阈值 t，n 个音节中最多只能有 floor(n * (1 - t) * L) 个音节不同。
+        """
+        syllables = len(word_pinyin)
+        longest = max(self.max_syllable_len, max(len(p) for p in word_pinyin))
+        # 加一个很小的余量，避免浮点误差把恰好等于阈值的目标词筛掉
+        allowed_mismatches = int(syllables * (1 - self.min_threshold) * longest + 1e-9)
+        required = syllables - allowed_mismatches
+        if required <= 0:
+            return np.arange(len(self.ids))
+
+        counts: Dict[int, int] = {}
+        for position, syllable in enumerate(word_pinyin):
+            for row in self.postings.get((position, syllable), ()):
+                counts[row] = counts.get(row, 0) + 1
+        return np.array(sorted(row for row, count in counts.items() if count >= required), dtype=np.int64)
+
+class PinyinCandidateIndex:
+    """目标词拼音候选索引
+
+    字数、音节数都相同的词之间的相似度匹配先按 (字数, 音节数) 分组；
+    组内再按 (音节位置, 音节) 建倒排表，只保留与输入完全相同的音节数达到下限的目标词，
+    阈值较低、下限不足 1 个音节时退化为整组。
+
+    候选词的相似度用音节相似度矩阵批量计算：每个音节位置取一次矩阵行并按目标词的音节编号
+    gather，逐位置累加后除以音节数。累加顺序与 pinyin_similarity 相同，结果完全一致。
+    音节数相差 1 的目标词由 LengthTolerantIndex 另外查找。
+    """
+    def __init__(self, target_words: Dict[str, Tuple[List[str], List[str], float, List[str]]]):
+        self.words: List[str] = []
+        self._groups: Dict[Tuple[int, int], _CandidateGroup] = {}
+        for word, (pinyin_list, _, threshold, _) in target_words.items():
+            index = len(self.words)
+            self.words.append(word)
+            key = (len(word), len(pinyin_list))
+            self._groups.setdefault(key, _CandidateGroup()).add(index, pinyin_list, threshold)
+
+        self.syllable_table = SyllableTable(
+            [p for pinyin_list, _, _, _ in target_words.values() for p in pinyin_list]
+        )
+        for group in self._groups.values():
+            group.compile(self.syllable_table)
+        self.length_tolerant = LengthTolerantIndex(target_words, self.syllable_table)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def candidates(self, word: str, word_pinyin: Sequence[str]) -> List[int]:
+        """返回可能达到阈值的目标词序号，按配置顺序排列"""
+        group = self._groups.get((len(word), len(word_pinyin)))
+        if group is None or not word_pinyin:
+            return []
+        return group.ids[group.candidate_rows(word_pinyin)].tolist()
+
+    def matches(self, word: str, word_pinyin: Sequence[str]) -> List[Tuple[int, float]]:
+        """返回相似度达到各自阈值的目标词
+
+        Returns:
+            [(目标词序号, 相似度), ...]，按配置顺序排列
+        """
+        group = self._groups.get((len(word), len(word_pinyin)))
+        if group is None or not word_pinyin:
+            return []
+        rows = group.candidate_rows(word_pinyin)
+        if not len(rows):
+            return []
+
+        syllable_ids = group.syllable_ids[rows]
+        total = np.zeros(len(rows), dtype=np.float64)
+        for position, syllable in enumerate(word_pinyin):
+            total += self.syllable_table.row(syllable)[syllable_ids[:, position]]
+        scores = total / len(word_pinyin)
+
+        passed = scores >= group.thresholds[rows]
+        return list(zip(group.ids[rows][passed].tolist(), scores[passed].tolist()))
+
+    def length_tolerant_matches(self, word_pinyin: Sequence[str], tolerance: int = 1) -> List[Tuple[int, float]]:
+        """音节数与输入相差 1 到 tolerance 个、相似度达到阈值的目标词（识别时多字或漏字）"""
+        return self.length_tolerant.matches(word_pinyin, tolerance)
+
+def syllable_edit_distances(rows: Sequence[np.ndarray], columns: Sequence[np.ndarray]) -> np.ndarray:
+    """输入音节序列与一组等长目标词之间的加权编辑距离，所有目标词同时计算
+
+    替换代价为 1 - 音节相似度，插入和删除代价为 1。动态规划表的每一格是一个数组
+    （组内每个目标词一个值），每个输入音节只需 音节数 次数组运算。
+
+    Args:
+        rows: 输入各音节与音节表的相似度行
+        columns: 目标词每个音节位置上的音节编号数组，长度都等于目标词数
+    """
+    count = len(columns[0])
+    previous = [np.full(count, float(j)) for j in range(len(columns) + 1)]
+    for i, row in enumerate(rows, 1):
+        cost = 1 - row
+        current = [np.full(count, float(i))]
+        for j, column in enumerate(columns, 1):
+            cell = np.minimum(previous[j - 1] + cost[column], previous[j] + 1)
+            np.minimum(cell, current[j - 1] + 1, out=cell)
+            current.append(cell)
+        previous = current
+    return previous[-1]
+
+class _LengthGroup:
+    """音节数相同的一组目标词"""
+    def __init__(self, size: int):
+        self.size = size
+        self.ids: List[int] = []
+        self.pinyins: List[Sequence[str]] = []
+        self.thresholds: List[float] = []
+
+    def add(self, index: int, pinyin_list: Sequence[str], threshold: float):
+        self.ids.append(index)
+        self.pinyins.append(pinyin_list)
+        self.thresholds.append(threshold)
+
+    def compile(self, table: SyllableTable):
+        """转换为数组：每个音节位置上组内各目标词的音节编号"""
+        self.ids = np.array(self.ids, dtype=np.int64)
+        self.thresholds = np.array(self.thresholds, dtype=np.float64)
+        self.columns = [np.array([table.ids[pinyin_list[position]] for pinyin_list in self.pinyins], dtype=np.int64)
+                        for position in range(self.size)]
+        del self.pinyins
+
+class LengthTolerantIndex:
+    """音节数与输入相差不超过 max_tolerance 的目标词索引
+
+    音节数不同时至少需要一次插入或删除（代价 1），相似度 1 - 编辑距离/较长音节数 要达到阈值 t，
+    较长一方为 M 个音节时总代价不能超过 M*(1-t)。只有这个预算不小于长度差的目标词才可能匹配，
+    其余目标词（例如默认阈值 0.9 的短词）不进入索引。
+
+    进入索引的目标词按音节数分组，查找时对音节数相差 1 到 tolerance 的每一组，
+    用音节相似度矩阵同时计算输入与组内所有目标词的编辑距离。不做候选过滤
+    （阈值较低时不共享任何音节片段的目标词也可能匹配），结果与逐个计算所有目标词相同。
+    """
+    def __init__(self, target_words: Dict[str, Tuple[List[str], List[str], float, List[str]]],
+                 table: SyllableTable, max_tolerance: int = 1):
+        self.table = table
+        self.max_tolerance = max_tolerance
+        self._groups: Dict[int, _LengthGroup] = {}  # 音节数 -> 目标词
+        for index, (word, (pinyin_list, _, threshold, _)) in enumerate(target_words.items()):
+            size = len(pinyin_list)
+            if not size or size != len(word) or (1 - threshold) * (size + max_tolerance) < 1 - 1e-9:
+                continue
+            self._groups.setdefault(size, _LengthGroup(size)).add(index, pinyin_list, threshold)
+        for group in self._groups.values():
+            group.compile(table)
+            group.thresholds = np.array(group.thresholds, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return sum(len(group.ids) for group in self._groups.values())
+
+    @property
+    def indexes(self) -> List[int]:
+        """进入索引的目标词序号（与 PinyinCandidateIndex.words 一致），按配置顺序排列"""
+        return sorted(i for group in self._groups.values() for i in group.ids.tolist())
+
+    @property
+    def max_length(self) -> int:
+        """索引中最长目标词的音节数，没有目标词时为 0"""
+        return max(self._groups, default=0)
+
+    def matches(self, word_pinyin: Sequence[str], tolerance: int = 1) -> List[Tuple[int, float]]:
+        """音节数相差 1 到 tolerance 个、相似度达到阈值的目标词
+
+        Returns:
+            [(目标词序号, 相似度), ...]，按配置顺序排列
+        """
+        tolerance = min(tolerance, self.max_tolerance)
+        size = len(word_pinyin)
+        # 多数输入词没有长度相近的目标词，直接返回
+        groups = [self._groups[n] for difference in range(1, tolerance + 1)
+                  for n in (size - difference, size + difference) if n in self._groups]
+        if not size or not groups:
+            return []
+
+        rows = [self.table.row(p) for p in word_pinyin]
+        results = []
+        for group in groups:
+            longest = max(size, group.size)
+            # 加一个很小的余量，避免浮点误差把恰好等于阈值的目标词筛掉
+            budgets = longest * (1 - group.thresholds) + 1e-9
+            distances = syllable_edit_distances(rows, group.columns)
+            passed = distances <= budgets
+            results.extend(zip(group.ids[passed].tolist(), (1 - distances[passed] / longest).tolist()))
+        results.sort()
+        return results
+
+def _expand(starts: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """把每个 [start, start+count) 区间展开为下标，同时返回每个下标来自第几个区间"""
+    owners = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return starts[owners] + offsets, owners
+
+class SyllableTrie:
+    """目标词音节前缀树
+
+    只收录每个字对应一个音节的纯汉字目标词。从句子的某个音节位置出发沿树向下走，
+    每走一步累计损失 1 - 音节相似度；目标词的相似度为 1 - 损失/音节数，
+    要达到阈值 t，n 个音节的目标词最多允许 n*(1-t) 的损失。每个节点记录子树中最大的允许损失，
+    累计损失超过时整棵子树不再访问。
+
+    节点按广度优先编号，子节点和节点上的目标词都连续存放在数组中。查找时所有起始位置
+    同时逐层向下走，每一层只需几次数组运算，层数不超过最长目标词的字数。
+    """
+    def __init__(self, target_words: Dict[str, Tuple[List[str], List[str], float, List[str]]],
+                 table: SyllableTable):
+        self.table = table
+        self.words: List[str] = []
+        children: List[Dict[int, int]] = [{}]  # 建树时的节点：音节编号 -> 子节点
+        terminals: Dict[int, List[int]] = {}  # 节点 -> 在该节点结束的词序号
+        budgets = [0.0]
+        syllable_counts, word_budgets = [], []
+        for word, (pinyin_list, _, threshold, _) in target_words.items():
+            if not pinyin_list or len(pinyin_list) != len(word) or not all('\u4e00' <= c <= '\u9fa5' for c in word):
+                continue
+            ids = [table.ids.get(p) for p in pinyin_list]
+            if None in ids:
+                continue
+            budget = len(pinyin_list) * (1 - threshold)
+            node = 0
+            budgets[0] = max(budgets[0], budget)
+            for syllable_id in ids:
+                child = children[node].get(syllable_id)
+                if child is None:
+                    child = len(children)
+                    children[node][syllable_id] = child
+                    children.append({})
+                    budgets.append(0.0)
+                node = child
+                budgets[node] = max(budgets[node], budget)
+            terminals.setdefault(node, []).append(len(self.words))
+            self.words.append(word)
+            syllable_counts.append(len(pinyin_list))
+            word_budgets.append(budget)
+
+        # 按广度优先重新编号，使每个节点的子节点连续
+        order = [0]
+        for node in order:
+            order.extend(children[node].values())
+        new_id = {node: i for i, node in enumerate(order)}
+        child_start, child_syllables, child_nodes = [], [], []
+        terminal_start, terminal_words = [], []
+        for node in order:
+            child_start.append(len(child_syllables))
+            for syllable_id, child in children[node].items():
+                child_syllables.append(syllable_id)
+                child_nodes.append(new_id[child])
+            terminal_start.append(len(terminal_words))
+            terminal_words.extend(terminals.get(node, ()))
+        child_start.append(len(child_syllables))
+        terminal_start.append(len(terminal_words))
+        self._child_start = np.array(child_start, dtype=np.int64)
+        self._child_syllables = np.array(child_syllables, dtype=np.int64)
+        self._child_nodes = np.array(child_nodes, dtype=np.int64)
+        self._terminal_start = np.array(terminal_start, dtype=np.int64)
+        self._terminal_words = np.array(terminal_words, dtype=np.int64)
+        self._syllable_counts = np.array(syllable_counts, dtype=np.float64)
+        # 允许损失加一个很小的余量，避免浮点误差把恰好等于阈值的目标词筛掉
+        self._budgets = np.array([budgets[node] for node in order], dtype=np.float64) + 1e-9
+        self._word_budgets = np.array(word_budgets, dtype=np.float64) + 1e-9
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def search(self, syllable_ids: np.ndarray) -> List[Tuple[int, int, int, float]]:
+        """所有起始位置上相似度达到阈值的目标词
+
+        Args:
+            syllable_ids: 每个位置的音节编号（SyllableTable.encode），非汉字位置为 -1，不能出现在匹配中
+
+        Returns:
+            [(起始位置, 结束位置, 词序号, 相似度), ...]
+        """
+        found = []
+        if not len(self.words):
+            return found
+        valid = syllable_ids >= 0
+        starts = np.flatnonzero(valid)
+        nodes = np.zeros(len(starts), dtype=np.int64)
+        positions = starts.copy()
+        losses = np.zeros(len(starts), dtype=np.float64)
+        while len(nodes):
+            # 在当前节点结束的目标词
+            begin = self._terminal_start[nodes]
+            index, owners = _expand(begin, self._terminal_start[nodes + 1] - begin)
+            if len(index):
+                words = self._terminal_words[index]
+                word_losses = losses[owners]
+                passed = word_losses <= self._word_budgets[words]
+                similarities = 1 - word_losses[passed] / self._syllable_counts[words[passed]]
+                found.extend(zip(starts[owners[passed]].tolist(), positions[owners[passed]].tolist(),
+                                 words[passed].tolist(), similarities.tolist()))
+
+            # 下一个位置是汉字的才继续向下走
+            alive = positions < len(valid)
+            alive[alive] = valid[positions[alive]]
+            nodes, positions, losses, starts = nodes[alive], positions[alive], losses[alive], starts[alive]
+            begin = self._child_start[nodes]
+            index, owners = _expand(begin, self._child_start[nodes + 1] - begin)
+            child_nodes = self._child_nodes[index]
+            child_losses = losses[owners] + 1 - self.table.similarities(syllable_ids[positions[owners]],
+                                                                        self._child_syllables[index])
+            keep = child_losses <= self._budgets[child_nodes]
+            nodes = child_nodes[keep]
+            positions = positions[owners[keep]] + 1
+            losses = child_losses[keep]
+            starts = starts[owners[keep]]
+        return found
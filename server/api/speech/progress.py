@@ -0,0 +1,152 @@
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+# 识别阶段及其在总进度中的起止百分比
+STAGES = {
+    "queued": ("排队中", 0, 0),
+    "decoding": ("音频解码", 0, 3),
+    "vad": ("语音检测", 3, 5),
+    "recognizing": ("语音识别", 5, 92),
+    "correcting": ("文本纠正", 92, 95),
+    "saving": ("保存结果", 95, 99),
+    "done": ("识别完成", 100, 100),
+    "failed": ("识别失败", 0, 0),
+}
+
+class RecognitionProgress:
+    """识别进度跟踪
+
+    由识别流水线在工作线程中更新，订阅者（WebSocket 连接等）在每次更新时收到事件。
+    已识别完成的句子会累积保存，新订阅者可以拿到完整快照后再接收增量。
+    """
+    def __init__(self):
+        self.stage = "queued"
+        self.total_seconds = 0.0
+        self.decoded_seconds = 0.0
+        self.error = None
+        self.segments: List[Dict] = []
+        self.speakers: List[Dict] = []
+        self._stage_started_at = time.time()
+        self._subscribers: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.stage in ("done", "failed")
+
+    def set_stage(self, stage: str, total_seconds: float = None):
+        """进入新阶段"""
+        with self._lock:
+            self.stage = stage
+            self._stage_started_at = time.time()
+            if total_seconds is not None:
+                self.total_seconds = total_seconds
+            event = {"type": "progress", "data": self._snapshot()}
+            if self.finished:
+                self._release()
+        self._publish(event)
+
+    def advance(self, decoded_seconds: float, segments: List[Dict] = None, speakers: List[Dict] = None):
+        """更新已识别时长，并追加新完成的句子"""
+        with self._lock:
+            self.decoded_seconds = min(decoded_seconds, self.total_seconds or decoded_seconds)
+            events = []
+            if segments:
+                events.append({
+                    "type": "segments",
+                    "data": {
+                        "start_index": len(self.segments),
+                        "segments": segments,
+                        "speakers": speakers if speakers is not None else self.speakers
+                    }
+                })
+                self.segments.extend(segments)
+            if speakers is not None:
+                self.speakers = speakers
+            events.append({"type": "progress", "data": self._snapshot()})
+        for event in events:
+            self._publish(event)
+
+    def replace_segments(self, segments: List[Dict], speakers: List[Dict]):
+        """用纠正后的句子替换已推送的全部句子（start_index 为 0 的 segments 事件）"""
+        with self._lock:
+            self.segments = list(segments)
+            self.speakers = speakers
+            event = {
+                "type": "segments",
+                "data": {"start_index": 0, "segments": segments, "speakers": speakers}
+            }
+        self._publish(event)
+
+    def fail(self, error: str):
+        with self._lock:
+            self.stage = "failed"
+            self.error = error
+            event = {"type": "progress", "data": self._snapshot()}
+            self._release()
+        self._publish(event)
+
+    def _release(self):
+        """任务结束后释放已缓存的句子，完整结果以转写文件为准"""
+        self.segments = []
+        self.speakers = []
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> Tuple[Dict, Callable[[], None]]:
+        """订阅进度事件
+
+        Returns:
+            (包含已完成句子的快照, 取消订阅函数)；快照与后续事件之间不会丢失或重复
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+            snapshot = self._snapshot(include_segments=True)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return snapshot, unsubscribe
+
+    def snapshot(self, include_segments: bool = False) -> Dict:
+        with self._lock:
+            return self._snapshot(include_segments)
+
+    def _snapshot(self, include_segments: bool = False) -> Dict:
+        label, start, end = STAGES[self.stage]
+        percent = start
+        remaining_time = None
+        if self.stage == "recognizing" and self.total_seconds > 0:
+            ratio = self.decoded_seconds / self.total_seconds
+            percent = start + (end - start) * ratio
+            elapsed = time.time() - self._stage_started_at
+            if ratio > 0:
+                remaining_time = round(elapsed / ratio - elapsed, 1)
+
+        data = {
+            "stage": self.stage,
+            "stage_name": label,
+            "progress": int(percent),
+            "decoded_seconds": round(self.decoded_seconds, 2),
+            "total_seconds": round(self.total_seconds, 2),
+            "current_segment": f"{label} {self.decoded_seconds:.0f}/{self.total_seconds:.0f}秒" if self.stage == "recognizing" else label,
+            "remaining_time": remaining_time,
+            "segment_count": len(self.segments),
+            "error": self.error,
+        }
+        if include_segments:
+            data["segments"] = list(self.segments)
+            data["speakers"] = list(self.speakers)
+        return data
+
+    def _publish(self, event: Dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"推送识别进度失败: {str(e)}")
@@ -1,16 +1,25 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple, Union
 import os
+from concurrent.futures import FIRST_COMPLETED, wait
 from funasr.utils.postprocess_utils import rich_transcription_postprocess
-from .models import model
 import logging
 import re
 from .audio_utils import AudioConverter  # 添加导入
+from .chunking import plan_windows, shift_sentences
+from .config import speech_config
+from .correction_pool import correction_pool
+from .jobs import recognition_jobs
+from .pcm_cache import pcm_cache
+from .progress import RecognitionProgress
+from .speakers import SpeakerRegistry
+from .workers import model_pool, detect_speech, recognize_window
 from ..files.metadata import MetadataManager  # 添加导入
 import time  # 添加这个导入
-from .text_correction import text_corrector  # 导入文本纠正器实例
 
 logger = logging.getLogger(__name__)
 
+SAMPLES_PER_MS = AudioConverter.TARGET_SAMPLE_RATE // 1000
+
 class SpeechService:
     """语音服务类，处理语音识别和语言支持"""
     
@@ -23,12 +32,24 @@ class SpeechService:
         {"code": "ko", "name": "韩语"}
     ]
     
+    COLORS = ['#409EFF', '#F56C6C']
+    TEXT_SEPARATOR = '         '  # 与模型输出中句子之间的分隔保持一致
+    
     def __init__(self):
         # 设置转写结果存储根目录
         self.transcripts_dir = os.path.join("storage", "transcripts")
         os.makedirs(self.transcripts_dir, exist_ok=True)
         self.metadata = MetadataManager()  # 添加 metadata 管理器
     
+    def start(self):
+        """加载模型：启用进程池时在各模型进程中加载
+        
+        由应用启动事件调用，不在构造函数中执行：spawn 子进程会重新导入主模块
+        （进而导入本模块并创建 speech_service），导入时加载模型会让每个子进程都加载一份。
+        未调用时第一次识别也会加载模型。
+        """
+        model_pool.start()
+    
     def get_languages(self) -> Dict:
         """获取支持的语言列表"""
         return {
@@ -37,18 +58,39 @@ class SpeechService:
             "data": self.SUPPORTED_LANGUAGES
         }
     
-    def process_audio(self, audio_file: bytes, language: str = "zh", file_id: str = None) -> Dict:
+    def get_system_status(self) -> Dict:
+        """获取识别队列、模型进程池、PCM缓存和纠错模型状态"""
+        from .text_correction import text_corrector
+        return {
+            "code": 200,
+            "message": "success",
+            "data": {
+                "recognition_jobs": recognition_jobs.get_stats(),
+                "model_workers": model_pool.get_stats(),
+                "pcm_cache": pcm_cache.get_stats(),
+                "text_correction": text_corrector.get_status(),
+                "correction_pool": correction_pool.get_stats()
+            }
+        }
+    
+    def process_audio(self, audio_file: Union[str, bytes], language: str = "zh", file_id: str = None,
+                      progress: RecognitionProgress = None) -> Dict:
         """处理音频文件，进行语音识别
         
+        长音频按VAD静音边界切分为多个窗口识别，启用模型进程池时各窗口并行执行。
+        窗口结果按时间顺序拼接，每拼接一个窗口就通过 progress 推送进度和已纠正的句子。
+        
         Args:
-            audio_file: 音频文件的二进制数据
+            audio_file: 音频文件路径，或音频文件的二进制数据
             language: 识别的目标语言，默认为中文
             file_id: 音频文件ID，用于获取元数据
+            progress: 进度跟踪对象，为空时不推送进度
             
         Returns:
             包含识别结果的字典
         """
         start_time = time.perf_counter()  # 开始计时
+        progress = progress or RecognitionProgress()
         try:
             if not file_id:  # 检查是否有 file_id
                 logger.error("缺少必要参数 file_id")
@@ -58,28 +100,34 @@ class SpeechService:
                 }
             
             logger.info(f"=== 开始语音识别 ===")
-            logger.info(f"输入参数 - 目标语言: {language}, 音频大小: {len(audio_file)} bytes, file_id: {file_id}")
-            
-            # 1. 音频格式转换
-            logger.info("开始音频格式转换...")
-            audio_file = AudioConverter.convert_audio(audio_file)
-            logger.info(f"音频转换完成，转换后大小: {len(audio_file)} bytes")
+            logger.info(f"输入参数 - 目标语言: {language}, 音频: {audio_file if isinstance(audio_file, str) else f'{len(audio_file)} bytes'}, file_id: {file_id}")
             
-            # 2. 使用已正确配置的model进行识别
-            logger.info("开始调用模型进行识别...")
-            recognition_start = time.perf_counter()  # 模型识别开始时间
-            res = model.generate(
-                input=audio_file,
-                language=language,  # 语言参数默认中文
-            )
+            # 1. 获取16kHz单声道PCM：优先内存映射PCM缓存，未命中时解码并写入缓存
+            logger.info("开始音频解码...")
+            progress.set_stage("decoding")
+            with pcm_cache.open(audio_file) as (speech, pcm_path):
+                del audio_file
+                total_seconds = len(speech) / AudioConverter.TARGET_SAMPLE_RATE
+                logger.info(f"音频解码完成，时长: {total_seconds:.2f}秒，PCM大小: {speech.nbytes} bytes")
+                
+                # 2. 按VAD结果划分识别窗口
+                progress.set_stage("vad", total_seconds=total_seconds)
+                windows = self._plan_windows(pcm_path, len(speech))
+                logger.info(f"识别窗口数: {len(windows)}")
+                
+                # 3. 识别各窗口（启用进程池时并行），按顺序拼接并推送结果
+                logger.info("开始调用模型进行识别...")
+                progress.set_stage("recognizing")
+                recognition_start = time.perf_counter()  # 模型识别开始时间
+                sentence_info = self._recognize_windows(pcm_path, windows, language, progress)
             recognition_time = time.perf_counter() - recognition_start  # 计算模型识别时间
             logger.info(f"模型识别完成，识别耗时: {recognition_time:.2f}秒")
-            #logger.debug(f"模型原始输出: {res}")
 
-            # 调用文本纠正器对识别结果进行纠正
-            logger.info("recognize:开始调用文本纠正器...")
-            res = text_corrector.correct_recognition_result(res)
-            logger.info("recognize:文本纠正完成")
+            # 4. 拼接后的全部句子一次纠正，句子较多时分块交给纠错进程池
+            progress.set_stage("correcting")
+            text = self._correct_sentences(sentence_info)
+            speakers_data = [self._format_segment(segment) for segment in sentence_info]
+            progress.replace_segments(speakers_data, self._build_speakers(sentence_info))
 
             # 从元数据中获取音频时长
             metadata_prefix = f"metadata_{file_id}"
@@ -95,49 +143,12 @@ class SpeechService:
                         break
             else:  # 如果没找到
                 logger.warning(f"未能从元数据获取到音频时长，metadata_prefix: {metadata_prefix}")
-                audio_duration = res[0].get("duration", 0)
-            
-            # 2. 处理说话人分离结果，格式化为飞书妙记风格
-            logger.info("开始处理说话人分离结果...")
-            speakers_data = []
-            colors = ['#409EFF', '#F56C6C']
-            for i, segment in enumerate(res[0]["sentence_info"]):
-                #logger.debug(f"处理第 {i+1} 个语音片段")
-                # 移除标记符号并提取纯文本
-                text = segment["sentence"]
-                text = re.sub(r'<\|[^|]*\|>', '', text)
-                
-                speaker_data = {
-                    "speaker_id": f"speaker_{segment['spk']}",
-                    "speaker_name": f"说话人 {segment['spk'] + 1}",
-                    "speakerKey": f"speaker_{segment['spk']}",
-                    "speakerDisplayName": f"说话人 {segment['spk'] + 1}",
-                    "color": colors[segment['spk'] % len(colors)],
-                    "start_time": round(segment['start'] / 1000, 2),
-                    "end_time": round(segment['end'] / 1000, 2),
-                    "text": text.strip(),
-                    "timestamps": [
-                        {
-                            "start": round(ts[0] / 1000, 2),
-                            "end": round(ts[1] / 1000, 2)
-                        } for ts in segment['timestamp']
-                    ]
-                }
-                speakers_data.append(speaker_data)
-
+                audio_duration = total_seconds
             
             # 构建标准格式的 speakers
-            speakers = [
-                {
-                    "speakerKey": f"speaker_{i}",
-                    "speakerDisplayName": f"说话人 {i + 1}",
-                    "color": colors[i % len(colors)],
-                    "speaker_id": f"speaker_{i}",
-                    "speaker_name": f"说话人 {i + 1}"
-                } for i in set(seg['spk'] for seg in res[0]["sentence_info"])
-            ]
+            speakers = self._build_speakers(sentence_info)
             
-            # 3. 构建识别结果
+            # 5. 构建识别结果
             logger.info("开始构建最终识别结果...")
             recognition_result = {
                 "code": 200,
@@ -145,7 +156,7 @@ class SpeechService:
                 "data": {
                     "duration": round(audio_duration, 2),  # 使用从元数据获取的时长
                     "language": language,
-                    "full_text": rich_transcription_postprocess(res[0]["text"]),
+                    "full_text": rich_transcription_postprocess(text),
                     "segments": speakers_data,
                     "speakers": speakers,  # 使用新的标准格式
                     "metadata": {
@@ -164,7 +175,8 @@ class SpeechService:
             recognition_result["data"]["process_info"] = {
                 "total_time": round(total_time, 2),
                 "recognition_time": round(recognition_time, 2),
-                "rtf": round(audio_duration/total_time, 2)  # Real Time Factor
+                "rtf": round(audio_duration/total_time, 2),  # Real Time Factor
+                "windows": len(windows)
             }
             
             return recognition_result
@@ -176,5 +188,135 @@ class SpeechService:
                 "message": f"语音识别失败: {str(e)}"
             }
 
+    def _plan_windows(self, pcm_path: str, total_samples: int) -> List[Tuple[int, int]]:
+        """按VAD静音边界划分识别窗口（毫秒）"""
+        total_ms = int(total_samples / SAMPLES_PER_MS)
+        window_ms = int(speech_config.window_seconds * 1000)
+        if total_ms <= window_ms:
+            return [(0, total_ms)]
+        
+        vad_segments = model_pool.call(detect_speech, pcm_path)
+        logger.debug(f"VAD语音段数: {len(vad_segments)}")
+        return plan_windows(vad_segments, total_ms, window_ms)
+
+    def _recognize_windows(self, pcm_path: str, windows: List[Tuple[int, int]], language: str,
+                           progress: RecognitionProgress) -> List[Dict]:
+        """识别所有窗口并拼接结果
+
+        模型进程池中同时保持与进程数相同的在途窗口；窗口可能乱序完成，但只按时间顺序
+        对齐说话人并拼接。单个窗口失败时只重试该窗口。识别过程中推送的句子尚未纠正，
+        全部窗口拼接并纠正后再整体替换。
+
+        Returns:
+            全局时间轴上的句子（未纠正）
+        """
+        registry = SpeakerRegistry(speech_config.speaker_match_threshold) if len(windows) > 1 else None
+        max_in_flight = max(1, model_pool.workers)
+        pending = {}  # future -> (窗口序号, 已尝试次数)
+        results = {}  # 已完成但尚未拼接的窗口
+        next_submit = 0
+        next_merge = 0
+        done_seconds = 0.0
+        sentence_info = []
+
+        def submit(index: int, attempt: int):
+            start_ms, end_ms = windows[index]
+            future = model_pool.submit(recognize_window, pcm_path, start_ms, end_ms, language, registry is not None)
+            pending[future] = (index, attempt)
+
+        while next_merge < len(windows):
+            while next_submit < len(windows) and len(pending) < max_in_flight:
+                submit(next_submit, 1)
+                next_submit += 1
+
+            finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, attempt = pending.pop(future)
+                start_ms, end_ms = windows[index]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    if attempt >= speech_config.window_max_attempts:
+                        raise RuntimeError(f"窗口 {start_ms}-{end_ms}ms 识别失败: {str(e)}") from e
+                    logger.warning(f"窗口 {start_ms}-{end_ms}ms 识别失败，重试第 {attempt} 次: {str(e)}")
+                    submit(index, attempt + 1)
+                    continue
+                done_seconds += (end_ms - start_ms) / 1000
+
+            new_segments = []
+            while next_merge in results:
+                sentences, embeddings = results.pop(next_merge)
+                start_ms, end_ms = windows[next_merge]
+                if not sentences:
+                    logger.debug(f"窗口无识别结果: {start_ms}-{end_ms}ms")
+                speaker_map = registry.assign(embeddings) if registry is not None and embeddings else None
+                shift_sentences(sentences, start_ms, speaker_map)
+                sentence_info.extend(sentences)
+                new_segments.extend(self._format_segment(segment) for segment in sentences)
+                next_merge += 1
+            progress.advance(
+                done_seconds,
+                segments=new_segments,
+                speakers=self._build_speakers(sentence_info)
+            )
+        return sentence_info
+
+    def _correct_sentences(self, sentence_info: List[Dict]) -> str:
+        """纠正拼接后的全部句子（原地修改），返回用原格式拼接的纠正后文本"""
+        from .text_correction import text_corrector
+        text_corrector.reload_if_changed()  # 热词更新后在后台切换纠错模型，本次识别仍用当前版本
+        res = [{
+            "text": self.TEXT_SEPARATOR.join(segment["sentence"] for segment in sentence_info),
+            "sentence_info": sentence_info
+        }]
+        return text_corrector.correct_recognition_result(res)[0]["text"]
+
+    def _format_segment(self, segment: Dict) -> Dict:
+        """将模型输出的句子格式化为飞书妙记风格"""
+        # 移除标记符号并提取纯文本
+        text = segment["sentence"]
+        text = re.sub(r'<\|[^|]*\|>', '', text)
+        stripped = text.strip()
+        
+        formatted = {
+            "speaker_id": f"speaker_{segment['spk']}",
+            "speaker_name": f"说话人 {segment['spk'] + 1}",
+            "speakerKey": f"speaker_{segment['spk']}",
+            "speakerDisplayName": f"说话人 {segment['spk'] + 1}",
+            "color": self.COLORS[segment['spk'] % len(self.COLORS)],
+            "start_time": round(segment['start'] / 1000, 2),
+            "end_time": round(segment['end'] / 1000, 2),
+            "text": stripped,
+            "timestamps": [
+                {
+                    "start": round(ts[0] / 1000, 2),
+                    "end": round(ts[1] / 1000, 2)
+                } for ts in segment['timestamp']
+            ]
+        }
+        if segment.get("corrections"):
+            # 纠错记录的偏移相对于去掉标记后的文本，这里再扣除开头被去掉的空白
+            shift = len(text) - len(text.lstrip())
+            corrections = []
+            for item in segment["corrections"]:
+                offset = item["offset"] - shift
+                if offset >= 0 and stripped[offset:offset + item["length"]] == item["target"]:
+                    corrections.append(dict(item, offset=offset))
+            if corrections:
+                formatted["corrections"] = corrections
+        return formatted
+
+    def _build_speakers(self, sentence_info: List[Dict]) -> List[Dict]:
+        """构建标准格式的 speakers"""
+        return [
+            {
+                "speakerKey": f"speaker_{i}",
+                "speakerDisplayName": f"说话人 {i + 1}",
+                "color": self.COLORS[i % len(self.COLORS)],
+                "speaker_id": f"speaker_{i}",
+                "speaker_name": f"说话人 {i + 1}"
+            } for i in sorted(set(seg['spk'] for seg in sentence_info))
+        ]
+
 # 创建全局实例
 speech_service = SpeechService()
@@ -0,0 +1,236 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set
+from ..files.config import config as file_config
+from ..logger import get_logger
+from ..utils import safe_read_json
+from .correction_model import CorrectionModel
+from .correction_spans import rebase_spans, span_from_dict, span_to_dict
+from .jobs import recognition_jobs
+from .storage import transcript_manager
+from .transcript_index import TranscriptIndex
+
+logger = get_logger(__name__)
+
+def _normalized(info) -> tuple:
+    """目标词配置的可比较形式（上下文词、原词来自集合，顺序不固定）"""
+    pinyin_list, context_words, threshold, orig_words = info
+    return tuple(pinyin_list), tuple(sorted(context_words)), threshold, tuple(sorted(orig_words))
+
+def changed_targets(old_model: Optional[CorrectionModel], new_model: CorrectionModel) -> List[str]:
+    """新增或配置有变化的目标词；没有旧模型时返回全部目标词
+
+    删除的目标词不会被还原：已保存的文本中无法区分它是识别结果还是纠正结果。
+    """
+    if old_model is None:
+        return list(new_model.target_words)
+    return [word for word, info in new_model.target_words.items()
+            if word not in old_model.target_words
+            or _normalized(old_model.target_words[word]) != _normalized(info)]
+
+def _write_json_atomic(path: str, data: Dict):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+class ArchiveRecorrector:
+    """热词修改后在后台重新纠正已保存的转写
+
+    比较新旧纠错模型得到新增或变化的目标词，通过转写倒排索引找出可能受影响的句子
+    （含有原词，或含有读音可能相似的字），只对这些句子用新模型重新纠错，
+    有变化时直接更新 original.json。用户手动修改过的段落（edited）和正在识别的文件不处理。
+    同一时间只运行一次，运行期间再次修改热词会在结束后接着处理。
+    """
+    def __init__(self, transcripts_dir: str = None, corrector=None):
+        self.index = TranscriptIndex(transcripts_dir or file_config.transcripts_dir)
+        self._corrector = corrector
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pending = False  # 运行期间又有新的热词修改
+        self._pending_full = False
+        self._last_model: Optional[CorrectionModel] = None  # 上次处理到的模型
+        self.status = self._new_status("idle")
+
+    @property
+    def corrector(self):
+        if self._corrector is None:
+            from .text_correction import text_corrector
+            self._corrector = text_corrector
+        return self._corrector
+
+    @staticmethod
+    def _new_status(state: str) -> Dict:
+        return {
+            "state": state,  # idle / indexing / correcting / done / failed
+            "from_version": None,
+            "to_version": None,
+            "changed_targets": 0,
+            "candidate_sentences": 0,
+            "checked_sentences": 0,
+            "updated_sentences": 0,
+            "updated_files": 0,
+            "skipped_edited": 0,
+            "skipped_files": 0,
+            "total_files": 0,
+            "processed_files": 0,
+            "progress": 0.0,
+            "error": None,
+            "started_at": None,
+            "finished_at": None
+        }
+
+    def schedule(self, old_model: CorrectionModel = None, full: bool = False):
+        """在后台重新纠正
+
+        Args:
+            old_model: 修改热词前生效的模型，用于找出变化的目标词
+            full: 检查所有目标词（不比较新旧模型）
+        """
+        with self._lock:
+            if self._thread is not None:
+                self._pending = True
+                self._pending_full |= full
+                return
+            if old_model is not None:
+                self._last_model = old_model
+            self._thread = threading.Thread(target=self._worker, args=(full,), name="archive-recorrection",
+                                            daemon=True)
+            self._thread.start()
+
+    def _worker(self, full: bool):
+        while True:
+            try:
+                self.run(full)
+            except Exception as e:
+                logger.error(f"重新纠正已保存的转写失败: {str(e)}", exc_info=True)
+                self.status.update(state="failed", error=str(e), finished_at=time.time())
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+                full = self._pending_full
+                self._pending = self._pending_full = False
+
+    def run(self, full: bool = False) -> Dict:
+        """在当前线程中重新纠正，返回最终状态"""
+        # 等待热词修改触发的重载完成，取到最新模型
+        self.corrector.reload()
+        model = self.corrector.model
+        old_model = None if full else self._last_model
+        status = self._new_status("indexing")
+        status.update(started_at=time.time(), to_version=model.version,
+                      from_version=old_model.version if old_model else None)
+        self.status = status
+
+        if old_model is not None and old_model.version == model.version:
+            status.update(state="done", progress=1.0, finished_at=time.time())
+            return status
+
+        targets = changed_targets(old_model, model)
+        status["changed_targets"] = len(targets)
+        self.index.refresh()
+        candidates = self._candidates(model, targets)
+        status["candidate_sentences"] = len(candidates)
+        logger.info(f"热词变化 {len(targets)} 个目标词，需要重新纠正的句子: {len(candidates)}/{len(self.index)}")
+
+        by_file: Dict[str, Set[int]] = {}
+        for sentence_id in candidates:
+            file_id, position, _ = self.index.sentences[sentence_id]
+            by_file.setdefault(file_id, set()).add(position)
+        status.update(state="correcting", total_files=len(by_file))
+        for file_id, positions in by_file.items():
+            self._correct_file(file_id, positions, model, status)
+            status["processed_files"] += 1
+            status["progress"] = round(status["processed_files"] / len(by_file), 4)
+
+        self._last_model = model
+        status.update(state="done", progress=1.0, finished_at=time.time())
+        logger.info(f"已保存转写重新纠正完成: 检查 {status['checked_sentences']} 句，更新 {status['updated_sentences']} 句 "
+                    f"（{status['updated_files']} 个文件），跳过手动修改的 {status['skipped_edited']} 句")
+        return status
+
+    def _candidates(self, model: CorrectionModel, targets: List[str]) -> Set[int]:
+        """可能被变化的目标词纠正的句子"""
+        candidates = set()
+        for word in targets:
+            pinyin_list, _, threshold, orig_words = model.target_words[word]
+            for orig in orig_words:
+                candidates |= self.index.containing(orig)
+            similar = self.index.sounding_like(word, pinyin_list, threshold, self.corrector.length_tolerance)
+            if similar is None:
+                return self.index.all_sentences()
+            candidates |= similar
+        return candidates
+
+    def _correct_file(self, file_id: str, positions: Set[int], model: CorrectionModel, status: Dict):
+        job = recognition_jobs.get_job_by_file(file_id)
+        if job is not None and not job.finished:
+            # 正在重新识别，新结果会使用新模型
+            status["skipped_files"] += 1
+            return
+
+        path = os.path.join(self.index.transcripts_dir, file_id, "original.json")
+        content = safe_read_json(path)
+        segments = ((content or {}).get("data") or {}).get("segments") or []
+        selected = []
+        for position in sorted(positions):
+            if position >= len(segments) or not segments[position].get("text"):
+                continue
+            if segments[position].get("edited"):
+                status["skipped_edited"] += 1
+                continue
+            selected.append(position)
+        if not selected:
+            return
+
+        texts = [segments[position]["text"] for position in selected]
+        results = self.corrector.correct_texts(texts, model)
+        status["checked_sentences"] += len(texts)
+        changes = {position: (text, result) for position, text, result in zip(selected, texts, results)
+                   if result[0] != text}
+        if not changes:
+            return
+
+        # 持有转写文件锁重新读取后再写入，只更新文本没有被改动过的段落，
+        # 纠错期间用户保存的内容不会被覆盖，写入期间用户的保存也会等待
+        with transcript_manager.lock(file_id):
+            content = safe_read_json(path)
+            data = (content or {}).get("data") or {}
+            segments = data.get("segments") or []
+            updated = 0
+            for position, (old_text, (new_text, spans)) in changes.items():
+                if (position >= len(segments) or segments[position].get("text") != old_text
+                        or segments[position].get("edited")):
+                    continue
+                segment = segments[position]
+                segment["text"] = new_text
+                # 识别时的纠错记录按这次替换平移后保留
+                old_spans = [span_from_dict(item) for item in segment.get("corrections") or []]
+                segment["corrections"] = [span_to_dict(span) for span in rebase_spans(old_spans, spans)]
+                updated += 1
+            if not updated:
+                return
+            # 按段落重建全文（与保存编辑结果时相同），不在全文中按子串替换：
+            # 同样的文本可能出现在更早的、甚至是手动修改过的段落中
+            data["full_text"] = " ".join(segment.get("text", "") for segment in segments)
+            _write_json_atomic(path, content)
+        self.index.index_file(file_id)
+        status["updated_sentences"] += updated
+        status["updated_files"] += 1
+        logger.info(f"重新纠正已保存的转写: {file_id}，更新 {updated} 句")
+
+    def get_status(self) -> Dict:
+        status = dict(self.status)
+        status["running"] = self._thread is not None
+        status["index"] = self.index.get_stats()
+        return status
+
+# 创建全局实例
+archive_recorrector = ArchiveRecorrector()
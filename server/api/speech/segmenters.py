@@ -0,0 +1,218 @@
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from pypinyin import pinyin, Style
+from .pinyin_index import SyllableTable, SyllableTrie
+
+# 匹配函数：词 -> 匹配结果，None 表示不匹配
+MatchFunc = Callable[[str], Optional[tuple]]
+
+def _is_chinese(char: str) -> bool:
+    return '\u4e00' <= char <= '\u9fa5'
+
+class Segmenter:
+    """分词器接口
+
+    cut 返回文本的一个切分，拼接后必须等于原文本。match 是纠错时的相似度匹配函数，
+    只有需要根据匹配结果决定切分的实现（滑动窗口、音节前缀树）才会用到。
+    """
+    name = "base"
+
+    def cut(self, text: str, match: MatchFunc = None) -> List[str]:
+        raise NotImplementedError
+
+class PkusegSegmenter(Segmenter):
+    """pkuseg 分词：准确率最高，加载模型约 2 秒，常驻内存较大"""
+    name = "pkuseg"
+
+    def __init__(self, user_dict: str):
+        import pkuseg
+        # 使用默认通用模型
+        self._segmenter = pkuseg.pkuseg(user_dict=user_dict)
+
+    def cut(self, text: str, match: MatchFunc = None) -> List[str]:
+        return self._segmenter.cut(text)
+
+class DagSegmenter(Segmenter):
+    """前缀词典 + 有向无环图分词
+
+    词典由 pypinyin 自带的常用词组和自定义词典组成。对每个位置列出所有以它开头的词典词
+    （构成有向无环图），动态规划选出词数最少的切分，词数相同时优先包含更多自定义词典中的词。
+    词典中没有的连续单个汉字合并为一个词，这样误识别产生的生词（如"林提"）仍能作为整体参与
+    相似度匹配；提供了匹配函数时，再在这段单字中从左到右找能匹配的最长片段（如"林提和"中的"林提"），
+    片段最长为自定义词典中最长的词；max_match_len 更长时（音节数不同的目标词可以匹配多出字的误识别）
+    以 max_match_len 为准。
+    无需加载模型，初始化快、内存小，准确率低于 pkuseg。
+    """
+    name = "dag"
+
+    def __init__(self, dict_words: Iterable[str], base_words: Iterable[str] = None, max_match_len: int = 0):
+        if base_words is None:
+            from pypinyin.phrases_dict import phrases_dict
+            base_words = phrases_dict.keys()
+        self._custom = set(w for w in dict_words if len(w) > 1)
+        self._words = set(w for w in base_words if len(w) > 1) | self._custom
+        self._max_len = max((len(w) for w in self._words), default=1)
+        self._max_custom_len = max(max((len(w) for w in self._custom), default=1), max_match_len)
+
+    def _dag(self, text: str) -> List[List[int]]:
+        """每个位置可以到达的结束位置（不含单字）"""
+        dag = []
+        for start in range(len(text)):
+            ends = []
+            for end in range(start + 2, min(len(text), start + self._max_len) + 1):
+                if text[start:end] in self._words:
+                    ends.append(end)
+            dag.append(ends)
+        return dag
+
+    def _route(self, text: str) -> List[int]:
+        """从后往前动态规划，返回每个位置的最佳下一个切分点"""
+        size = len(text)
+        dag = self._dag(text)
+        # best[i] = (词数, -自定义词数)，越小越好
+        best = [(0, 0)] * (size + 1)
+        next_cut = [size] * (size + 1)
+        for start in range(size - 1, -1, -1):
+            count, custom = best[start + 1]
+            choice, cut = (count + 1, custom), start + 1
+            for end in dag[start]:
+                count, custom = best[end]
+                candidate = (count + 1, custom - (text[start:end] in self._custom))
+                if candidate < choice:
+                    choice, cut = candidate, end
+            best[start] = choice
+            next_cut[start] = cut
+        return next_cut
+
+    def _split_unknown(self, run: str, match: MatchFunc = None) -> List[str]:
+        """切分连续的未登录单字，片段不超过自定义词典中最长的词（或 max_match_len）"""
+        if match is None or len(run) <= 2:
+            return [run]
+        words = []
+        position = 0
+        while position < len(run):
+            for length in range(min(len(run) - position, self._max_custom_len), 1, -1):
+                if match(run[position:position + length]):
+                    words.append(run[position:position + length])
+                    position += length
+                    break
+            else:
+                words.append(run[position])
+                position += 1
+        return words
+
+    def cut(self, text: str, match: MatchFunc = None) -> List[str]:
+        if not text:
+            return []
+        next_cut = self._route(text)
+        words = []
+        unknown = ''  # 连续的未登录单字
+        start = 0
+        while start < len(text):
+            end = next_cut[start]
+            word = text[start:end]
+            if end - start == 1 and _is_chinese(word):
+                unknown += word
+            else:
+                if unknown:
+                    words.extend(self._split_unknown(unknown, match))
+                    unknown = ''
+                words.append(word)
+            start = end
+        if unknown:
+            words.extend(self._split_unknown(unknown, match))
+        return words
+
+class SlidingWindowSegmenter(Segmenter):
+    """不分词：滑动窗口
+
+    从左到右，在每个位置按目标词的字数（长的优先）截取窗口，与目标词匹配成功就作为一个词，
+    否则输出单个字并前移一位。不依赖分词边界，任何位置的误识别都能被发现，
+    但每个位置要匹配多次，句子长、目标词字数种类多时较慢。
+    """
+    name = "window"
+
+    def __init__(self, lengths: Sequence[int]):
+        self.lengths = sorted({length for length in lengths if length > 1}, reverse=True)
+
+    def cut(self, text: str, match: MatchFunc = None) -> List[str]:
+        if match is None:
+            return list(text)
+        words = []
+        position = 0
+        while position < len(text):
+            for length in self.lengths:
+                window = text[position:position + length]
+                if len(window) == length and match(window):
+                    words.append(window)
+                    position += length
+                    break
+            else:
+                words.append(text[position])
+                position += 1
+        return words
+
+class PinyinTrieSegmenter(Segmenter):
+    """不分词：音节前缀树匹配
+
+    把整段文本一次转换为音节序列，在每个位置沿目标词音节前缀树向下走（允许的损失由各目标词的
+    阈值决定），找出所有可能达到阈值的片段。再按相似度从高到低、同分时长的优先、靠左的优先，
+    选出互不重叠的片段，每个片段用匹配函数确认（检查上下文词等），原样出现的目标词直接保留。
+    其余位置输出单个字。不依赖分词模型，每个位置只访问一次前缀树。
+    只处理纯汉字的目标词，含字母或数字的目标词依靠原词替换纠正。
+    """
+    name = "trie"
+
+    def __init__(self, target_words: Dict[str, tuple], table: SyllableTable):
+        self.trie = SyllableTrie(target_words, table)
+
+    def _syllable_ids(self, text: str) -> np.ndarray:
+        """每个位置的音节编号，非汉字为 -1；连续的汉字一起转换拼音（多音字按词组读音）"""
+        table = self.trie.table
+        ids = np.full(len(text), -1, dtype=np.int64)
+        start = 0
+        while start < len(text):
+            if not _is_chinese(text[start]):
+                start += 1
+                continue
+            end = start
+            while end < len(text) and _is_chinese(text[end]):
+                end += 1
+            for position, reading in enumerate(pinyin(text[start:end], style=Style.TONE3), start):
+                ids[position] = table.encode(reading[0])
+            start = end
+        return ids
+
+    def cut(self, text: str, match: MatchFunc = None) -> List[str]:
+        if not text:
+            return []
+        found = [(similarity, end - start, start, end, index)
+                 for start, end, index, similarity in self.trie.search(self._syllable_ids(text))]
+        found.sort(key=lambda item: (-item[0], -item[1], item[2]))
+
+        taken = [False] * len(text)
+        selected = {}  # 起始位置 -> 结束位置
+        for _, _, start, end, index in found:
+            if any(taken[start:end]):
+                continue
+            window = text[start:end]
+            if window != self.trie.words[index] and match is not None and not match(window):
+                continue
+            taken[start:end] = [True] * (end - start)
+            selected[start] = end
+
+        words = []
+        position = 0
+        while position < len(text):
+            end = selected.get(position, position + 1)
+            words.append(text[position:end])
+            position = end
+        return words
+
+# 可选的分词后端
+SEGMENTER_BACKENDS: Dict[str, type] = {
+    PkusegSegmenter.name: PkusegSegmenter,
+    DagSegmenter.name: DagSegmenter,
+    SlidingWindowSegmenter.name: SlidingWindowSegmenter,
+    PinyinTrieSegmenter.name: PinyinTrieSegmenter,
+}
@@ -0,0 +1,62 @@
+from typing import Dict, Tuple
+import numpy as np
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+class SpeakerRegistry:
+    """跨窗口的说话人对齐
+
+    每个识别窗口内的说话人聚类是独立的，标签不一致。这里为每个全局说话人
+    维护一个声纹中心向量，新窗口的本地说话人按余弦相似度匹配到已有说话人，
+    匹配不上时登记为新说话人。
+    """
+    def __init__(self, threshold: float = 0.6):
+        self.threshold = threshold
+        self.centroids = []  # 已归一化的声纹中心
+        self.weights = []    # 每个中心累计的语音时长（秒）
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def assign(self, local_speakers: Dict[int, Tuple[np.ndarray, float]]) -> Dict[int, int]:
+        """将一个窗口的本地说话人映射到全局说话人编号
+
+        Args:
+            local_speakers: {本地说话人编号: (声纹向量, 语音时长秒)}
+
+        Returns:
+            {本地说话人编号: 全局说话人编号}
+        """
+        mapping = {}
+        taken = set()
+        # 说话时间长的说话人声纹更可靠，优先匹配
+        ordered = sorted(local_speakers.items(), key=lambda item: item[1][1], reverse=True)
+        for local_id, (embedding, duration) in ordered:
+            embedding = self._normalize(embedding)
+            best_id, best_score = None, self.threshold
+            for global_id, centroid in enumerate(self.centroids):
+                if global_id in taken:
+                    continue
+                score = float(np.dot(embedding, centroid))
+                if score >= best_score:
+                    best_id, best_score = global_id, score
+
+            if best_id is None:
+                best_id = len(self.centroids)
+                self.centroids.append(embedding)
+                self.weights.append(duration)
+                logger.debug(f"新说话人: 本地 {local_id} -> 全局 {best_id}")
+            else:
+                total = self.weights[best_id] + duration
+                merged = self.centroids[best_id] * self.weights[best_id] + embedding * duration
+                self.centroids[best_id] = self._normalize(merged / max(total, 1e-6))
+                self.weights[best_id] = total
+                logger.debug(f"说话人匹配: 本地 {local_id} -> 全局 {best_id} [相似度: {best_score:.3f}]")
+
+            mapping[local_id] = best_id
+            taken.add(best_id)
+        return mapping
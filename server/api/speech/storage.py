@@ -1,5 +1,7 @@
 from datetime import datetime
 import os
+import threading
+from typing import Dict
 from ..files.config import config
 from ..utils import get_transcript_dir, safe_read_json, safe_write_json
 from ..logger import get_logger
@@ -10,6 +12,17 @@ class TranscriptManager:
     """转写结果存储模块"""
     def __init__(self):
         self.transcripts_dir = config.transcripts_dir
+        self._locks: Dict[str, threading.Lock] = {}  # file_id -> 转写文件读-改-写锁
+        self._locks_guard = threading.Lock()
+        
+    def lock(self, file_id: str) -> threading.Lock:
+        """同一文件转写结果的读-改-写锁
+        
+        保存识别结果、保存编辑内容和热词更新后的重新纠正都会改写 original.json，
+        各自在读取到写入期间持有这个锁，避免一方基于旧内容写回、覆盖另一方的修改。
+        """
+        with self._locks_guard:
+            return self._locks.setdefault(file_id, threading.Lock())
         
     def save_result(self, file_id: str, result: dict) -> bool:
         """保存识别结果"""
@@ -19,7 +32,9 @@ class TranscriptManager:
             
             # 保存原始识别结果
             original_path = os.path.join(file_dir, "original.json")
-            if not safe_write_json(original_path, result):
+            with self.lock(file_id):
+                saved = safe_write_json(original_path, result)
+            if not saved:
                 logger.error(f"保存原始识别结果失败: {file_id}")
                 return False
             
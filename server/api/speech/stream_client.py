@@ -0,0 +1,58 @@
+"""实时识别测试客户端
+
+把本地音频按实时速度推送到 /api/v1/asr/stream，并打印服务端返回的结果：
+
+    python -m server.api.speech.stream_client 会议录音.wav --speed 2
+"""
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+import websockets
+from .audio_utils import AudioConverter
+
+async def stream_file(path: str, url: str, language: str, frame_ms: int, speed: float):
+    speech = AudioConverter.decode_to_array(path)
+    pcm = (np.clip(speech, -1, 1) * 32767).astype('<i2').tobytes()
+    frame_bytes = AudioConverter.TARGET_SAMPLE_RATE * 2 * frame_ms // 1000
+
+    async with websockets.connect(f"{url}?language={language}", max_size=None) as ws:
+        print(json.loads(await ws.recv()))
+        started = time.perf_counter()
+
+        async def send():
+            for i, offset in enumerate(range(0, len(pcm), frame_bytes)):
+                await ws.send(pcm[offset:offset + frame_bytes])
+                # 按实时速度发送
+                delay = started + (i + 1) * frame_ms / 1000 / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await ws.send(json.dumps({"type": "end"}))
+
+        sender = asyncio.create_task(send())
+        async for message in ws:
+            event = json.loads(message)
+            data = event.get("data", {})
+            if event["type"] == "final":
+                print(f"[{data['start']:8.2f} - {data['end']:8.2f}] {data['text']}  (耗时 {data['latency']:.3f}秒)")
+            elif event["type"] == "partial":
+                print(f"  ... {data['text']}")
+            else:
+                print(event)
+            if event["type"] in ("done", "error"):
+                break
+        await sender
+
+def main():
+    parser = argparse.ArgumentParser(description="实时识别测试客户端")
+    parser.add_argument("path", help="音频文件路径")
+    parser.add_argument("--url", default="ws://localhost:8010/api/v1/asr/stream")
+    parser.add_argument("--language", default="zh")
+    parser.add_argument("--frame-ms", type=int, default=100, help="每条消息的音频长度（毫秒）")
+    parser.add_argument("--speed", type=float, default=1.0, help="发送速度倍数")
+    args = parser.parse_args()
+    asyncio.run(stream_file(args.path, args.url, args.language, args.frame_ms, args.speed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import time
+from typing import Callable, Dict, List
+import numpy as np
+from ..logger import get_logger
+from .config import speech_config
+from .workers import model_pool, recognize_segment, stream_vad
+
+logger = get_logger(__name__)
+
+SAMPLE_RATE = 16000
+SAMPLES_PER_MS = SAMPLE_RATE // 1000
+
+def pcm16_to_float(frame: bytes) -> np.ndarray:
+    """16bit 小端 PCM 转为 float32 数组"""
+    usable = len(frame) - len(frame) % 2
+    return np.frombuffer(frame[:usable], dtype='<i2').astype(np.float32) / 32768.0
+
+class StreamingVad:
+    """FSMN VAD 流式检测
+
+    每路音频流保存自己的 VAD 状态缓存，逐块输入音频，输出本块内检测到的语音端点：
+    [[开始毫秒, -1]] 表示语音开始，[[-1, 结束毫秒]] 表示语音结束，
+    [[开始毫秒, 结束毫秒]] 表示本块内完整的一段语音。时间相对于音频流开头。
+    """
+    def __init__(self, chunk_ms: int = None):
+        self.chunk_ms = chunk_ms or speech_config.stream_vad_chunk_ms
+        self.cache = {}
+
+    def __call__(self, pcm: np.ndarray, is_final: bool = False) -> List[List[int]]:
+        value, self.cache = model_pool.call(stream_vad, pcm, self.cache, is_final, self.chunk_ms)
+        return value
+
+def transcribe_segment(segment: np.ndarray, language: str) -> str:
+    """识别一段语音并进行文本纠正
+
+    识别和文件识别一样交给模型进程池（未启用时与识别任务串行使用当前进程的模型），
+    纠正在当前进程内进行。
+    """
+    from .text_correction import text_corrector
+    text = model_pool.call(recognize_segment, segment, language)
+    return text_corrector.correct_text(text) if text else ""
+
+class StreamingSession:
+    """一路实时识别会话
+
+    客户端持续送入16kHz单声道PCM，VAD 检测到一段语音结束后立即识别该段并输出
+    final 结果；语音段尚未结束时，每隔 partial_interval_ms 对已收到的部分识别一次，
+    输出 partial 结果。只保留当前语音段（或空闲时最近几秒）的音频，内存占用不随时长增长。
+    """
+    def __init__(self, language: str = "zh", vad: Callable = None, transcribe: Callable = None,
+                 partial_interval_ms: int = None):
+        self.language = language
+        self.vad = vad or StreamingVad()
+        self.transcribe = transcribe or transcribe_segment
+        self.partial_interval_ms = (speech_config.stream_partial_interval_ms
+                                    if partial_interval_ms is None else partial_interval_ms)
+        self.keep_ms = speech_config.stream_idle_keep_ms
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0  # 缓冲区第一个采样点在整个流中的位置
+        self._speech_start = None  # 当前未结束语音段的开始毫秒
+        self._last_partial_ms = None
+        self.segment_count = 0
+
+    @property
+    def received_ms(self) -> int:
+        return (self._buffer_start + len(self._buffer)) // SAMPLES_PER_MS
+
+    def feed(self, pcm: np.ndarray) -> List[Dict]:
+        """送入一块音频，返回本次产生的 partial/final 事件"""
+        self._buffer = np.concatenate([self._buffer, pcm.astype(np.float32, copy=False)])
+        events = self._handle_vad(self.vad(pcm, is_final=False))
+        if self._speech_start is not None and self.partial_interval_ms > 0:
+            last = self._last_partial_ms or self._speech_start
+            if self.received_ms - last >= self.partial_interval_ms:
+                events.append(self._partial())
+        self._trim()
+        return events
+
+    def finish(self) -> List[Dict]:
+        """音频流结束，输出尚未结束的语音段"""
+        events = self._handle_vad(self.vad(np.zeros(SAMPLES_PER_MS * 10, dtype=np.float32), is_final=True))
+        if self._speech_start is not None:
+            events.append(self._final(self._speech_start, self.received_ms))
+        self._buffer = np.zeros(0, dtype=np.float32)
+        return events
+
+    def _handle_vad(self, vad_segments: List[List[int]]) -> List[Dict]:
+        events = []
+        for start_ms, end_ms in vad_segments:
+            if start_ms != -1:
+                self._speech_start = start_ms
+            if end_ms != -1 and self._speech_start is not None:
+                events.append(self._final(self._speech_start, end_ms))
+        return events
+
+    def _slice(self, start_ms: int, end_ms: int) -> np.ndarray:
+        begin = max(start_ms * SAMPLES_PER_MS - self._buffer_start, 0)
+        end = max(end_ms * SAMPLES_PER_MS - self._buffer_start, begin)
+        return self._buffer[begin:end]
+
+    def _final(self, start_ms: int, end_ms: int) -> Dict:
+        started = time.perf_counter()
+        text = self.transcribe(self._slice(start_ms, end_ms), self.language)
+        latency = time.perf_counter() - started
+        index = self.segment_count
+        self.segment_count += 1
+        self._speech_start = None
+        self._last_partial_ms = None
+        logger.debug(f"实时识别语音段 {index}: {start_ms}-{end_ms}ms, 耗时 {latency:.3f}秒, 文本: {text}")
+        return {
+            "type": "final",
+            "data": {
+                "index": index,
+                "start": round(start_ms / 1000, 2),
+                "end": round(end_ms / 1000, 2),
+                "text": text,
+                "latency": round(latency, 3)
+            }
+        }
+
+    def _partial(self) -> Dict:
+        end_ms = self.received_ms
+        self._last_partial_ms = end_ms
+        return {
+            "type": "partial",
+            "data": {
+                "index": self.segment_count,
+                "start": round(self._speech_start / 1000, 2),
+                "end": round(end_ms / 1000, 2),
+                "text": self.transcribe(self._slice(self._speech_start, end_ms), self.language)
+            }
+        }
+
+    def _trim(self):
+        """丢弃不再需要的音频：有未结束的语音段时保留到段首，否则保留最近 keep_ms"""
+        keep_from_ms = self._speech_start if self._speech_start is not None else self.received_ms - self.keep_ms
+        drop = keep_from_ms * SAMPLES_PER_MS - self._buffer_start
+        if drop > 0:
+            self._buffer = self._buffer[drop:]
+            self._buffer_start += drop
@@ -1,47 +1,96 @@
+import logging
 import os
 from typing import List, Dict, Optional, Tuple
 from ..logger import get_logger
 import yaml
 from pypinyin import pinyin, Style
-import Levenshtein
 import re
+import threading
 import time
+from .correction_cache import CorrectionCache, cache_version
+from .correction_spans import (CorrectionResult, RULE_ORIGINAL, RULE_PINYIN, Span, make_span, rebase_spans,
+                               span_to_dict)
+from .correction_model import CorrectionModel, keywords_version
+from .correction_pool import correction_pool
+from .pinyin_cache import PinyinCache
+from .pinyin_index import pinyin_similarity
+from .segmenters import (DagSegmenter, PinyinTrieSegmenter, PkusegSegmenter, Segmenter, SEGMENTER_BACKENDS,
+                         SlidingWindowSegmenter)
+from .config import speech_config
+from ..files.config import config as file_config
 
 logger = get_logger(__name__)
 
 class TextCorrector:
     _instance = None
-    _segmenter = None
     
     def __new__(cls, *args, **kwargs):
+        # 指定了目录的纠正器是独立实例（用于基准测试等），不影响全局单例
+        if kwargs.get('base_dir') is not None:
+            return super().__new__(cls)
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self, config_file: str = "correction_config.yaml"):
+    def __init__(self, config_file: str = "correction_config.yaml", base_dir: str = None,
+                 segmenter_backend: str = None):
         """初始化文本纠正器
         
         Args:
             config_file: 配置文件路径，包含目标词及其拼音信息
+            base_dir: keywords、配置文件和词典所在目录，默认为本模块所在目录；
+                指定时编译文件也放在其下，否则放在 storage/compiled
+            segmenter_backend: 分词方式（pkuseg/dag/window/trie），默认使用 speech_config.segmenter_backend
         """
         if hasattr(self, '_initialized'):
             return
             
-        # 获取当前脚本所在目录
-        self.base_dir = os.path.dirname(os.path.abspath(__file__))
+        # 默认使用当前脚本所在目录
+        self.base_dir = base_dir or os.path.dirname(os.path.abspath(__file__))
         self.config_file = os.path.join(self.base_dir, config_file)
-        # 存储格式: {word: (pinyin_list, context_words, threshold, original_words)}
-        self.target_words: Dict[str, Tuple[List[str], List[str], float, List[str]]] = {}
-        self.pinyin_cache = {}  # 缓存词语的拼音结果
-        self.original_words_map = {}  # 新增：原词到目标词的映射
-        
-        # 初始化分词器
-        self._init_segmenter()
-        # 加载配置
+        # 全局实例的编译文件写到 storage 下，不写入源码目录；独立实例写到各自的 base_dir 下
+        compiled_dir = file_config.compiled_dir if base_dir is None else os.path.join(self.base_dir, "compiled")
+        self.model_file = os.path.join(compiled_dir, "correction_model.pkl")
+        # 缓存词语的拼音结果：目标词拼音常驻，其余按最近使用淘汰
+        self.pinyin_cache = PinyinCache(self._convert_pinyin)
+        # 编译后的纠错模型（目标词、原词映射、各类索引和分词器）。
+        # 热重载时整体替换这个引用，正在进行的纠错继续使用开始时取到的旧模型
+        self.model = CorrectionModel(None, {})
+        self._keywords_mtime = None  # 当前模型对应的 keywords 修改时间
+        self._reload_lock = threading.Lock()  # 同一时间只进行一次重载
+        self._reload_thread: Optional[threading.Thread] = None
+        self._reload_pending = False  # 后台重载期间又收到了重载请求
+        self._loaded_at = None  # 当前模型的生效时间
+        self._last_error = None  # 最近一次重载失败的原因
+        self.segmenter_backend = segmenter_backend or speech_config.segmenter_backend
+        if self.segmenter_backend not in SEGMENTER_BACKENDS:
+            raise ValueError(f"不支持的分词方式: {self.segmenter_backend}，可选: {', '.join(SEGMENTER_BACKENDS)}")
+        self._segmenter_lock = threading.Lock()  # 避免多个线程同时初始化分词器
+        self.length_tolerance = speech_config.similarity_length_tolerance
+        # 句子级纠错结果缓存；只有全局实例写入磁盘，独立实例（基准测试等）只用内存
+        cache_dir = file_config.correction_cache_dir if speech_config.correction_cache_persist and base_dir is None else None
+        self.correction_cache = CorrectionCache(cache_dir=cache_dir)
+        
+        # 加载配置。分词器在第一次纠错时才初始化，导入本模块不会加载分词模型
         self.load_config()
         
         self._initialized = True
 
+    @property
+    def _segmenter(self) -> Optional[Segmenter]:
+        """当前模型的分词器，未初始化时为 None"""
+        return self.model.segmenter
+
+    @property
+    def target_words(self) -> Dict[str, Tuple[List[str], List[str], float, List[str]]]:
+        """目标词配置，格式: {word: (pinyin_list, context_words, threshold, original_words)}"""
+        return self.model.target_words
+
+    @property
+    def original_words_map(self) -> Dict[str, str]:
+        """原词到目标词的映射"""
+        return self.model.original_words_map
+
     def _should_update_dict(self) -> bool:
         """检查是否需要更新自定义词典
         
@@ -65,9 +114,25 @@ class TextCorrector:
             logger.info("keywords文件已更新，需要重新生成词典")
         return needs_update
         
-    def _generate_custom_dict(self):
-        """从keywords文件生成自定义词典"""
+    def _generate_custom_dict(self, model: CorrectionModel = None):
+        """生成自定义词典，词表优先使用编译后的纠错模型中的结果"""
         logger.debug("开始生成自定义词典...")
+        dict_words = (model or self.model).dict_words
+        if dict_words is None:
+            dict_words = self._collect_dict_words()
+            
+        # 保存词典文件，顺序为：目标词、错误词、上下文词
+        dict_path = os.path.join(self.base_dir, "custom_dict.txt")
+        try:
+            with open(dict_path, 'w', encoding='utf-8') as f:
+                for word in dict_words:
+                    f.write(f"{word}\n")
+        except Exception as e:
+            logger.error(f"生成自定义词典失败: {str(e)}")
+            raise
+            
+    def _collect_dict_words(self) -> List[str]:
+        """从keywords文件提取自定义词典的词表"""
         words = set()  # 存储目标词
         error_words = set()  # 存储错误识别的完整词组
         context_words = set()  # 存储上下文词
@@ -153,9 +218,6 @@ class TextCorrector:
                             if is_chinese_word(context_word) and len(context_word) > 1:
                                 context_words.add(context_word)
             
-            # 保存词典文件
-            dict_path = os.path.join(self.base_dir, "custom_dict.txt")
-            
             # 过滤并按长度排序
             valid_words = sorted([w for w in words if len(w) > 1 and is_chinese_word(w)], 
                                key=len, reverse=True)
@@ -164,51 +226,73 @@ class TextCorrector:
             valid_context_words = sorted([w for w in context_words if len(w) > 1 and is_chinese_word(w)], 
                                        key=len, reverse=True)
             
-            # 写入词典，按顺序写入：目标词、错误词、上下文词
-            with open(dict_path, 'w', encoding='utf-8') as f:
-                # 写入目标词（按长度排序）
-                for word in valid_words:
-                    f.write(f"{word}\n")
-                    
-                # 写入错误词（按长度排序）
-                for word in valid_error_words:
-                    if word not in words:  # 避免重复
-                        f.write(f"{word}\n")
-                        
-                # 写入上下文词（按长度排序）
-                for word in valid_context_words:
-                    if word not in words and word not in error_words:  # 避免重复
-                        f.write(f"{word}\n")
+            # 按顺序排列：目标词、错误词、上下文词（各自按长度排序）
+            dict_words = list(valid_words)
+            dict_words.extend(w for w in valid_error_words if w not in words)  # 避免重复
+            dict_words.extend(w for w in valid_context_words if w not in words and w not in error_words)
                     
-            logger.info(f"自定义词典生成完成，共{len(valid_words)}个目标词，{len(valid_error_words)}个错误词，{len(valid_context_words)}个上下文词")
+            logger.info(f"自定义词典词表提取完成，共{len(valid_words)}个目标词，{len(valid_error_words)}个错误词，{len(valid_context_words)}个上下文词")
+            return dict_words
             
         except Exception as e:
-            logger.error(f"生成自定义词典失败: {str(e)}")
+            logger.error(f"提取自定义词典词表失败: {str(e)}")
             raise
             
-    def _init_segmenter(self):
-        """初始化分词器"""
-        if self._segmenter is not None:
-            return
+    def _init_segmenter(self, model: CorrectionModel = None) -> Segmenter:
+        """按配置的分词方式初始化分词器
+        
+        Args:
+            model: 要初始化分词器的纠错模型，默认为当前模型
+        """
+        model = model or self.model
+        if model.segmenter is not None:
+            return model.segmenter
             
         try:
-            # 检查是否需要更新词典
-            if self._should_update_dict():
-                self._generate_custom_dict()
-                
-            # 初始化分词器
-            import pkuseg
-            dict_path = os.path.join(self.base_dir, "custom_dict.txt")
-            logger.debug("正在初始化分词器...")
-            # 使用默认通用模型
-            self._segmenter = pkuseg.pkuseg(user_dict=dict_path)
-            logger.info("分词器初始化完成")
+            start_time = time.time()
+            logger.debug(f"正在初始化分词器: {self.segmenter_backend}")
+            if self.segmenter_backend == PkusegSegmenter.name:
+                # 检查是否需要更新词典
+                if self._should_update_dict():
+                    self._generate_custom_dict(model)
+                segmenter = PkusegSegmenter(os.path.join(self.base_dir, "custom_dict.txt"))
+            elif self.segmenter_backend == DagSegmenter.name:
+                dict_words = model.dict_words
+                if dict_words is None:
+                    dict_words = self._collect_dict_words()
+                # 音节数不同的目标词可以匹配比它多出字的片段
+                tolerant = model.candidate_index.length_tolerant
+                max_match_len = tolerant.max_length + self.length_tolerance if self.length_tolerance else 0
+                segmenter = DagSegmenter(dict_words, max_match_len=max_match_len)
+            elif self.segmenter_backend == PinyinTrieSegmenter.name:
+                segmenter = PinyinTrieSegmenter(model.target_words, model.candidate_index.syllable_table)
+            else:
+                segmenter = SlidingWindowSegmenter([len(word) for word in model.target_words])
+            model.segmenter = segmenter
+            logger.info(f"分词器初始化完成: {self.segmenter_backend}，耗时: {(time.time() - start_time)*1000:.2f}ms")
+            return segmenter
             
         except Exception as e:
             logger.error(f"初始化分词器失败: {str(e)}")
-            self._segmenter = None  # 确保失败时设为None
+            model.segmenter = None  # 确保失败时设为None
             raise
 
+    def get_segmenter(self, model: CorrectionModel = None) -> Optional[Segmenter]:
+        """获取模型的分词器，第一次调用时初始化
+        
+        初始化失败时记录原因并返回 None，同一个模型不再重试（重新加载模型后会再次尝试）。
+        """
+        model = model or self.model
+        if model.segmenter is not None or model.segmenter_error is not None:
+            return model.segmenter
+        with self._segmenter_lock:
+            if model.segmenter is None and model.segmenter_error is None:
+                try:
+                    self._init_segmenter(model)
+                except Exception as e:
+                    model.segmenter_error = str(e)
+            return model.segmenter
+
     def _should_update_config(self) -> bool:
         """检查是否需要更新yaml配置文件
         
@@ -232,158 +316,275 @@ class TextCorrector:
         return needs_update
 
     def load_config(self) -> None:
-        """从txt文件更新yaml配置文件，并加载配置"""
+        """加载纠错模型"""
+        keywords_mtime = self._get_keywords_mtime()
         try:
-            # 检查是否需要更新配置
-            if not self._should_update_config():
-                # 直接从yaml加载配置
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f) or {'target_words': {}}
-                    
-                # 加载配置到内存
-                for word, info in config['target_words'].items():
-                    pinyin_list = info.get('pinyin', [])
-                    context_words = info.get('context_words', [])
-                    threshold = info.get('similarity_threshold', 0.6)
-                    orig_words = info.get('original_words', [])
-                    self.target_words[word] = (pinyin_list, context_words, threshold, orig_words)
+            model = self._build_model()
+        except Exception as e:
+            logger.error(f"加载配置文件失败: {str(e)}")
+            model = CorrectionModel(None, {})
+        self._activate(model, keywords_mtime)
+
+    def _activate(self, model: CorrectionModel, keywords_mtime: Optional[float]):
+        """切换到新模型，并常驻其目标词拼音"""
+        self.pinyin_cache.pin({word: info[0] for word, info in model.target_words.items()})
+        self.model = model
+        self._keywords_mtime = keywords_mtime
+        self._loaded_at = time.time()
+
+    def _get_keywords_mtime(self) -> Optional[float]:
+        keywords_path = os.path.join(self.base_dir, "keywords")
+        return os.path.getmtime(keywords_path) if os.path.exists(keywords_path) else None
+
+    def _build_model(self) -> CorrectionModel:
+        """构建纠错模型
+
+        keywords 内容没有变化时直接加载编译好的模型文件；否则从 yaml/keywords 重新生成配置，
+        编译模型并保存，供下次启动和其他工作进程使用。
+        """
+        start_time = time.time()
+        version = keywords_version(os.path.join(self.base_dir, "keywords"))
+        config_mtime = os.path.getmtime(self.config_file) if os.path.exists(self.config_file) else 0.0
+        model = CorrectionModel.load(self.model_file, version, config_mtime)
+        if model is not None:
+            logger.info(f"加载编译后的纠错模型: {len(model.target_words)} 个目标词，{len(model.original_words_map)} 个原词映射，"
+                        f"耗时: {(time.time() - start_time)*1000:.2f}ms")
+            return model
+            
+        target_words = self._load_target_words()
+        dict_words = self._collect_dict_words()
+        config_mtime = os.path.getmtime(self.config_file) if os.path.exists(self.config_file) else 0.0
+        model = CorrectionModel(version, target_words, dict_words, config_mtime)
+        if version:
+            model.save(self.model_file)
+        logger.info(f"纠错模型编译完成: {len(model.target_words)} 个目标词，{len(model.original_words_map)} 个原词映射，"
+                    f"耗时: {(time.time() - start_time)*1000:.2f}ms")
+        return model
+
+    def reload(self, force: bool = False) -> bool:
+        """重新加载纠错模型
+        
+        在当前线程中构建新模型和新分词器，完成后一次性替换。构建期间以及替换前已经开始的
+        纠错仍使用旧模型；构建失败时保留旧模型。
+        
+        Args:
+            force: keywords 内容没有变化时也重新加载
+            
+        Returns:
+            bool: 是否切换到了新模型
+        """
+        with self._reload_lock:
+            keywords_mtime = self._get_keywords_mtime()
+            try:
+                version = keywords_version(os.path.join(self.base_dir, "keywords"))
+                if not force and version == self.model.version:
+                    self._keywords_mtime = keywords_mtime
+                    return False
                     
-                # 构建原词映射表
-                for target_word, (_, _, _, orig_words) in self.target_words.items():
-                    for orig in orig_words:
-                        self.original_words_map[orig] = target_word
+                logger.info("开始重新加载纠错模型...")
+                model = self._build_model()
+                # 当前模型已经用过分词器时，切换前为新模型准备好，避免切换后第一次纠错等待加载
+                if self.model.segmenter is not None:
+                    self._init_segmenter(model)
+            except Exception as e:
+                self._last_error = str(e)
+                logger.error(f"重新加载纠错模型失败，继续使用当前版本: {str(e)}")
+                return False
                 
-                logger.info(f"从配置文件加载了 {len(self.target_words)} 个目标词配置，{len(self.original_words_map)} 个原词映射")
+            self._activate(model, keywords_mtime)
+            self._last_error = None
+            logger.info(f"纠错模型已切换到新版本: {model.version}")
+            return True
+
+    def reload_if_changed(self) -> bool:
+        """keywords 被修改过时在后台重新加载，未修改时只需一次 stat
+        
+        供模型工作进程在处理任务前调用：当前任务继续使用旧模型，不会被重载阻塞。
+        
+        Returns:
+            bool: 是否发起了重载
+        """
+        if self._reload_thread is not None or self._get_keywords_mtime() == self._keywords_mtime:
+            return False
+        self.reload_async()
+        return True
+
+    def reload_async(self):
+        """在后台线程中重新加载，重复的请求会合并为一次"""
+        with self._reload_lock:
+            if self._reload_thread is not None:
+                self._reload_pending = True
                 return
-            
-            def represent_list(dumper, data):
-                return dumper.represent_sequence('tag:yaml.org,2002:seq', data, flow_style=True)
-            yaml.add_representer(list, represent_list)
-            
-            keywords_file = os.path.join(self.base_dir, "keywords")
-            keywords = []
-            thresholds = {}  # 存储单独设置的阈值
-            original_words = {}  # 存储原词映射
-            context_words = {}  # 存储上下文词
-            duplicate_words = {}  # 用于存储重复的词条
-            
-            if os.path.exists(keywords_file):
-                with open(keywords_file, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    for line_number, line in enumerate(lines, 1):
-                        line = line.strip()
-                        if not line or line.startswith('#'):
-                            continue
-                            
-                        # 提取上下文词（如果有）
-                        context_list = []
-                        if '(' in line and ')' in line:
-                            context_start = line.find('(')
-                            context_end = line.find(')')
-                            if context_start < context_end:
-                                context_part = line[context_start+1:context_end]
-                                context_list = [w.strip() for w in context_part.split(',')]
-                                # 移除上下文部分，处理剩余部分
-                                line = line[:context_start].strip()
-                        
-                        # 分割剩余部分
-                        parts = line.split(maxsplit=2)
-                        if not parts:
-                            continue
-                            
-                        word = parts[0]
-                        threshold = 0.9  # 默认阈值
-                        orig_words = []
-                        
-                        if len(parts) >= 2:
-                            second_part = parts[1]
-                            # 检查第二部分是否为阈值
-                            try:
-                                threshold = float(second_part)
-                                # 如果有第三部分，那就是原词列表
-                                if len(parts) == 3:
-                                    orig_words = [w.strip() for w in parts[2].replace('，', ',').split(',')]
-                            except ValueError:
-                                # 如果不是阈值，就当作原词列表
-                                orig_words = [w.strip() for w in second_part.replace('，', ',').split(',')]
-                        
-                        # 检查是否是重复的目标词
-                        if word in keywords:
-                            if word not in duplicate_words:
-                                duplicate_words[word] = []
-                                # 添加第一次出现的位置
-                                first_line = next(i for i, l in enumerate(lines, 1) if l.strip().split(maxsplit=1)[0] == word)
-                                duplicate_words[word].append((first_line, lines[first_line-1].strip()))
-                            duplicate_words[word].append((line_number, line))
-                            # 使用最大的阈值
-                            if threshold > thresholds[word]:
-                                thresholds[word] = threshold
-                            # 合并原词列表
-                            if orig_words:
-                                if word not in original_words:
-                                    original_words[word] = set()
-                                original_words[word].update(orig_words)
-                            # 合并上下文词
-                            if context_list:
-                                if word not in context_words:
-                                    context_words[word] = set()
-                                context_words[word].update(context_list)
-                        else:
-                            keywords.append(word)
-                            thresholds[word] = threshold
-                            if orig_words:
-                                original_words[word] = set(orig_words)
-                            if context_list:
-                                context_words[word] = set(context_list)
-            
-            # 输出重复词条警告
-            if duplicate_words:
-                logger.warning("\n发现重复的目标词配置：")
-                for word, occurrences in duplicate_words.items():
-                    logger.warning(f"\n目标词 '{word}' 在以下行出现多次：")
-                    for line_num, line_content in occurrences:
-                        logger.warning(f"第 {line_num} 行: {line_content}")
-                    logger.info(f"已自动合并配置：")
-                    logger.info(f"- 使用最大阈值: {thresholds[word]}")
-                    if word in original_words:
-                        logger.info(f"- 合并后的原词数量: {len(original_words[word])}")
-                    if word in context_words:
-                        logger.info(f"- 合并后的上下文词数量: {len(context_words[word])}")
-            
-            # 准备yaml配置
-            config = {'target_words': {}}
-            
-            # 更新配置
-            for word in keywords:
-                config['target_words'][word] = {
-                    'pinyin': self.word_to_pinyin(word),
-                    'context_words': list(context_words.get(word, set())),
-                    'similarity_threshold': thresholds[word],
-                    'original_words': list(original_words.get(word, set()))
-                }
-            
-            # 保存更新后的配置
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(config, f, allow_unicode=True, sort_keys=False, default_flow_style=False)
-            
+            self._reload_pending = False
+            self._reload_thread = threading.Thread(target=self._reload_worker, name="correction-reload", daemon=True)
+            self._reload_thread.start()
+
+    def _reload_worker(self):
+        while True:
+            self.reload()
+            with self._reload_lock:
+                if not self._reload_pending:
+                    self._reload_thread = None
+                    return
+                self._reload_pending = False
+
+    def get_status(self) -> Dict:
+        """获取当前生效的纠错模型版本和重载状态"""
+        model = self.model
+        return {
+            "version": model.version,
+            "target_words": len(model.target_words),
+            "original_words": len(model.original_words_map),
+            "segmenter": self.segmenter_backend,
+            "segmenter_ready": model.segmenter is not None,
+            "segmenter_error": model.segmenter_error,
+            "loaded_at": self._loaded_at,
+            "reloading": self._reload_thread is not None,
+            "last_error": self._last_error,
+            "pinyin_cache": self.pinyin_cache.get_stats(),
+            "correction_cache": self.correction_cache.get_stats()
+        }
+
+    def _load_target_words(self) -> Dict[str, Tuple[List[str], List[str], float, List[str]]]:
+        """从txt文件更新yaml配置文件，并加载目标词配置"""
+        target_words = {}
+        # 检查是否需要更新配置
+        if not self._should_update_config():
+            # 直接从yaml加载配置
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {'target_words': {}}
+                
             # 加载配置到内存
             for word, info in config['target_words'].items():
                 pinyin_list = info.get('pinyin', [])
                 context_words = info.get('context_words', [])
                 threshold = info.get('similarity_threshold', 0.6)
                 orig_words = info.get('original_words', [])
-                self.target_words[word] = (pinyin_list, context_words, threshold, orig_words)
+                target_words[word] = (pinyin_list, context_words, threshold, orig_words)
                 
-            # 构建原词映射表
-            for target_word, (_, _, _, orig_words) in self.target_words.items():
-                for orig in orig_words:
-                    self.original_words_map[orig] = target_word
-            
-            logger.info(f"成功加载 {len(self.target_words)} 个目标词配置，{len(self.original_words_map)} 个原词映射")
-            
-        except Exception as e:
-            logger.error(f"加载配置文件失败: {str(e)}")
-            self.target_words = {}
+            logger.info(f"从配置文件加载了 {len(target_words)} 个目标词配置")
+            return target_words
+        
+        def represent_list(dumper, data):
+            return dumper.represent_sequence('tag:yaml.org,2002:seq', data, flow_style=True)
+        yaml.add_representer(list, represent_list)
+        
+        keywords_file = os.path.join(self.base_dir, "keywords")
+        keywords = []
+        thresholds = {}  # 存储单独设置的阈值
+        original_words = {}  # 存储原词映射
+        context_words = {}  # 存储上下文词
+        duplicate_words = {}  # 用于存储重复的词条
+        
+        if os.path.exists(keywords_file):
+            with open(keywords_file, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+                for line_number, line in enumerate(lines, 1):
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                        
+                    # 提取上下文词（如果有）
+                    context_list = []
+                    if '(' in line and ')' in line:
+                        context_start = line.find('(')
+                        context_end = line.find(')')
+                        if context_start < context_end:
+                            context_part = line[context_start+1:context_end]
+                            context_list = [w.strip() for w in context_part.split(',')]
+                            # 移除上下文部分，处理剩余部分
+                            line = line[:context_start].strip()
+                    
+                    # 分割剩余部分
+                    parts = line.split(maxsplit=2)
+                    if not parts:
+                        continue
+                        
+                    word = parts[0]
+                    threshold = 0.9  # 默认阈值
+                    orig_words = []
+                    
+                    if len(parts) >= 2:
+                        second_part = parts[1]
+                        # 检查第二部分是否为阈值
+                        try:
+                            threshold = float(second_part)
+                            # 如果有第三部分，那就是原词列表
+                            if len(parts) == 3:
+                                orig_words = [w.strip() for w in parts[2].replace('，', ',').split(',')]
+                        except ValueError:
+                            # 如果不是阈值，就当作原词列表
+                            orig_words = [w.strip() for w in second_part.replace('，', ',').split(',')]
+                    
+                    # 检查是否是重复的目标词
+                    if word in keywords:
+                        if word not in duplicate_words:
+                            duplicate_words[word] = []
+                            # 添加第一次出现的位置
+                            first_line = next(i for i, l in enumerate(lines, 1) if l.strip().split(maxsplit=1)[0] == word)
+                            duplicate_words[word].append((first_line, lines[first_line-1].strip()))
+                        duplicate_words[word].append((line_number, line))
+                        # 使用最大的阈值
+                        if threshold > thresholds[word]:
+                            thresholds[word] = threshold
+                        # 合并原词列表
+                        if orig_words:
+                            if word not in original_words:
+                                original_words[word] = set()
+                            original_words[word].update(orig_words)
+                        # 合并上下文词
+                        if context_list:
+                            if word not in context_words:
+                                context_words[word] = set()
+                            context_words[word].update(context_list)
+                    else:
+                        keywords.append(word)
+                        thresholds[word] = threshold
+                        if orig_words:
+                            original_words[word] = set(orig_words)
+                        if context_list:
+                            context_words[word] = set(context_list)
+        
+        # 输出重复词条警告
+        if duplicate_words:
+            logger.warning("\n发现重复的目标词配置：")
+            for word, occurrences in duplicate_words.items():
+                logger.warning(f"\n目标词 '{word}' 在以下行出现多次：")
+                for line_num, line_content in occurrences:
+                    logger.warning(f"第 {line_num} 行: {line_content}")
+                logger.info(f"已自动合并配置：")
+                logger.info(f"- 使用最大阈值: {thresholds[word]}")
+                if word in original_words:
+                    logger.info(f"- 合并后的原词数量: {len(original_words[word])}")
+                if word in context_words:
+                    logger.info(f"- 合并后的上下文词数量: {len(context_words[word])}")
+        
+        # 准备yaml配置
+        config = {'target_words': {}}
+        
+        # 更新配置
+        for word in keywords:
+            config['target_words'][word] = {
+                'pinyin': self.word_to_pinyin(word),
+                'context_words': list(context_words.get(word, set())),
+                'similarity_threshold': thresholds[word],
+                'original_words': list(original_words.get(word, set()))
+            }
+        
+        # 保存更新后的配置
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            yaml.dump(config, f, allow_unicode=True, sort_keys=False, default_flow_style=False)
+        
+        # 加载配置到内存
+        for word, info in config['target_words'].items():
+            pinyin_list = info.get('pinyin', [])
+            context_words = info.get('context_words', [])
+            threshold = info.get('similarity_threshold', 0.6)
+            orig_words = info.get('original_words', [])
+            target_words[word] = (pinyin_list, context_words, threshold, orig_words)
+            
+        logger.info(f"成功加载 {len(target_words)} 个目标词配置")
+        return target_words
 
     def word_to_pinyin(self, word: str) -> List[str]:
         """将词转换为拼音列表
@@ -394,13 +595,12 @@ class TextCorrector:
         Returns:
             拼音列表
         """
-        if word in self.pinyin_cache:
-            return self.pinyin_cache[word]
-            
-        # 获取拼音（数字声调形式）
-        py_list = [p[0] for p in pinyin(word, style=Style.TONE3)]
-        self.pinyin_cache[word] = py_list
-        return py_list
+        return self.pinyin_cache.get(word)
+
+    @staticmethod
+    def _convert_pinyin(word: str) -> List[str]:
+        """获取拼音（数字声调形式）"""
+        return [p[0] for p in pinyin(word, style=Style.TONE3)]
 
     def calculate_pinyin_similarity(self, py1: List[str], py2: List[str]) -> float:
         """计算两个拼音列表的相似度
@@ -412,55 +612,47 @@ class TextCorrector:
         Returns:
             相似度分数 (0-1)
         """
-        if len(py1) != len(py2):
-            return 0.0
-            
-        total_similarity = 0.0
-        for p1, p2 in zip(py1, py2):
-            # 使用Levenshtein距离计算单个拼音的相似度
-            distance = Levenshtein.distance(p1, p2)
-            max_len = max(len(p1), len(p2))
-            similarity = 1 - (distance / max_len)
-            total_similarity += similarity
-            
-        return total_similarity / len(py1)
+        return pinyin_similarity(py1, py2)
 
-    def find_best_match(self, word: str, context: str = "") -> Optional[tuple[str, float, float]]:
+    def find_best_match(self, word: str, context: str = "", model: CorrectionModel = None,
+                        present: int = None) -> Optional[tuple[str, float, float]]:
         """找到最匹配的目标关键词
         
+        Args:
+            model: 使用的纠错模型，默认为当前模型
+            present: context 中出现的上下文词位图，为空时扫描 context 得到
+            
         Returns:
             如果找到匹配，返回(匹配词, 相似度, 阈值)；否则返回None
         """
+        model = model or self.model
         # 如果输入词已经是目标词之一，直接返回None（无需替换）
-        if word in self.target_words:
+        if word in model.target_words:
             return None
             
-        word_pinyin = self.word_to_pinyin(word)
         best_match = None
         highest_similarity = 0
         matched_threshold = 0
-        best_match_pinyin = None
         
-        # 按词长分组，只比较相同长度的词
-        for target_word, (target_pinyin, context_words, threshold, _) in self.target_words.items():
-            # 检查词长是否相同
-            if len(word) != len(target_word):
-                continue
-                
-            # 计算拼音相似度
-            similarity = self.calculate_pinyin_similarity(word_pinyin, target_pinyin)
+        for index, similarity in self._word_matches(word, model):
+            target_word = model.candidate_index.words[index]
+            target_pinyin, _, threshold, _ = model.target_words[target_word]
             
             # 如果目标词有上下文要求，但上下文中没有任何一个上下文词，跳过这个匹配
-            if context_words and not any(w in context for w in context_words):
-                continue
+            if target_word in model.context_matcher.masks:
+                if present is None:
+                    present = model.context_matcher.scan(context)
+                if not model.context_matcher.allows(target_word, present):
+                    continue
                 
             # 只有当相似度大于等于阈值时才更新最高相似度和匹配结果
             if similarity >= threshold and similarity > highest_similarity:
                 highest_similarity = similarity
                 best_match = target_word
                 matched_threshold = threshold
-                best_match_pinyin = target_pinyin
-                logger.debug(f"找到相似度匹配: {word}({','.join(word_pinyin)}) -> {best_match}({','.join(target_pinyin)}) [相似度: {similarity:.3f}, 阈值: {threshold}]")
+                if logger.isEnabledFor(logging.DEBUG):
+                    word_pinyin = self.word_to_pinyin(word)
+                    logger.debug(f"找到相似度匹配: {word}({','.join(word_pinyin)}) -> {best_match}({','.join(target_pinyin)}) [相似度: {similarity:.3f}, 阈值: {threshold}]")
         
         # 如果找到最佳匹配，返回结果
         if best_match:
@@ -468,114 +660,198 @@ class TextCorrector:
         
         return None
 
-    def correct_text(self, text: str, context: str = "") -> str:
+    def _word_matches(self, word: str, model: CorrectionModel) -> List[Tuple[int, float]]:
+        """相似度达到阈值的目标词（不考虑上下文），按词缓存在模型中
+        
+        索引筛出候选词（字数、音节数相同且可能达到阈值），并批量计算拼音相似度；
+        允许音节数不同时，再查找音节数相差 1 的目标词（识别时多字或漏字），相似度按编辑距离计算。
+        同一个词在不同句子中反复出现，缓存后不再转换拼音和查索引。
+        
+        Returns:
+            [(目标词序号, 相似度), ...]
+        """
+        key = (word, self.length_tolerance)
+        matches = model.match_cache.get(key)
+        if matches is not None:
+            return matches
+        word_pinyin = self.word_to_pinyin(word)
+        matches = model.candidate_index.matches(word, word_pinyin)
+        if self.length_tolerance and len(word) == len(word_pinyin):
+            matches += model.candidate_index.length_tolerant_matches(word_pinyin, self.length_tolerance)
+        model.cache_matches(key, matches)
+        return matches
+
+    def correct_text(self, text: str, context: str = "", model: CorrectionModel = None) -> str:
         """纠正文本中的词语
         
         Args:
             text: 待纠正的文本
             context: 上下文
+            model: 使用的纠错模型，默认为当前模型。整个纠错过程只使用这一个版本
             
         Returns:
             纠正后的文本
         """
-        if not self.target_words:
-            return text
+        return self.correct_text_with_spans(text, model)[0]
+
+    def correct_text_with_spans(self, text: str, model: CorrectionModel = None) -> CorrectionResult:
+        """纠正文本，并返回每处替换的位置
+        
+        结果按 (keywords 版本, 原文) 缓存，相同的句子只纠正一次。
+        
+        Returns:
+            (纠正后的文本, [(在纠正后文本中的偏移, 替换后的字数, 原文, 替换后的词, 规则, 相似度), ...])
+        """
+        model = model or self.model
+        if not model.target_words:
+            return text, []
             
         if not text or text.isspace():
-            return text
+            return text, []
             
+        cached = self.correction_cache.get(self._cache_version(model), text)
+        if cached is not None:
+            return cached
+        return self._correct_and_cache(text, model)
+
+    def correct_texts(self, texts: List[str], model: CorrectionModel = None) -> List[CorrectionResult]:
+        """批量纠正句子
+        
+        先查缓存，未命中的句子去重后，数量较多时分块交给纠错进程池，否则（或进程池不可用时）
+        在当前进程内逐句纠正。
+        
+        Returns:
+            与 texts 一一对应的 (纠正后的文本, 替换位置)
+        """
+        model = model or self.model
+        if not model.target_words:
+            return [(text, []) for text in texts]
+            
+        version = self._cache_version(model)
+        results = [(text, []) if not text or text.isspace() else self.correction_cache.get(version, text)
+                   for text in texts]
+        missing = list(dict.fromkeys(text for text, result in zip(texts, results) if result is None))
+        if missing:
+            corrected = correction_pool.correct_texts(missing, model.version)
+            if corrected is None:
+                corrected = [self._correct_and_cache(text, model) for text in missing]
+            else:
+                # 纠错进程已经把结果写入了磁盘缓存，这里只加入内存
+                for text, result in zip(missing, corrected):
+                    self.correction_cache.put(version, text, result, persist=False)
+            corrected = dict(zip(missing, corrected))
+            results = [corrected[text] if result is None else result for text, result in zip(texts, results)]
+        return results
+
+    def _cache_version(self, model: CorrectionModel) -> Optional[str]:
+        """model 在本纠正器配置下的缓存版本"""
+        return cache_version(model.version, self.segmenter_backend, self.length_tolerance, model.format_version)
+
+    def _correct_and_cache(self, text: str, model: CorrectionModel) -> CorrectionResult:
         try:
-            # 第一步：原词替换
-            corrected_text = text
-            replaced_positions = set()
-            has_any_correction = False  # 记录是否发生任何纠正（包括原词替换和相似度匹配）
-            
-            # 按词长从长到短排序原词
-            all_original_words = []
-            for target_word, (_, context_words, _, orig_words) in self.target_words.items():
-                for orig in orig_words:
-                    if orig and not orig.isspace():
-                        all_original_words.append((orig, target_word, context_words))
-            all_original_words.sort(key=lambda x: len(x[0]), reverse=True)
-            
-            # 进行原词替换
-            for orig_word, target_word, context_words in all_original_words:
-                start = 0
-                while True:
-                    pos = corrected_text.find(orig_word, start)
-                    if pos == -1:
-                        break
-                        
-                    if not any(pos <= p < pos + len(orig_word) for p in replaced_positions):
-                        if not context_words or any(w in text for w in context_words):
-                            if orig_word != target_word:
-                                has_any_correction = True
-                                logger.info(f"原词替换: {orig_word} -> {target_word}")
-                            corrected_text = corrected_text[:pos] + target_word + corrected_text[pos + len(orig_word):]
-                            replaced_positions.update(range(pos, pos + len(target_word)))
-                            
-                    start = pos + 1
-            
-            # 第二步：分词和相似度匹配
-            if self._segmenter is None:
-                logger.warning("分词器未初始化，跳过相似度匹配")
-                return corrected_text
-                
-            # 分词处理
-            final_words = []
-            current_pos = 0
-            text_len = len(corrected_text)
-            
-            while current_pos < text_len:
-                if current_pos in replaced_positions:
-                    while current_pos < text_len and current_pos in replaced_positions:
-                        final_words.append(corrected_text[current_pos])
-                        current_pos += 1
-                    continue
-                
-                end_pos = current_pos
-                while end_pos < text_len and end_pos not in replaced_positions:
-                    end_pos += 1
-                
-                if end_pos > current_pos:
-                    segment = corrected_text[current_pos:end_pos]
-                    words = self._segmenter.cut(segment)
+            result = self._correct(text, model)
+        except Exception as e:
+            logger.error(f"文本纠正失败: {str(e)}")
+            return text, []
+        # 分词器不可用时只做了原词替换，不缓存这种不完整的结果
+        if model.segmenter is not None:
+            self.correction_cache.put(self._cache_version(model), text, result)
+        return result
+
+    def _correct(self, text: str, model: CorrectionModel) -> CorrectionResult:
+        """原词替换 + 分词和相似度匹配
+        
+        每处纠正只记录在返回的位置列表中，不逐条写日志；调用方汇总后输出一条。
+        """
+        # 第一步：原词替换（最左最长、互不重叠，一次扫描完成）
+        corrected_text, replaced_positions, replacements = model.original_replacer.replace(text)
+        spans = self._replacement_spans(replaced_positions, replacements, len(corrected_text))
+        
+        # 第二步：分词和相似度匹配
+        segmenter = self.get_segmenter(model)
+        if segmenter is None:
+            logger.warning("分词器未初始化，跳过相似度匹配")
+            return corrected_text, spans
+            
+        # 纠正后文本中出现的上下文词，整句只扫描一次
+        present = model.context_matcher.scan(corrected_text)
+        # 滑动窗口分词需要用相似度匹配决定切分
+        match = lambda word: self.find_best_match(word, corrected_text, model, present)
+        
+        # 分词处理
+        final_words = []
+        similarity_spans = []
+        current_pos = 0
+        shift = 0  # 相似度替换造成的字数变化（音节数不同的目标词替换后字数会变）
+        text_len = len(corrected_text)
+        
+        while current_pos < text_len:
+            if current_pos in replaced_positions:
+                while current_pos < text_len and current_pos in replaced_positions:
+                    final_words.append(corrected_text[current_pos])
+                    current_pos += 1
+                continue
+            
+            end_pos = current_pos
+            while end_pos < text_len and end_pos not in replaced_positions:
+                end_pos += 1
+            
+            if end_pos > current_pos:
+                segment = corrected_text[current_pos:end_pos]
+                words = segmenter.cut(segment, match)
+                if logger.isEnabledFor(logging.DEBUG):
                     logger.debug(f"分词: {' | '.join(words)}")
-                    
-                    for word in words:
-                        if (word in '，。！？、；：""''（）【】《》' or 
-                            len(word) == 1 or 
-                            not word or 
-                            word.isspace()):
-                            final_words.append(word)
-                            continue
-                            
-                        # 尝试相似度匹配
-                        match_result = self.find_best_match(word, corrected_text)
-                        if match_result:
-                            best_match, similarity, threshold = match_result
-                            target_context_words = self.target_words[best_match][1]
-                            
-                            if (not target_context_words or any(w in corrected_text for w in target_context_words)) and similarity >= threshold and word != best_match:
-                                has_any_correction = True
+                word_pos = current_pos  # 当前词在原词替换后文本中的位置
+                
+                for word in words:
+                    word_pos += len(word)
+                    if (word in '，。！？、；：""''（）【】《》' or 
+                        len(word) == 1 or 
+                        not word or 
+                        word.isspace()):
+                        final_words.append(word)
+                        continue
+                        
+                    # 尝试相似度匹配
+                    match_result = self.find_best_match(word, corrected_text, model, present)
+                    if match_result:
+                        best_match, similarity, threshold = match_result
+                        
+                        if model.context_matcher.allows(best_match, present) and similarity >= threshold and word != best_match:
+                            if logger.isEnabledFor(logging.DEBUG):
                                 word_pinyin = self.word_to_pinyin(word)
                                 target_pinyin = self.word_to_pinyin(best_match)
                                 logger.debug(f"执行相似度替换: {word}({','.join(word_pinyin)}) -> {best_match}({','.join(target_pinyin)}) [相似度: {similarity:.3f}, 阈值: {threshold}]")
-                                final_words.append(best_match)
-                                continue
-                        
-                        final_words.append(word)
-                
-                current_pos = end_pos
-            
-            result = ''.join(final_words)
-            if has_any_correction:  # 只在发生了纠正时才输出最终结果
-                logger.info(f"最终文本纠正: {text} -> {result}")
-            return result
+                            similarity_spans.append(make_span(word_pos - len(word) + shift, word, best_match,
+                                                              RULE_PINYIN, similarity))
+                            shift += len(best_match) - len(word)
+                            final_words.append(best_match)
+                            continue
+                    
+                    final_words.append(word)
             
-        except Exception as e:
-            logger.error(f"文本纠正失败: {str(e)}")
-            return text
+            current_pos = end_pos
+        
+        result = ''.join(final_words)
+        # 原词替换的位置按相似度替换的字数变化平移
+        return result, rebase_spans(spans, similarity_spans)
+
+    @staticmethod
+    def _replacement_spans(replaced_positions: set, replacements: List[Tuple[str, str]],
+                           text_len: int) -> List[Span]:
+        """原词替换在替换后文本中的位置：已替换的位置依次由各个目标词占据"""
+        spans = []
+        pending = iter(replacements)
+        position = 0
+        while position < text_len:
+            if position not in replaced_positions:
+                position += 1
+                continue
+            orig_word, target_word = next(pending)
+            if orig_word != target_word:
+                spans.append(make_span(position, orig_word, target_word, RULE_ORIGINAL))
+            position += len(target_word)
+        return spans
 
     def correct_recognition_result(self, recognition_result: Dict) -> Dict:
         """纠正识别结果中的文本
@@ -588,6 +864,7 @@ class TextCorrector:
         """
         try:
             start_time = time.time()
+            model = self.model  # 同一份识别结果的所有句子使用同一版本的纠错模型
             
             def extract_text(text: str) -> str:
                 """从带标记的文本中提取纯文本部分
@@ -611,24 +888,27 @@ class TextCorrector:
             
             # 处理每个句子片段
             all_text_parts = []
+            corrected_sentences = 0
+            corrections = 0
             if "sentence_info" in recognition_result[0]:
-                for segment in recognition_result[0]["sentence_info"]:
-                    if "sentence" in segment:
-                        # 提取纯文本并纠正
-                        text = extract_text(segment["sentence"])
-                        # 使用分词器进行分词和纠正
-                        if self._segmenter is None:
-                            logger.warning("分词器未初始化，使用原始文本处理方式")
-                            corrected_text = self._correct_text_without_segmenter(text)
-                        else:
-                            corrected_text = self.correct_text(text)
-                            
-                        # 替换原文本中的纯文本部分
-                        original_sentence = segment["sentence"]
-                        tags_end = original_sentence.find('>', original_sentence.rfind('<|')) + 1
-                        corrected_sentence = original_sentence[:tags_end] + corrected_text
-                        segment["sentence"] = corrected_sentence
-                        all_text_parts.append(corrected_sentence)
+                segments = [segment for segment in recognition_result[0]["sentence_info"] if "sentence" in segment]
+                # 提取纯文本
+                texts = [extract_text(segment["sentence"]) for segment in segments]
+                # 已缓存的句子直接取结果，其余句子较多时交给纠错进程池
+                results = self.correct_texts(texts, model)
+                    
+                for segment, (corrected_text, spans) in zip(segments, results):
+                    # 替换原文本中的纯文本部分
+                    original_sentence = segment["sentence"]
+                    tags_end = original_sentence.find('>', original_sentence.rfind('<|')) + 1
+                    corrected_sentence = original_sentence[:tags_end] + corrected_text
+                    segment["sentence"] = corrected_sentence
+                    if spans:
+                        # 偏移相对于纠正后的纯文本
+                        segment["corrections"] = [span_to_dict(span) for span in spans]
+                        corrected_sentences += 1
+                        corrections += len(spans)
+                    all_text_parts.append(corrected_sentence)
             
             # 使用处理后的句子重建总文本
             if all_text_parts:
@@ -637,7 +917,8 @@ class TextCorrector:
                 recognition_result[0]["text"] = combined_text
             
             end_time = time.time()
-            logger.info(f"语音识别文本纠正完成，总耗时: {(end_time - start_time)*1000:.2f}ms")
+            logger.info(f"语音识别文本纠正完成，纠正 {corrected_sentences} 句共 {corrections} 处，"
+                        f"总耗时: {(end_time - start_time)*1000:.2f}ms")
             return recognition_result
             
         except Exception as e:
@@ -0,0 +1,165 @@
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from pypinyin import pinyin, Style
+from ..logger import get_logger
+from ..utils import safe_read_json
+from .pinyin_index import syllable_similarity
+
+logger = get_logger(__name__)
+
+def _is_chinese(char: str) -> bool:
+    return '\u4e00' <= char <= '\u9fa5'
+
+class TranscriptIndex:
+    """已保存转写的倒排索引
+
+    以句子（某个文件的某个段落）为单位，记录 字 -> 句子编号。原词直接按字求交集再核对子串；
+    拼音相似的词通过字的全部读音（多音字取所有读音）估计相似度上限，只保留可能达到阈值的句子。
+    按文件修改时间增量更新，只重新读取变化过的文件。
+    """
+    def __init__(self, transcripts_dir: str):
+        self.transcripts_dir = transcripts_dir
+        self.sentences: Dict[int, Tuple[str, int, str]] = {}  # 句子编号 -> (file_id, 段落序号, 文本)
+        self._files: Dict[str, Tuple[int, List[int]]] = {}  # file_id -> (修改时间, 句子编号)
+        self._chars: Dict[str, Set[int]] = {}  # 字 -> 句子编号
+        self._readings: Dict[str, Tuple[str, ...]] = {}  # 汉字 -> 所有读音（TONE3）
+        self._syllable_chars: Dict[str, Set[str]] = {}  # 读音 -> 索引中出现过的汉字
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.sentences)
+
+    def _path_for(self, file_id: str) -> str:
+        return os.path.join(self.transcripts_dir, file_id, "original.json")
+
+    def refresh(self) -> int:
+        """重新索引新增和修改过的文件，移除已删除的文件
+
+        Returns:
+            int: 重新索引的文件数
+        """
+        current = {}
+        if os.path.isdir(self.transcripts_dir):
+            for file_id in os.listdir(self.transcripts_dir):
+                try:
+                    current[file_id] = os.stat(self._path_for(file_id)).st_mtime_ns
+                except OSError:
+                    continue
+        with self._lock:
+            for file_id in [f for f in self._files if f not in current]:
+                self._remove_file(file_id)
+        updated = 0
+        for file_id, mtime in current.items():
+            if self._files.get(file_id, (None,))[0] != mtime:
+                self.index_file(file_id, mtime)
+                updated += 1
+        return updated
+
+    def index_file(self, file_id: str, mtime: int = None):
+        """（重新）索引一个文件的所有段落"""
+        path = self._path_for(file_id)
+        if mtime is None:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                return
+        content = safe_read_json(path, {}) or {}
+        segments = (content.get("data") or {}).get("segments") or []
+        with self._lock:
+            self._remove_file(file_id)
+            ids = []
+            for position, segment in enumerate(segments):
+                text = segment.get("text") or ""
+                if not text:
+                    continue
+                sentence_id = self._next_id
+                self._next_id += 1
+                self.sentences[sentence_id] = (file_id, position, text)
+                for char in set(text):
+                    self._chars.setdefault(char, set()).add(sentence_id)
+                    if _is_chinese(char) and char not in self._readings:
+                        readings = tuple(pinyin(char, style=Style.TONE3, heteronym=True)[0])
+                        self._readings[char] = readings
+                        for reading in readings:
+                            self._syllable_chars.setdefault(reading, set()).add(char)
+                ids.append(sentence_id)
+            self._files[file_id] = (mtime, ids)
+
+    def _remove_file(self, file_id: str):
+        """调用方持有锁"""
+        _, ids = self._files.pop(file_id, (None, []))
+        for sentence_id in ids:
+            _, _, text = self.sentences.pop(sentence_id)
+            for char in set(text):
+                postings = self._chars.get(char)
+                if postings is not None:
+                    postings.discard(sentence_id)
+                    if not postings:
+                        del self._chars[char]
+
+    def containing(self, word: str) -> Set[int]:
+        """文本中含有 word 的句子"""
+        if not word:
+            return set()
+        with self._lock:
+            postings = sorted((self._chars.get(char, set()) for char in set(word)), key=len)
+            candidates = set.intersection(*postings) if postings else set()
+            return {i for i in candidates if word in self.sentences[i][2]}
+
+    def sounding_like(self, word: str, word_pinyin: Sequence[str], threshold: float,
+                      length_tolerance: int = 0) -> Optional[Set[int]]:
+        """可能含有与 word 拼音相似度达到阈值的词的句子
+
+        对每个音节位置，取句子中所有字（所有读音）与该音节的最高相似度，各位置之和达不到
+        n*t 的句子不可能含有匹配的词。只考虑相似度不低于 1 - (n+k)*(1-t) 的读音（k 为允许相差的
+        音节数），其余读音即使其他位置全部相同也不够。多字的匹配按 n+k 个音节计算相似度，
+        上述两个条件仍然成立；漏字的匹配要求 n*(1-t) >= 1，此时无法筛选。
+
+        Returns:
+            句子编号集合；无法用读音筛选（含非汉字、阈值太低）时返回 None，表示需要检查所有句子
+        """
+        syllables = len(word_pinyin)
+        if not syllables or syllables != len(word) or not all(_is_chinese(c) for c in word):
+            return None
+        # 减去很小的余量，避免浮点误差把恰好等于阈值的句子筛掉
+        bound = 1 - (syllables + length_tolerance) * (1 - threshold) - 1e-9
+        if bound <= 0:
+            return None
+        with self._lock:
+            totals: Optional[Dict[int, float]] = None  # 句子 -> 各位置最高相似度之和
+            for target_syllable in word_pinyin:
+                char_scores: Dict[str, float] = {}
+                for reading, reading_chars in self._syllable_chars.items():
+                    score = syllable_similarity(reading, target_syllable)
+                    if score >= bound:
+                        for char in reading_chars:
+                            char_scores[char] = max(score, char_scores.get(char, 0.0))
+                best: Dict[int, float] = {}
+                for char, score in char_scores.items():
+                    for sentence_id in self._chars.get(char, ()):
+                        if score > best.get(sentence_id, 0.0):
+                            best[sentence_id] = score
+                if totals is None:
+                    totals = best
+                else:
+                    totals = {i: total + best[i] for i, total in totals.items() if i in best}
+                if not totals:
+                    return set()
+            required = syllables * threshold - 1e-9
+            return {i for i, total in totals.items()
+                    if total >= required and len(self.sentences[i][2]) >= syllables - length_tolerance}
+
+    def all_sentences(self) -> Set[int]:
+        with self._lock:
+            return set(self.sentences)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "sentences": len(self.sentences),
+                "chars": len(self._chars),
+                "syllables": len(self._syllable_chars)
+            }
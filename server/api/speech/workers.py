@@ -0,0 +1,381 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import psutil
+from ..logger import get_logger
+from .config import speech_config
+
+logger = get_logger(__name__)
+
+SAMPLES_PER_MS = 16  # 16kHz
+
+def init_worker(threads: int):
+    """识别进程初始化：设置本进程的线程预算并加载模型"""
+    speech_config.model_threads = threads
+    _get_model()
+    logger.info(f"识别进程已就绪，线程数: {threads}")
+
+class WorkerError(Exception):
+    """识别进程执行任务失败"""
+    pass
+
+class WorkerCrashedError(WorkerError):
+    """识别进程在执行任务时异常退出"""
+    pass
+
+def _worker_main(conn, threads: int):
+    """识别进程主循环：逐个接收 (函数, 参数) 执行并回传结果"""
+    try:
+        init_worker(threads)
+    except Exception as e:
+        conn.send(("error", f"模型加载失败: {type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        func, args = message
+        try:
+            conn.send(("ok", func(*args)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+def _get_model():
+    # 延迟导入：主进程导入本模块时不加载模型
+    from .models import model
+    return model
+
+def load_pcm(pcm_path: str, start_ms: int = None, end_ms: int = None) -> np.ndarray:
+    """从PCM缓存文件取出音频
+
+    指定时间范围时只把该片段从内存映射复制到本进程；不指定时返回整个文件的写时复制映射，
+    不复制数据（3 小时录音约 690MB），各进程共享同一份页缓存，写入也不会改动缓存文件。
+    """
+    if start_ms is None:
+        return np.load(pcm_path, mmap_mode='c')
+    speech = np.load(pcm_path, mmap_mode='r')
+    return np.array(speech[start_ms * SAMPLES_PER_MS:end_ms * SAMPLES_PER_MS])
+
+def recognize_window(pcm_path: str, start_ms: int, end_ms: int, language: str, with_embeddings: bool = False
+                     ) -> Tuple[List[Dict], Optional[Dict[int, Tuple[np.ndarray, float]]]]:
+    """识别一个窗口的音频
+
+    既可以在主进程内直接调用，也可以提交到模型进程池执行。各进程直接映射同一个
+    PCM缓存文件，进程间只传递路径和时间范围。不在这里纠正文本：各窗口拼接后，
+    全部句子一次纠正，句子多时才能分块交给纠错进程池。
+
+    Args:
+        pcm_path: PCM缓存文件路径（16kHz单声道 float32 .npy）
+        start_ms: 窗口开始时间（毫秒）
+        end_ms: 窗口结束时间（毫秒）
+        language: 目标语言
+        with_embeddings: 是否同时提取窗口内每个说话人的声纹，用于跨窗口对齐
+
+    Returns:
+        (窗口时间轴上的句子, {本地说话人编号: (声纹向量, 语音时长秒)} 或 None)
+    """
+    model = _get_model()
+    window = load_pcm(pcm_path, start_ms, end_ms)
+    res = model.generate(
+        input=window,
+        language=language,  # 语言参数默认中文
+    )
+    if not res or not res[0].get("sentence_info"):
+        return [], None
+
+    sentences = res[0]["sentence_info"]
+    embeddings = speaker_embeddings(model, window, sentences) if with_embeddings else None
+    return sentences, embeddings
+
+def detect_speech(pcm_path: str) -> List[List[int]]:
+    """VAD检测语音段，返回 [[开始毫秒, 结束毫秒], ...]
+
+    直接把整个文件的内存映射交给VAD模型，不复制到本进程。
+    """
+    model = _get_model()
+    vad_res = model.inference(load_pcm(pcm_path), model=model.vad_model, kwargs=model.vad_kwargs)
+    return vad_res[0]["value"] if vad_res else []
+
+def stream_vad(pcm: np.ndarray, cache: Dict, is_final: bool, chunk_ms: int) -> Tuple[List[List[int]], Dict]:
+    """实时识别：一块音频的流式 VAD
+
+    VAD 状态由调用方保存，随每次调用传入并返回更新后的状态；进程池启用时同一路音频流的
+    各块可以由不同进程处理。
+
+    Returns:
+        (本块内的语音端点, 更新后的 VAD 状态)
+    """
+    model = _get_model()
+    # 不共享模型默认参数中的 cache，避免多路音频流互相干扰
+    kwargs = {key: value for key, value in model.vad_kwargs.items() if key != "cache"}
+    res = model.inference(pcm, model=model.vad_model, kwargs=kwargs, cache=cache,
+                          is_final=is_final, chunk_size=chunk_ms)
+    return (res[0]["value"] if res else []), cache
+
+def recognize_segment(segment: np.ndarray, language: str) -> str:
+    """实时识别：识别一段语音，不经过 VAD 和说话人分离，也不纠正文本"""
+    from funasr.utils.postprocess_utils import rich_transcription_postprocess
+    model = _get_model()
+    kwargs = {key: value for key, value in model.kwargs.items() if key != "cache"}
+    res = model.inference(segment, model=model.model, kwargs=kwargs, language=language, cache={})
+    return rich_transcription_postprocess(res[0]["text"]) if res else ""
+
+def speaker_embeddings(model, window: np.ndarray, sentences: List[Dict]) -> Dict[int, Tuple[np.ndarray, float]]:
+    """提取窗口内每个说话人的平均声纹，取其最长的几段语音"""
+    grouped = {}
+    for sentence in sentences:
+        grouped.setdefault(sentence["spk"], []).append(sentence)
+
+    embeddings = {}
+    for spk, items in grouped.items():
+        duration = sum(s["end"] - s["start"] for s in items) / 1000
+        longest = sorted(items, key=lambda s: s["end"] - s["start"], reverse=True)[:3]
+        clips = [
+            window[int(s["start"]) * SAMPLES_PER_MS:int(min(s["end"], s["start"] + 10000)) * SAMPLES_PER_MS]
+            for s in longest
+        ]
+        res = model.inference(clips, model=model.spk_model, kwargs=model.spk_kwargs)
+        vectors = [r["spk_embedding"].detach().cpu().numpy().reshape(-1) for r in res]
+        embeddings[spk] = (np.mean(vectors, axis=0), duration)
+    return embeddings
+
+class ModelWorker:
+    """模型进程池中的一个进程
+
+    主进程中对应一个调度线程，从共享任务队列取任务，通过管道交给自己的进程执行，
+    空闲的进程先取到任务，从而自然地负载均衡。进程异常退出后在下一个任务前重启。
+    """
+    def __init__(self, index: int, threads: int, tasks: queue.Queue):
+        self.index = index
+        self.threads = threads
+        self.state = "starting"
+        self.pid = None
+        self.tasks_completed = 0
+        self.tasks_failed = 0
+        self.restarts = 0
+        self.busy_seconds = 0.0
+        self.current_task = None
+        self.task_started_at = None
+        self.started_at = time.time()
+        self._tasks = tasks
+        self._process = None
+        self._conn = None
+        self._thread = threading.Thread(target=self._loop, name=f"model-worker-{index}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _spawn(self):
+        """启动进程并等待模型加载完成"""
+        context = multiprocessing.get_context("spawn")  # 避免 fork 已初始化的 torch 线程池
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=_worker_main,
+            args=(child_conn, self.threads),
+            name=f"model-worker-{self.index}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self._process, self._conn = process, parent_conn
+        try:
+            status, payload = parent_conn.recv()
+        except EOFError:
+            status, payload = "error", "进程启动后立即退出"
+        if status != "ready":
+            self._terminate()
+            raise WorkerError(payload)
+        self.pid = payload
+        logger.info(f"模型进程 {self.index} 已就绪, pid: {self.pid}, 线程数: {self.threads}")
+
+    def _terminate(self):
+        if self._process is not None and self._process.is_alive():
+            self._process.kill()
+        self._process, self._conn, self.pid = None, None, None
+
+    def _ensure_process(self):
+        if self._process is not None and self._process.is_alive():
+            return
+        if self._process is not None or self.state == "crashed":
+            self.restarts += 1
+            logger.warning(f"模型进程 {self.index} 已退出，正在重启")
+            self._terminate()
+        self.state = "starting"
+        try:
+            self._spawn()
+        except Exception as e:
+            self.state = "failed"
+            logger.error(f"模型进程 {self.index} 启动失败: {str(e)}")
+            raise
+        self.state = "idle"
+
+    def _loop(self):
+        try:
+            self._ensure_process()
+        except Exception:
+            pass  # 下一个任务到来时再次尝试启动
+
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            future, func, args = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._ensure_process()
+            except Exception as e:
+                future.set_exception(WorkerError(f"模型进程启动失败: {str(e)}"))
+                continue
+            self._run(future, func, args)
+
+        if self._conn is not None:
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+        self.state = "stopped"
+
+    def _run(self, future: Future, func: Callable, args: tuple):
+        self.state = "busy"
+        self.current_task = func.__name__
+        self.task_started_at = time.perf_counter()
+        try:
+            self._conn.send((func, args))
+            status, payload = self._conn.recv()
+        except (EOFError, OSError) as e:
+            self.tasks_failed += 1
+            self._terminate()
+            self.state = "crashed"
+            future.set_exception(WorkerCrashedError(f"模型进程 {self.index} 异常退出: {str(e) or type(e).__name__}"))
+        else:
+            if status == "ok":
+                self.tasks_completed += 1
+                future.set_result(payload)
+            else:
+                self.tasks_failed += 1
+                future.set_exception(WorkerError(payload))
+        finally:
+            self.busy_seconds += time.perf_counter() - self.task_started_at
+            self.current_task = None
+            self.task_started_at = None
+            if self.state == "busy":
+                self.state = "idle"
+
+    def to_dict(self) -> Dict:
+        """进程状态和利用率（忙碌时间占运行时间的比例）"""
+        busy_seconds = self.busy_seconds
+        current_seconds = None
+        if self.task_started_at is not None:
+            current_seconds = time.perf_counter() - self.task_started_at
+            busy_seconds += current_seconds
+        uptime = max(time.time() - self.started_at, 1e-6)
+        return {
+            "index": self.index,
+            "pid": self.pid,
+            "state": self.state,
+            "threads": self.threads,
+            "tasks_completed": self.tasks_completed,
+            "tasks_failed": self.tasks_failed,
+            "restarts": self.restarts,
+            "busy_seconds": round(busy_seconds, 2),
+            "utilization": round(min(busy_seconds / uptime, 1.0), 3),
+            "current_task": self.current_task,
+            "current_task_seconds": round(current_seconds, 2) if current_seconds is not None else None,
+        }
+
+class ModelWorkerPool:
+    """模型进程池
+
+    每个进程独立加载一份模型并使用固定的线程预算（例如16核机器上4进程×4线程），
+    识别任务把窗口识别、VAD等模型调用通过 submit 分发到空闲进程执行。
+    进程数为0时不启用，模型加载在当前进程内，submit 在调用线程内同步执行；
+    识别任务和实时识别共用这一份模型，模型调用逐个进行。
+    """
+    def __init__(self, workers: int = None, threads_per_worker: int = None):
+        self.workers = speech_config.parallel_workers if workers is None else workers
+        self.threads_per_worker = threads_per_worker or speech_config.parallel_worker_threads
+        self._tasks: queue.Queue = queue.Queue()
+        self._workers: List[ModelWorker] = []
+        self._lock = threading.Lock()
+        self._inline_lock = threading.Lock()  # 未启用时串行执行当前进程内的模型调用
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _thread_budget(self) -> int:
+        """每个进程的线程数，默认把物理核心平均分给各进程"""
+        if self.threads_per_worker:
+            return self.threads_per_worker
+        physical_cores = psutil.cpu_count(logical=False) or 1
+        return max(1, physical_cores // self.workers)
+
+    def start(self):
+        """启动进程池；未启用时在当前进程内加载模型
+
+        在子进程（模型进程、纠错进程）中不执行任何操作：spawn 子进程会重新导入主模块，
+        纠错进程只做拼音匹配，不应为此加载识别模型或再启动进程池。
+        """
+        if multiprocessing.parent_process() is not None:
+            return
+        if not self.enabled:
+            _get_model()
+            return
+        with self._lock:
+            if self._workers:
+                return
+            threads = self._thread_budget()
+            self._workers = [ModelWorker(i, threads, self._tasks) for i in range(self.workers)]
+            for worker in self._workers:
+                worker.start()
+        logger.info(f"模型进程池已启动: {self.workers} 个进程, 每个进程 {threads} 线程")
+
+    def submit(self, func: Callable, *args) -> Future:
+        """提交一次模型调用，func 必须是可在子进程中导入的模块级函数"""
+        if not self.enabled:
+            future = Future()
+            try:
+                with self._inline_lock:
+                    future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self.start()
+        future = Future()
+        self._tasks.put((future, func, args))
+        return future
+
+    def call(self, func: Callable, *args):
+        """提交并等待结果"""
+        return self.submit(func, *args).result()
+
+    def get_stats(self) -> Dict:
+        """获取进程池状态和每个进程的利用率"""
+        with self._lock:
+            workers = list(self._workers)
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "threads_per_worker": self._thread_budget() if self.enabled else speech_config.model_threads,
+            "pending_tasks": self._tasks.qsize(),
+            "items": [worker.to_dict() for worker in workers],
+        }
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._tasks.put(None)
+
+# 创建全局实例
+model_pool = ModelWorkerPool()
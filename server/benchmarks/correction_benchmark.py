@@ -0,0 +1,326 @@
+"""文本纠错性能基准
+
+生成 1k/10k/100k 条目的合成 keywords（含原词、阈值和上下文词）以及合成转写句子，
+在临时目录中构建独立的 TextCorrector，测量：
+
+- 构建：首次编译（解析 keywords、生成拼音和 yaml、编译索引）、从编译文件加载、分词器初始化的耗时，
+  以及编译文件大小和构建前后的进程内存
+- 纠错：每秒句子数、单句延迟 p50/p99（不使用结果缓存），以及所有句子都命中结果缓存时的每秒句子数
+- 召回：句子中插入的原词和近音误识别被纠正为对应目标词的比例，用于比较不同分词方式
+
+在 server 目录下运行：
+
+    python -m benchmarks.correction_benchmark --sizes 1000 10000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.correction_benchmark --baseline benchmarks/baseline.json
+    python -m benchmarks.correction_benchmark --sizes 10000 --segmenter dag
+    python -m benchmarks.correction_benchmark --sizes 10000 --segmenter trie --baseline benchmarks/pkuseg.json
+    python -m benchmarks.correction_benchmark --sizes 1000 10000 --segmenter trie --compare-segmenter pkuseg
+
+指定 --baseline 时逐项与基线比较，任一指标变差超过 --tolerance 时以非零状态退出。
+指定 --compare-segmenter 时用同样的词表和句子再以该分词方式运行一遍，并排输出速度和召回，不判定退化。
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+import psutil
+from pypinyin import lazy_pinyin
+
+# 常用汉字，用于生成目标词、原词和填充文本
+CHARS = (
+    "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所"
+    "民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那"
+    "社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通"
+    "并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区"
+    "强放决西被干做必战先回则任取据处队南给色光门即保治北造百规热领七海口东导器压志世金增争济阶油思术极交受联什认六共权收证改清"
+)
+FILLER = "我们今天讨论一下这个问题然后大家都觉得应该继续往前推进所以需要再看看具体的安排"
+
+class SyntheticData:
+    """可复现的合成词表和句子"""
+    def __init__(self, size: int, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.size = size
+        self.by_syllable: Dict[str, List[str]] = {}
+        for char in CHARS:
+            self.by_syllable.setdefault(lazy_pinyin(char)[0], []).append(char)
+        self.entries = self._generate_entries()
+
+    def _word(self, length: int) -> str:
+        return ''.join(self.rng.choice(CHARS) for _ in range(length))
+
+    def _sound_alike(self, word: str) -> Optional[str]:
+        """把一个字换成同音（不计声调）的其他字，模拟识别错误"""
+        positions = list(range(len(word)))
+        self.rng.shuffle(positions)
+        for position in positions:
+            choices = [c for c in self.by_syllable[lazy_pinyin(word[position])[0]] if c != word[position]]
+            if choices:
+                return word[:position] + self.rng.choice(choices) + word[position + 1:]
+        return None
+
+    def _generate_entries(self) -> List[Dict]:
+        entries = []
+        seen = set()
+        while len(entries) < self.size:
+            word = self._word(self.rng.choice([2, 2, 3, 3, 4]))
+            if word in seen:
+                continue
+            seen.add(word)
+            entry = {"word": word, "threshold": None, "original": [], "context": []}
+            if self.rng.random() < 0.3:
+                entry["threshold"] = self.rng.choice([0.7, 0.8, 0.85])
+            if self.rng.random() < 0.4:
+                entry["original"] = [self._word(len(word)) for _ in range(self.rng.randint(1, 2))]
+            if self.rng.random() < 0.1:
+                entry["context"] = [self._word(2) for _ in range(self.rng.randint(1, 2))]
+            entries.append(entry)
+        return entries
+
+    def keywords(self) -> str:
+        lines = ["# 合成基准词表"]
+        for entry in self.entries:
+            line = entry["word"]
+            if entry["threshold"] is not None:
+                line += f" {entry['threshold']}"
+            if entry["original"]:
+                line += " " + ",".join(entry["original"])
+            if entry["context"]:
+                line += "(" + ",".join(entry["context"]) + ")"
+            lines.append(line)
+        return "\n".join(lines) + "\n"
+
+    def sentences(self, count: int) -> List[str]:
+        return [sentence for sentence, _ in self.labelled_sentences(count)]
+
+    def labelled_sentences(self, count: int) -> List[Tuple[str, List[str]]]:
+        """每句由填充文本和 0-3 个热词片段（目标词、原词、近音误识别、上下文词）组成
+
+        Returns:
+            [(句子, 应当纠正出的目标词), ...]；目标词有上下文要求但句中没有上下文词时不计入
+        """
+        sentences = []
+        for _ in range(count):
+            parts = []
+            expected = []
+            for _ in range(self.rng.randint(0, 3)):
+                start = self.rng.randrange(len(FILLER) - 6)
+                parts.append(FILLER[start:start + self.rng.randint(2, 6)])
+                entry = self.rng.choice(self.entries)
+                kind = self.rng.random()
+                if kind < 0.3 and entry["original"]:
+                    fragment = self.rng.choice(entry["original"])
+                elif kind < 0.7:
+                    fragment = self._sound_alike(entry["word"]) or entry["word"]
+                else:
+                    fragment = entry["word"]
+                parts.append(fragment)
+                has_context = bool(entry["context"]) and self.rng.random() < 0.5
+                if has_context:
+                    parts.append(self.rng.choice(entry["context"]))
+                if fragment != entry["word"] and (has_context or not entry["context"]):
+                    expected.append(entry["word"])
+            start = self.rng.randrange(len(FILLER) - 10)
+            parts.append(FILLER[start:start + self.rng.randint(4, 10)])
+            sentences.append((''.join(parts) + "。", expected))
+        return sentences
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def rss_mb() -> float:
+    return psutil.Process().memory_info().rss / 1024 ** 2
+
+def run_size(size: int, sentence_count: int, seed: int, segmenter: str = None) -> Dict:
+    from api.speech.text_correction import TextCorrector
+
+    data = SyntheticData(size, seed)
+    labelled = data.labelled_sentences(sentence_count)
+    sentences = [sentence for sentence, _ in labelled]
+    with tempfile.TemporaryDirectory(prefix="correction_bench_") as base_dir:
+        with open(os.path.join(base_dir, "keywords"), "w", encoding="utf-8") as f:
+            f.write(data.keywords())
+
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        corrector = TextCorrector(base_dir=base_dir, segmenter_backend=segmenter)  # 首次编译
+        init_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        if corrector.get_segmenter() is None:
+            raise RuntimeError(f"分词器初始化失败: {corrector.model.segmenter_error}")
+        segmenter_seconds = time.perf_counter() - start
+        rss_after = rss_mb()
+
+        # 删除编译文件和 yaml 后重新编译，测量冷启动编译耗时
+        os.remove(corrector.model_file)
+        os.remove(corrector.config_file)
+        corrector.pinyin_cache.clear()
+        start = time.perf_counter()
+        corrector._build_model()
+        compile_seconds = time.perf_counter() - start
+
+        # keywords 未变化时直接加载编译文件
+        start = time.perf_counter()
+        model = corrector._build_model()
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        type(model)(model.version, model.target_words, model.dict_words)
+        index_seconds = time.perf_counter() - start
+
+        # 预热一轮，避免首次调用的导入和缓存开销计入延迟
+        for text in sentences[:50]:
+            corrector.correct_text(text)
+        corrector.correction_cache.clear()
+        cache_size = corrector.correction_cache.max_size
+        corrector.correction_cache.max_size = 0  # 测量纠错本身时不使用结果缓存
+        latencies = []
+        corrected = 0
+        expected = found = 0
+        start = time.perf_counter()
+        for text, targets in labelled:
+            t = time.perf_counter()
+            result = corrector.correct_text(text)
+            latencies.append(time.perf_counter() - t)
+            if result != text:
+                corrected += 1
+            expected += len(targets)
+            found += sum(1 for target in targets if target in result)
+        total_seconds = time.perf_counter() - start
+
+        # 结果缓存：先填充，再测量全部命中时的速度
+        corrector.correction_cache.max_size = cache_size
+        corrector.correct_texts(sentences)
+        start = time.perf_counter()
+        for text in sentences:
+            corrector.correct_text(text)
+        cached_seconds = time.perf_counter() - start
+
+        return {
+            "entries": size,
+            "segmenter": corrector.segmenter_backend,
+            "length_tolerance": corrector.length_tolerance,
+            "sentences": len(sentences),
+            "corrected_sentences": corrected,
+            "recall": round(found / expected, 4) if expected else 1.0,
+            "init_seconds": round(init_seconds, 4),
+            "segmenter_init_seconds": round(segmenter_seconds, 4),
+            "compile_seconds": round(compile_seconds, 4),
+            "artifact_load_seconds": round(load_seconds, 4),
+            "index_build_seconds": round(index_seconds, 4),
+            "artifact_bytes": os.path.getsize(corrector.model_file),
+            "rss_delta_mb": round(rss_after - rss_before, 1),
+            "sentences_per_second": round(len(sentences) / total_seconds, 1),
+            "cached_sentences_per_second": round(len(sentences) / cached_seconds, 1),
+            "latency_p50_ms": round(percentile(latencies, 0.5) * 1000, 4),
+            "latency_p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        }
+
+# 指标的方向：True 表示越大越好
+HIGHER_IS_BETTER = {"sentences_per_second": True, "cached_sentences_per_second": True, "recall": True}
+COMPARED_METRICS = ["recall", "init_seconds", "segmenter_init_seconds", "compile_seconds", "artifact_load_seconds",
+                    "index_build_seconds", "sentences_per_second", "cached_sentences_per_second",
+                    "latency_p50_ms", "latency_p99_ms", "rss_delta_mb"]
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> bool:
+    """打印与基线的对比，返回是否有指标退化"""
+    regressed = False
+    for size, current in results.items():
+        base = baseline.get("results", {}).get(size)
+        if not base:
+            print(f"[{size}] 基线中没有该规模，跳过比较")
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = base.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            ratio = new / old
+            worse = ratio < 1 - tolerance if HIGHER_IS_BETTER.get(metric) else ratio > 1 + tolerance
+            regressed |= worse
+            flag = "  <-- 退化" if worse else ""
+            print(f"[{size:>6}] {metric:<24} 基线 {old:>12} 当前 {new:>12} ({ratio:6.2f}x){flag}")
+    return regressed
+
+# 分词方式对比时输出的指标
+SEGMENTER_METRICS = ["recall", "corrected_sentences", "sentences_per_second", "latency_p50_ms", "latency_p99_ms",
+                     "segmenter_init_seconds", "rss_delta_mb"]
+
+def compare_segmenters(results: Dict, reference: Dict):
+    """并排打印两种分词方式在同一份数据上的指标"""
+    for size, current in results.items():
+        other = reference[size]
+        print(f"[{size:>6}] {'指标':<24} {other['segmenter']:>12} {current['segmenter']:>12}")
+        for metric in SEGMENTER_METRICS:
+            old, new = other.get(metric), current.get(metric)
+            ratio = f"({new / old:6.2f}x)" if old else ""
+            print(f"[{size:>6}] {metric:<24} {old:>12} {new:>12} {ratio}")
+
+def main():
+    parser = argparse.ArgumentParser(description="文本纠错性能基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="词表条目数")
+    parser.add_argument("--sentences", type=int, default=2000, help="每个规模纠正的句子数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--segmenter", choices=["pkuseg", "dag", "window", "trie"], help="分词方式，默认使用配置中的值")
+    parser.add_argument("--length-tolerance", type=int, help="允许相差的音节数，默认使用配置中的值，0 表示只匹配音节数相同的目标词")
+    parser.add_argument("--compare-segmenter", choices=["pkuseg", "dag", "window", "trie"],
+                        help="用同样的数据再以该分词方式运行一遍并对比，例如 --segmenter trie --compare-segmenter pkuseg")
+    parser.add_argument("--save-baseline", help="把结果保存为基线 JSON")
+    parser.add_argument("--baseline", help="与基线 JSON 比较")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的退化比例")
+    parser.add_argument("--log-level", default="WARNING", help="纠错日志级别，INFO 时计入逐条替换日志的开销")
+    args = parser.parse_args()
+
+    from api.logger import Logger
+    from api.speech.config import speech_config
+    Logger.setup()
+    logging.getLogger().setLevel(args.log_level)
+    if args.length_tolerance is not None:
+        speech_config.similarity_length_tolerance = args.length_tolerance
+
+    results = {}
+    for size in args.sizes:
+        print(f"运行规模 {size} ...", flush=True)
+        results[str(size)] = run_size(size, args.sentences, args.seed, args.segmenter)
+        print(json.dumps(results[str(size)], ensure_ascii=False, indent=2), flush=True)
+    reference = {}
+    if args.compare_segmenter:
+        for size in args.sizes:
+            print(f"运行规模 {size}（{args.compare_segmenter}）...", flush=True)
+            reference[str(size)] = run_size(size, args.sentences, args.seed, args.compare_segmenter)
+        compare_segmenters(results, reference)
+
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "segmenter": args.segmenter,
+            "length_tolerance": speech_config.similarity_length_tolerance,
+            "sentences": args.sentences,
+            "log_level": args.log_level,
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+    if reference:
+        report["comparison"] = {"segmenter": args.compare_segmenter, "results": reference}
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存: {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import os
+import shutil
+import tempfile
+
+# 导入 text_correction 时全局纠错器会编译模型，编译文件写到临时目录，不写入 storage；
+# 通过环境变量传给纠错进程等 spawn 子进程
+_compiled_dir = tempfile.mkdtemp(prefix="correction_compiled_")
+os.environ["CORRECTION_COMPILED_DIR"] = _compiled_dir
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_compiled_dir, ignore_errors=True)
@@ -0,0 +1,88 @@
+import random
+from api.speech.aho_corasick import AhoCorasick, ContextMatcher, OriginalWordReplacer
+
+def brute_force_longest_leftmost(patterns, text):
+    matches = []
+    position = 0
+    while position < len(text):
+        found = [p for p in patterns if p and text.startswith(p, position)]
+        if found:
+            pattern = max(found, key=len)
+            matches.append((position, position + len(pattern), patterns.index(pattern)))
+            position += len(pattern)
+        else:
+            position += 1
+    return matches
+
+class TestAhoCorasick:
+    def test_all_matches(self):
+        automaton = AhoCorasick(["he", "she", "his", "hers"])
+        matches = sorted(automaton.iter_matches("ushers"))
+        assert matches == [(1, 1), (2, 0), (2, 3)]
+
+    def test_longest_leftmost(self):
+        automaton = AhoCorasick(["第一", "第一名", "一名"])
+        assert automaton.find_longest_leftmost("他是第一名") == [(2, 5, 1)]
+
+    def test_matches_brute_force(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            patterns = list({''.join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(6)})
+            text = ''.join(rng.choice("abcd") for _ in range(30))
+            automaton = AhoCorasick(patterns)
+            assert automaton.find_longest_leftmost(text) == brute_force_longest_leftmost(patterns, text)
+
+class TestOriginalWordReplacer:
+    TARGET_WORDS = {
+        "第一灵": ([], [], 0.9, ["第一名", "第1名"]),
+        "灵体": ([], ["修炼"], 0.9, ["林提"]),
+        "心智": ([], [], 0.9, ["心智"]),
+    }
+
+    def test_replace_and_positions(self):
+        replacer = OriginalWordReplacer(self.TARGET_WORDS)
+        text, positions, replacements = replacer.replace("他得了第1名和第一名")
+        assert text == "他得了第一灵和第一灵"
+        assert positions == {3, 4, 5, 7, 8, 9}
+        assert replacements == [("第1名", "第一灵"), ("第一名", "第一灵")]
+
+    def test_context_required(self):
+        replacer = OriginalWordReplacer(self.TARGET_WORDS)
+        assert replacer.replace("这个林提很特别")[0] == "这个林提很特别"
+        assert replacer.replace("修炼中的林提")[0] == "修炼中的灵体"
+
+    def test_identity_words_are_protected(self):
+        """原词与目标词相同的词条不改变文本，但占据的位置不再参与相似度匹配"""
+        replacer = OriginalWordReplacer(self.TARGET_WORDS)
+        text, positions, replacements = replacer.replace("心智控制")
+        assert text == "心智控制"
+        assert positions == {0, 1}
+        assert replacements == [("心智", "心智")]
+
+    def test_empty_dictionary(self):
+        assert OriginalWordReplacer({}).replace("任意文本") == ("任意文本", set(), [])
+
+class TestContextMatcher:
+    def test_same_as_substring_search(self):
+        rng = random.Random(3)
+        target_words = {}
+        for i in range(30):
+            context_words = [''.join(rng.choice("甲乙丙丁") for _ in range(rng.randint(1, 3)))
+                             for _ in range(rng.randint(0, 3))]
+            target_words[f"目标{i}"] = ([], context_words, 0.9, [])
+        target_words["任意"] = ([], ["", "甲"], 0.9, [])  # 空上下文词在任何句子中都出现
+        matcher = ContextMatcher(target_words)
+        for _ in range(200):
+            text = ''.join(rng.choice("甲乙丙丁戊") for _ in range(rng.randint(0, 12)))
+            present = matcher.scan(text)
+            for target_word, (_, context_words, _, _) in target_words.items():
+                expected = not context_words or any(w in text for w in context_words)
+                assert matcher.allows(target_word, present) == expected
+
+    def test_shared_with_replacer(self):
+        target_words = {"灵体": ([], ["修炼"], 0.9, ["林提"])}
+        matcher = ContextMatcher(target_words)
+        replacer = OriginalWordReplacer(target_words, matcher)
+        assert replacer.context is matcher
+        present = matcher.scan("修炼中的林提")
+        assert replacer.replace("林提", present)[0] == "灵体"
@@ -0,0 +1,40 @@
+import shutil
+import wave
+import numpy as np
+import pytest
+from api.speech.audio_utils import AudioConverter
+
+pytestmark = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="需要 ffmpeg")
+
+@pytest.fixture
+def stereo_wav(tmp_path):
+    """生成2秒 44.1kHz 双声道 WAV"""
+    path = tmp_path / "stereo.wav"
+    t = np.arange(44100 * 2) / 44100
+    tone = (np.sin(2 * np.pi * 440 * t) * 16000).astype('<i2')
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(44100)
+        f.writeframes(np.repeat(tone, 2).tobytes())
+    return path
+
+class TestDecodeToArray:
+    def test_resample_and_downmix(self, stereo_wav):
+        speech = AudioConverter.decode_to_array(str(stereo_wav), duration=2)
+        assert speech.dtype == np.float32
+        assert abs(len(speech) - 32000) <= 16
+        assert 0.4 < np.abs(speech).max() <= 0.5
+
+    def test_bytes_input_and_buffer_growth(self, stereo_wav, monkeypatch):
+        """时长未知且缓冲区不足时自动扩容"""
+        monkeypatch.setattr(AudioConverter, "DECODE_CHUNK_BYTES", 4097)
+        from_path = AudioConverter.decode_to_array(str(stereo_wav), duration=0.1)
+        from_bytes = AudioConverter.decode_to_array(stereo_wav.read_bytes())
+        assert np.array_equal(from_path, from_bytes)
+
+    def test_invalid_input(self, tmp_path):
+        bad = tmp_path / "bad.mp3"
+        bad.write_bytes(b"not audio")
+        with pytest.raises(RuntimeError):
+            AudioConverter.decode_to_array(str(bad))
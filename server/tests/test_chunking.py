@@ -0,0 +1,93 @@
+import numpy as np
+import queue
+import threading
+import time
+from api.speech.chunking import plan_windows, shift_sentences
+from api.speech.speakers import SpeakerRegistry
+from api.speech.workers import ModelWorker, ModelWorkerPool
+
+class TestPlanWindows:
+    def test_short_audio_single_window(self):
+        assert plan_windows([[0, 1000], [2000, 3000]], 4000, 10000) == [(0, 4000)]
+
+    def test_boundaries_in_silence(self):
+        """窗口边界落在两段语音之间的静音中点"""
+        segments = [[0, 4000], [5000, 9000], [10000, 14000], [16000, 19000]]
+        windows = plan_windows(segments, 20000, 4000)
+        assert windows == [(0, 4500), (4500, 9500), (9500, 15000), (15000, 20000)]
+        # 没有语音段被切断
+        for seg_start, seg_end in segments:
+            assert any(start <= seg_start and seg_end <= end for start, end in windows)
+
+    def test_shift_sentences(self):
+        sentences = [{"start": 100, "end": 900, "timestamp": [[100, 500], [500, 900]], "spk": 1}]
+        shift_sentences(sentences, 60000, {1: 0})
+        assert sentences[0]["start"] == 60100
+        assert sentences[0]["timestamp"] == [[60100, 60500], [60500, 60900]]
+        assert sentences[0]["spk"] == 0
+
+class TestSpeakerRegistry:
+    def test_matches_speakers_across_windows(self):
+        rng = np.random.default_rng(0)
+        voice_a, voice_b = rng.normal(size=192), rng.normal(size=192)
+        registry = SpeakerRegistry(threshold=0.6)
+
+        first = registry.assign({0: (voice_a, 30.0), 1: (voice_b, 20.0)})
+        assert first == {0: 0, 1: 1}
+
+        # 第二个窗口中本地编号与第一个窗口相反
+        second = registry.assign({
+            0: (voice_b + rng.normal(scale=0.1, size=192), 10.0),
+            1: (voice_a + rng.normal(scale=0.1, size=192), 10.0)
+        })
+        assert second == {0: 1, 1: 0}
+
+    def test_new_speaker_registered(self):
+        rng = np.random.default_rng(1)
+        registry = SpeakerRegistry(threshold=0.6)
+        registry.assign({0: (rng.normal(size=192), 10.0)})
+        assert registry.assign({0: (rng.normal(size=192), 10.0)}) == {0: 1}
+
+def fail(message):
+    raise ValueError(message)
+
+class TestModelWorkerPool:
+    def test_disabled_runs_inline(self):
+        """未启用进程池时在调用线程内同步执行"""
+        pool = ModelWorkerPool(workers=0)
+        assert not pool.enabled
+        assert pool.call(max, 1, 3) == 3
+        future = pool.submit(fail, "模型错误")
+        assert isinstance(future.exception(), ValueError)
+        assert pool.get_stats()["items"] == []
+
+    def test_disabled_calls_serialized(self):
+        """未启用进程池时，识别任务和实时识别等多个线程的模型调用逐个执行"""
+        pool = ModelWorkerPool(workers=0)
+        running, overlaps = [], []
+
+        def model_call():
+            running.append(1)
+            overlaps.append(len(running))
+            time.sleep(0.02)
+            running.pop()
+
+        threads = [threading.Thread(target=pool.call, args=(model_call,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert overlaps == [1, 1, 1, 1]
+
+    def test_thread_budget(self):
+        """默认把物理核心平均分给各进程，至少1个线程"""
+        assert ModelWorkerPool(workers=4, threads_per_worker=3)._thread_budget() == 3
+        assert ModelWorkerPool(workers=1000)._thread_budget() == 1
+
+    def test_worker_utilization(self):
+        worker = ModelWorker(0, 4, queue.Queue())
+        worker.started_at -= 10
+        worker.busy_seconds = 5
+        stats = worker.to_dict()
+        assert stats["state"] == "starting"
+        assert 0.45 < stats["utilization"] <= 0.5
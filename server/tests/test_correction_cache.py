@@ -0,0 +1,80 @@
+import json
+import os
+from api.speech.correction_cache import CorrectionCache
+from api.speech.text_correction import TextCorrector
+
+RESULT = ("他说第一灵来了", [(2, 3, "第一零", "第一灵", "pinyin", 0.9)])
+
+class TestCorrectionCache:
+    def test_lru_and_versions(self):
+        cache = CorrectionCache(max_size=2)
+        cache.put("v1", "甲", ("甲", []))
+        cache.put("v1", "乙", ("乙", []))
+        assert cache.get("v1", "甲") == ("甲", [])
+        cache.put("v1", "丙", ("丙", []))  # 淘汰最久未用的"乙"
+        assert cache.get("v1", "乙") is None
+        assert cache.get("v2", "甲") is None  # 版本不同不会命中
+        stats = cache.get_stats()
+        assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (1, 2, 1, 2)
+
+    def test_disabled(self):
+        cache = CorrectionCache(max_size=0)
+        cache.put("v1", "甲", ("甲", []))
+        assert cache.get("v1", "甲") is None
+        assert CorrectionCache(max_size=10).get(None, "甲") is None
+
+    def test_persisted_results_reloaded(self, tmp_path):
+        cache = CorrectionCache(max_size=10, cache_dir=str(tmp_path))
+        cache.put("v1", "他说第一零来了", RESULT)
+        cache.put("v1", "不写磁盘", ("不写磁盘", []), persist=False)
+        cache.close()
+        with open(tmp_path / f"v1-{CorrectionCache.FILE_FORMAT}.jsonl", "a", encoding="utf-8") as f:
+            f.write('{"t": "半行')  # 写入中断留下的不完整行
+
+        reloaded = CorrectionCache(max_size=10, cache_dir=str(tmp_path))
+        assert reloaded.get("v1", "他说第一零来了") == RESULT
+        assert reloaded.get("v1", "不写磁盘") is None
+        assert len(reloaded) == 1
+
+    def test_old_versions_pruned(self, tmp_path):
+        cache = CorrectionCache(max_size=10, cache_dir=str(tmp_path))
+        for i in range(CorrectionCache.MAX_VERSION_FILES + 2):
+            path = tmp_path / f"v{i}.jsonl"
+            path.write_text(json.dumps({"t": "甲", "r": "甲", "s": []}) + "\n", encoding="utf-8")
+            os.utime(path, (i, i))
+        cache.put("new", "甲", ("甲", []))
+        remaining = sorted(os.listdir(tmp_path))
+        assert len(remaining) == CorrectionCache.MAX_VERSION_FILES
+        assert f"new-{CorrectionCache.FILE_FORMAT}.jsonl" in remaining and "v0.jsonl" not in remaining
+
+class TestCorrectorCache:
+    def test_spans_and_cache_hits(self, tmp_path):
+        (tmp_path / "keywords").write_text("第一灵 0.8\n灵体 林提\n", encoding="utf-8")
+        corrector = TextCorrector(base_dir=str(tmp_path), segmenter_backend="window")
+        text = "林提说第一零来了"
+        result = corrector.correct_text_with_spans(text)
+        corrected, spans = result
+        assert corrected == "灵体说第一灵来了"
+        assert [span[:5] for span in spans] == [(0, 2, "林提", "灵体", "original"), (3, 3, "第一零", "第一灵", "pinyin")]
+        assert spans[0][5] is None and 0.8 <= spans[1][5] <= 1
+        for offset, length, _, target, _, _ in spans:
+            assert corrected[offset:offset + length] == target
+
+        assert corrector.correct_texts([text, "", text]) == [result, ("", []), result]
+        assert corrector.correction_cache.get_stats()["hits"] == 2
+
+    def test_backend_change_misses(self, tmp_path):
+        (tmp_path / "keywords").write_text("第一灵 0.8\n", encoding="utf-8")
+        cache = CorrectionCache(max_size=10, cache_dir=str(tmp_path / "cache"))
+        text = "他说第一零来了"
+        window = TextCorrector(base_dir=str(tmp_path), segmenter_backend="window")
+        window.correction_cache = cache
+        window.correct_texts([text])
+
+        # 同一份 keywords 换一种分词方式，不能读到另一种分词方式的结果
+        dag = TextCorrector(base_dir=str(tmp_path), segmenter_backend="dag")
+        dag.correction_cache = cache
+        assert dag._cache_version(dag.model) != window._cache_version(window.model)
+        dag.correct_texts([text])
+        assert cache.get_stats()["misses"] == 2
+        assert len(os.listdir(tmp_path / "cache")) == 2
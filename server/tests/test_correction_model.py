@@ -0,0 +1,62 @@
+import os
+from api.speech.correction_model import CorrectionModel, keywords_version
+
+TARGET_WORDS = {
+    "第一灵": (["di4", "yi1", "ling2"], [], 0.9, ["第一名", "第1名"]),
+    "灵体": (["ling2", "ti3"], ["修炼"], 0.9, ["林提"]),
+}
+
+class TestCorrectionModel:
+    def test_compiled_indexes(self):
+        model = CorrectionModel("v1", TARGET_WORDS, ["第一灵", "灵体"])
+        assert model.original_words_map == {"第一名": "第一灵", "第1名": "第一灵", "林提": "灵体"}
+        assert model.original_replacer.replace("第1名")[0] == "第一灵"
+        assert model.candidate_index.candidates("林体", ["lin2", "ti3"]) == [1]
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "compiled" / "model.pkl")
+        CorrectionModel("v1", TARGET_WORDS, ["第一灵"], config_mtime=100.0).save(path)
+        assert os.listdir(tmp_path / "compiled") == ["model.pkl"]
+
+        model = CorrectionModel.load(path, "v1", config_mtime=100.0)
+        assert model.target_words == TARGET_WORDS
+        assert model.dict_words == ["第一灵"]
+        assert model.original_replacer.replace("第一名")[0] == "第一灵"
+
+    def test_stale_model_is_rejected(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "model.pkl")
+        CorrectionModel("v1", TARGET_WORDS, config_mtime=100.0).save(path)
+        assert CorrectionModel.load(path, "v2") is None  # keywords 内容变化
+        assert CorrectionModel.load(path, "v1", config_mtime=200.0) is None  # yaml 被手动修改
+        monkeypatch.setattr(CorrectionModel, "FORMAT_VERSION", CorrectionModel.FORMAT_VERSION + 1)
+        assert CorrectionModel.load(path, "v1") is None
+        assert CorrectionModel.load(str(tmp_path / "missing.pkl"), "v1") is None
+
+    def test_keywords_version(self, tmp_path):
+        path = tmp_path / "keywords"
+        assert keywords_version(str(path)) is None
+        path.write_text("第一灵 第一名\n", encoding="utf-8")
+        first = keywords_version(str(path))
+        os.utime(path, (0, 0))
+        assert keywords_version(str(path)) == first  # 只看内容，不看修改时间
+        path.write_text("第一灵 第1名\n", encoding="utf-8")
+        assert keywords_version(str(path)) != first
+
+    def test_segmenter_not_saved(self, tmp_path):
+        """分词器是运行时对象，不写入编译文件"""
+        path = str(tmp_path / "model.pkl")
+        model = CorrectionModel("v1", TARGET_WORDS)
+        model.segmenter = object()
+        model.save(path)
+        assert model.segmenter is not None
+        assert CorrectionModel.load(path, "v1").segmenter is None
+
+    def test_global_artifact_outside_source_tree(self, tmp_path):
+        """全局纠错器的编译文件写到 storage（测试中为临时目录），独立实例写到自己的 base_dir 下"""
+        from api.files.config import config as file_config
+        from api.speech import text_correction
+        source_dir = os.path.dirname(os.path.abspath(text_correction.__file__))
+        assert os.path.dirname(text_correction.text_corrector.model_file) == file_config.compiled_dir
+        assert not file_config.compiled_dir.startswith(source_dir)
+        corrector = text_correction.TextCorrector(base_dir=str(tmp_path))
+        assert corrector.model_file == str(tmp_path / "compiled" / "correction_model.pkl")
@@ -0,0 +1,99 @@
+import os
+import sys
+from concurrent.futures import Future
+import pytest
+from api.speech import text_correction
+from api.speech.correction_pool import CorrectionPool
+from api.speech.text_correction import TextCorrector
+
+def tag_chunk(texts, version):
+    """在子进程中给每个句子加上版本和进程号"""
+    return [f"{text}|{version}|{os.getpid()}" for text in texts]
+
+def start_models_chunk(texts, version):
+    """模拟 spawn 子进程重新导入主模块：启动模型进程池，返回是否加载了识别模型"""
+    from api.speech.workers import model_pool
+    model_pool.start()
+    return ["api.speech.models" in sys.modules for _ in texts]
+
+def pid_chunk(texts, version):
+    """返回 (原文|进程号, 无替换)，用来确认句子在纠错进程中处理"""
+    return [(f"{text}|{os.getpid()}", []) for text in texts]
+
+def window_sentences(window, count):
+    return [{"sentence": f"<|zh|><|NEUTRAL|><|Speech|><|withitn|>第{window}窗第{i}句", "start": i * 100,
+             "end": i * 100 + 90, "timestamp": [[i * 100, i * 100 + 90]], "spk": 0} for i in range(count)]
+
+@pytest.fixture
+def pooled_corrector(tmp_path, monkeypatch):
+    """使用默认句子数下限的纠错进程池，纠错函数只标记进程号"""
+    (tmp_path / "keywords").write_text("第一灵\n", encoding="utf-8")
+    corrector = TextCorrector(base_dir=str(tmp_path), segmenter_backend="window")
+    pool = CorrectionPool(workers=2, func=pid_chunk, initializer=None)
+    monkeypatch.setattr(text_correction, "correction_pool", pool)
+    yield corrector, pool
+    pool.shutdown()
+
+def failing_chunk(texts, version):
+    raise RuntimeError("boom")
+
+class TestCorrectionPool:
+    def test_chunks_reassembled_in_order(self):
+        pool = CorrectionPool(workers=2, chunk_size=3, min_sentences=1, func=tag_chunk, initializer=None)
+        try:
+            texts = [f"句子{i}" for i in range(10)]
+            results = pool.correct_texts(texts, "v1")
+            assert [r.split("|")[0] for r in results] == texts
+            assert all(r.split("|")[1] == "v1" for r in results)
+            assert all(int(r.split("|")[2]) != os.getpid() for r in results)
+            assert pool.get_stats()["sentences"] == 10
+        finally:
+            pool.shutdown()
+
+    def test_small_batches_stay_in_process(self):
+        pool = CorrectionPool(workers=2, min_sentences=5, func=tag_chunk, initializer=None)
+        assert pool.correct_texts(["一", "二"], "v1") is None
+        assert not pool.get_stats()["running"]
+        assert CorrectionPool(workers=0, min_sentences=0).correct_texts(["一"], "v1") is None
+
+    def test_failure_falls_back(self):
+        pool = CorrectionPool(workers=1, min_sentences=1, func=failing_chunk, initializer=None)
+        assert pool.correct_texts(["一", "二"], "v1") is None
+        assert pool.get_stats()["fallbacks"] == 1
+        assert not pool.get_stats()["running"]
+
+    def test_workers_do_not_load_asr_model(self):
+        pool = CorrectionPool(workers=1, min_sentences=1, func=start_models_chunk, initializer=None)
+        try:
+            assert pool.correct_texts(["一", "二"], "v1") == [False, False]
+            assert "api.speech.models" not in sys.modules
+        finally:
+            pool.shutdown()
+
+class TestMergedCorrection:
+    def test_merged_windows_use_pool(self, pooled_corrector):
+        """多个窗口拼接后的句子一次纠正，总数达到下限时经过纠错进程池"""
+        corrector, pool = pooled_corrector
+        sentences = [s for window in range(3) for s in window_sentences(window, 100)]
+        res = corrector.correct_recognition_result([{"text": "", "sentence_info": sentences}])
+        assert pool.get_stats()["sentences"] == 300
+        assert all(int(s["sentence"].rsplit("|", 1)[1]) != os.getpid() for s in res[0]["sentence_info"])
+
+    def test_recognition_corrects_after_merge(self, pooled_corrector, monkeypatch):
+        pytest.importorskip("funasr")
+        from api.speech import recognize
+        from api.speech.progress import RecognitionProgress
+        corrector, pool = pooled_corrector
+        monkeypatch.setattr(text_correction, "text_corrector", corrector)
+
+        def submit(func, pcm_path, start_ms, end_ms, language, with_embeddings):
+            future = Future()
+            future.set_result((window_sentences(start_ms // 1000, 100), None))
+            return future
+        monkeypatch.setattr(recognize.model_pool, "submit", submit)
+        service = recognize.speech_service
+        windows = [(0, 1000), (1000, 2000), (2000, 3000)]
+        sentence_info = service._recognize_windows("unused.npy", windows, "zh", RecognitionProgress())
+        service._correct_sentences(sentence_info)
+        assert len(sentence_info) == 300
+        assert pool.get_stats()["sentences"] == 300
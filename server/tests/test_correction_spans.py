@@ -0,0 +1,39 @@
+from api.speech.config import speech_config
+from api.speech.text_correction import TextCorrector
+from api.speech.correction_spans import (RULE_ORIGINAL, RULE_PINYIN, make_span, rebase_spans,
+                                         span_from_dict, span_to_dict)
+
+class TestCorrectionSpans:
+    def test_dict_round_trip(self):
+        span = make_span(2, "第一零", "第一灵", RULE_PINYIN, 0.912345)
+        item = span_to_dict(span)
+        assert item == {"offset": 2, "length": 3, "original": "第一零", "target": "第一灵",
+                        "rule": "pinyin", "similarity": 0.9123}
+        assert span_from_dict(item)[:5] == span[:5]
+
+    def test_rebase_shifts_and_replaces(self):
+        # 识别时："林提说第1和心至" -> "灵体说第1和心智"
+        old = [make_span(0, "林提", "灵体", RULE_PINYIN, 0.9), make_span(6, "心至", "心智", RULE_PINYIN, 0.95)]
+        # 再次纠正："灵体说第1和心智" -> "灵体说第一灵和心智"，之后的纠正后移一个字
+        new = [make_span(3, "第1", "第一灵", RULE_ORIGINAL)]
+        rebased = rebase_spans(old, new)
+        assert [(s[0], s[3]) for s in rebased] == [(0, "灵体"), (3, "第一灵"), (7, "心智")]
+
+    def test_rebase_drops_overlapping(self):
+        old = [make_span(0, "林提", "灵体", RULE_PINYIN, 0.9)]
+        new = [make_span(0, "灵体说", "灵体术", RULE_ORIGINAL)]
+        assert rebase_spans(old, new) == new
+
+class TestCorrectorSpans:
+    def test_offsets_after_length_changes(self, tmp_path, monkeypatch):
+        """漏字的误识别替换后字数变化，之后的纠正位置相应后移"""
+        (tmp_path / "keywords").write_text("欧瑞康德 0.7\n灵体 林提\n", encoding="utf-8")
+        monkeypatch.setattr(speech_config, "similarity_length_tolerance", 1)
+        corrector = TextCorrector(base_dir=str(tmp_path), segmenter_backend="dag")
+        corrected, spans = corrector.correct_text_with_spans("欧瑞德说林提")
+        assert corrected == "欧瑞康德说灵体"
+        assert [span[:5] for span in spans] == [(0, 4, "欧瑞德", "欧瑞康德", "pinyin"), (5, 2, "林提", "灵体", "original")]
+
+        monkeypatch.setattr(speech_config, "similarity_length_tolerance", 0)
+        corrector = TextCorrector(base_dir=str(tmp_path), segmenter_backend="dag")
+        assert corrector.correct_text_with_spans("欧瑞德说林提")[0] == "欧瑞德说灵体"
@@ -0,0 +1,77 @@
+import os
+import time
+import numpy as np
+import pytest
+from api.speech.audio_utils import AudioConverter
+from api.speech.pcm_cache import PcmCache
+from api.speech.workers import load_pcm
+
+class TestPcmCache:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return PcmCache(cache_dir=str(tmp_path / "pcm"), max_bytes=10 ** 9)
+
+    @pytest.fixture
+    def audio_file(self, tmp_path):
+        path = tmp_path / "a.mp3"
+        path.write_bytes(b"fake audio content")
+        return str(path)
+
+    def test_put_and_get_memmap(self, cache):
+        speech = np.linspace(-1, 1, 16000, dtype=np.float32)
+        cache.put("abc", speech)
+        cached = cache.get("abc")
+        assert isinstance(cached, np.memmap)
+        assert np.array_equal(cached, speech)
+        assert cache.get("missing") is None
+
+    def test_open_decodes_once(self, cache, audio_file, monkeypatch):
+        """同一内容只解码一次，之后直接映射缓存文件"""
+        calls = []
+        def fake_decode(source):
+            calls.append(source)
+            return np.zeros(32000, dtype=np.float32)
+        monkeypatch.setattr(AudioConverter, "decode_to_array", fake_decode)
+
+        with cache.open(audio_file) as (speech, pcm_path):
+            assert len(speech) == 32000
+            assert os.path.exists(pcm_path)
+        with cache.open(open(audio_file, 'rb').read()) as (speech, same_path):
+            assert same_path == pcm_path
+        assert len(calls) == 1
+        assert cache.get_stats()["hits"] == 1
+
+    def test_evict_least_recently_used(self, cache):
+        for i, key in enumerate(["old", "used", "new"]):
+            cache.put(key, np.zeros(1000, dtype=np.float32))
+            os.utime(cache.path_for(key), (time.time() - 100 + i, time.time() - 100 + i))
+        cache.get("old")  # 访问后变为最近使用
+        cache.max_bytes = os.path.getsize(cache.path_for("old")) * 2
+        assert cache.evict() == 1
+        assert cache.get("used") is None
+        assert cache.get("old") is not None
+
+    def test_pinned_entries_not_evicted(self, cache, audio_file, monkeypatch):
+        monkeypatch.setattr(AudioConverter, "decode_to_array", lambda source: np.zeros(1000, dtype=np.float32))
+        with cache.open(audio_file) as (_, pcm_path):
+            cache.max_bytes = 0
+            assert cache.evict() == 0
+            assert os.path.exists(pcm_path)
+        assert cache.evict() == 1
+
+    def test_load_window(self, cache):
+        speech = np.arange(16000 * 3, dtype=np.float32)
+        cache.put("abc", speech)
+        window = load_pcm(cache.path_for("abc"), 1000, 2000)
+        assert np.array_equal(window, speech[16000:32000])
+        assert window.flags.writeable
+
+    def test_load_whole_file_without_copy(self, cache):
+        """整个文件返回内存映射，不复制到进程内存，修改也不会写回缓存文件"""
+        speech = np.arange(16000, dtype=np.float32)
+        cache.put("abc", speech)
+        whole = load_pcm(cache.path_for("abc"))
+        assert isinstance(whole, np.memmap)
+        assert np.array_equal(whole, speech)
+        whole[0] = -1
+        assert load_pcm(cache.path_for("abc"))[0] == 0
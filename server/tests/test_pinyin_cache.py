@@ -0,0 +1,37 @@
+from api.speech.pinyin_cache import PinyinCache
+
+def fake_convert(word):
+    return [f"{c}1" for c in word]
+
+class TestPinyinCache:
+    def test_lru_eviction(self):
+        cache = PinyinCache(fake_convert, max_size=2)
+        cache.get("一二")
+        cache.get("三四")
+        cache.get("一二")  # 最近使用，不会被淘汰
+        cache.get("五六")
+        assert "一二" in cache and "五六" in cache and "三四" not in cache
+        stats = cache.get_stats()
+        assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (1, 3, 1, 2)
+        assert stats["memory_bytes"] > 0
+
+    def test_pinned_words_not_evicted(self):
+        calls = []
+        def convert(word):
+            calls.append(word)
+            return fake_convert(word)
+        cache = PinyinCache(convert, max_size=1)
+        cache.pin({"灵体": ["ling2", "ti3"]})
+        for word in ["甲乙", "丙丁", "戊己"]:
+            cache.get(word)
+        assert cache.get("灵体") == ["ling2", "ti3"]
+        assert "灵体" not in calls
+        assert cache.get_stats()["pinned"] == 1
+
+        cache.pin({})  # 切换模型后旧目标词不再常驻
+        assert "灵体" not in cache
+
+    def test_disabled(self):
+        cache = PinyinCache(fake_convert, max_size=0)
+        assert cache.get("一二") == ["一1", "二1"]
+        assert len(cache) == 0
@@ -0,0 +1,242 @@
+import random
+import time
+import numpy as np
+from api.speech.pinyin_index import (LengthTolerantIndex, PinyinCandidateIndex, SyllableTrie,
+                                     pinyin_similarity, syllable_edit_distances, syllable_similarity)
+
+SYLLABLES = ["shi4", "shi2", "si4", "zhi1", "zi1", "ling2", "lin2", "ti3", "yi1", "di4", "ming2", "zhuang1", "de"]
+
+def build_targets(rng, count):
+    targets = {}
+    while len(targets) < count:
+        length = rng.randint(2, 4)
+        word = ''.join(rng.choice("甲乙丙丁戊己庚辛壬癸") for _ in range(length))
+        pinyin_list = [rng.choice(SYLLABLES) for _ in range(length)]
+        targets[word] = (pinyin_list, [], rng.choice([0.6, 0.7, 0.8, 0.9, 1.0]), [])
+    return targets
+
+class TestPinyinCandidateIndex:
+    def test_same_as_linear_scan(self):
+        """索引筛出的候选必须包含所有逐个比较能达到阈值的目标词"""
+        rng = random.Random(1)
+        targets = build_targets(rng, 300)
+        index = PinyinCandidateIndex(targets)
+        words = list(targets)
+        for _ in range(500):
+            length = rng.randint(2, 4)
+            word = "子" * length
+            word_pinyin = [rng.choice(SYLLABLES) for _ in range(length)]
+            expected = [
+                i for i, target in enumerate(words)
+                if len(target) == len(word)
+                and pinyin_similarity(word_pinyin, targets[target][0]) >= targets[target][2]
+            ]
+            candidates = index.candidates(word, word_pinyin)
+            assert candidates == sorted(candidates)
+            assert set(expected) <= set(candidates)
+
+    def test_high_threshold_prunes(self):
+        targets = {
+            "第一灵": (["di4", "yi1", "ling2"], [], 0.9, []),
+            "心智": (["xin1", "zhi4"], [], 0.9, []),
+            "灵体": (["ling2", "ti3"], [], 0.9, []),
+        }
+        index = PinyinCandidateIndex(targets)
+        assert [index.words[i] for i in index.candidates("林提", ["lin2", "ti3"])] == ["灵体"]
+        assert index.candidates("天空", ["tian1", "kong1"]) == []
+        assert index.candidates("第一名", ["di4", "yi1", "ming2"]) == [0]
+
+    def test_length_mismatch(self):
+        index = PinyinCandidateIndex({"DNA": (["DNA"], [], 0.6, [])})
+        assert index.candidates("DNA", ["DNA"]) == [0]
+        assert index.candidates("DN", ["DN"]) == []
+        assert pinyin_similarity(["a"], ["a", "b"]) == 0.0
+
+class TestVectorizedSimilarity:
+    def test_scores_match_exactly(self):
+        """批量计算的相似度与逐音节计算的结果逐位相同"""
+        rng = random.Random(2)
+        targets = build_targets(rng, 300)
+        index = PinyinCandidateIndex(targets)
+        words = list(targets)
+        pool = SYLLABLES + ["DNA", "xiang4", "zhi"]  # 包含目标词中没有的音节
+        for _ in range(500):
+            length = rng.randint(2, 4)
+            word = "子" * length
+            word_pinyin = [rng.choice(pool) for _ in range(length)]
+            expected = []
+            for i, target in enumerate(words):
+                if len(target) != len(word):
+                    continue
+                similarity = pinyin_similarity(word_pinyin, targets[target][0])
+                if similarity >= targets[target][2]:
+                    expected.append((i, similarity))
+            assert index.matches(word, word_pinyin) == expected
+
+    def test_syllable_matrix(self):
+        index = PinyinCandidateIndex({"灵体": (["ling2", "ti3"], [], 0.5, []), "林": (["lin2"], [], 0.5, [])})
+        table = index.syllable_table
+        assert table.matrix.shape == (3, 3)
+        assert table.row("ling2")[table.ids["lin2"]] == 1 - 1 / 5
+        assert table.row("tian1")[table.ids["ti3"]] == 1 - 3 / 5
+
+class TestSyllableTrie:
+    def test_same_as_exhaustive_search(self):
+        """前缀树找到的 (起点, 终点, 目标词) 与逐个窗口逐个目标词比较的结果相同"""
+        rng = random.Random(2)
+        targets = build_targets(rng, 200)
+        table = PinyinCandidateIndex(targets).syllable_table
+        trie = SyllableTrie(targets, table)
+        assert len(trie) == len(targets)
+        for _ in range(50):
+            sentence = [rng.choice(SYLLABLES) for _ in range(rng.randint(1, 12))]
+            syllable_ids = np.array([table.encode(p) for p in sentence])
+            found = {(start, end, trie.words[index]): similarity
+                     for start, end, index, similarity in trie.search(syllable_ids)}
+            expected = {}
+            for start in range(len(sentence)):
+                for word, (pinyin_list, _, threshold, _) in targets.items():
+                    window = sentence[start:start + len(pinyin_list)]
+                    if len(window) == len(pinyin_list) and pinyin_similarity(window, pinyin_list) >= threshold:
+                        expected[(start, start + len(pinyin_list), word)] = pinyin_similarity(window, pinyin_list)
+            assert found.keys() == expected.keys()
+            for key, similarity in found.items():
+                assert abs(similarity - expected[key]) < 1e-9
+
+    def test_non_chinese_positions_break_matches(self):
+        targets = {"灵体": (["ling2", "ti3"], [], 0.9, []), "DNA": (["DNA"], [], 0.9, [])}
+        table = PinyinCandidateIndex(targets).syllable_table
+        trie = SyllableTrie(targets, table)
+        assert trie.words == ["灵体"]
+        ling, ti = table.encode("ling2"), table.encode("ti3")
+        assert [item[:3] for item in trie.search(np.array([ling, ti]))] == [(0, 2, 0)]
+        assert trie.search(np.array([ling, -1])) == []
+
+    def test_readings_outside_table(self):
+        """不在音节表中的读音追加编号，相似度与直接计算的一行相同"""
+        targets = {"灵体": (["ling2", "ti3"], [], 0.5, [])}
+        table = PinyinCandidateIndex(targets).syllable_table
+        trie = SyllableTrie(targets, table)
+        lin, tian = table.encode("lin2"), table.encode("tian1")
+        assert (lin, tian) == (2, 3) and table.encode("lin2") == lin
+        columns = np.array([table.ids["ling2"], table.ids["ti3"]])
+        assert np.allclose(table.similarities(np.array([lin, tian]), columns),
+                           [table.row("lin2")[columns[0]], table.row("tian1")[columns[1]]])
+        found = trie.search(np.array([lin, tian]))
+        assert [item[:3] for item in found] == [(0, 2, 0)]
+        assert abs(found[0][3] - pinyin_similarity(["lin2", "tian1"], ["ling2", "ti3"])) < 1e-9
+
+        # 追加的行超过初始容量后，之前的编号仍对应原来的行
+        for i in range(100):
+            table.encode(f"x{i}")
+        assert table.similarities(np.array([lin]), columns[:1])[0] == table.row("lin2")[columns[0]]
+        assert table.matrix.shape == (2, 2)
+
+def edit_distance(py1, py2):
+    """不限带宽的加权编辑距离，替换代价 1 - 音节相似度"""
+    previous = [float(j) for j in range(len(py2) + 1)]
+    for i, p1 in enumerate(py1, 1):
+        current = [float(i)] + [0.0] * len(py2)
+        for j, p2 in enumerate(py2, 1):
+            current[j] = min(previous[j - 1] + 1 - syllable_similarity(p1, p2), previous[j] + 1, current[j - 1] + 1)
+        previous = current
+    return previous[-1]
+
+class TestLengthTolerantIndex:
+    def test_edit_distances(self):
+        table = PinyinCandidateIndex({"第一灵": (["di4", "yi1", "ling2"], [], 0.9, [])}).syllable_table
+        targets = [["di4", "yi1", "ling2"], ["ling2", "yi1", "di4"], ["yi1", "yi1", "yi1"]]
+        columns = list(np.array([[table.ids[p] for p in target] for target in targets]).T)
+        rng = random.Random(3)
+        for _ in range(200):
+            word = [rng.choice(["di4", "yi1", "ling2", "ge4", "lin2"]) for _ in range(rng.randint(1, 5))]
+            distances = syllable_edit_distances([table.row(p) for p in word], columns)
+            assert np.allclose(distances, [edit_distance(word, target) for target in targets])
+
+    def test_matches_within_threshold(self):
+        """找到的目标词音节数相差 1，相似度等于编辑距离的结果且达到阈值"""
+        rng = random.Random(4)
+        targets = build_targets(rng, 300)
+        index = PinyinCandidateIndex(targets)
+        words = list(targets)
+        found = 0
+        for _ in range(300):
+            target = rng.choice(words)
+            word_pinyin = list(targets[target][0])
+            position = rng.randrange(len(word_pinyin) + 1)
+            if rng.random() < 0.5 and len(word_pinyin) > 2:
+                del word_pinyin[min(position, len(word_pinyin) - 1)]
+            else:
+                word_pinyin.insert(position, rng.choice(SYLLABLES))
+            matches = index.length_tolerant_matches(word_pinyin)
+            for i, similarity in matches:
+                pinyin_list, _, threshold, _ = targets[words[i]]
+                longest = max(len(pinyin_list), len(word_pinyin))
+                assert abs(len(pinyin_list) - len(word_pinyin)) == 1
+                assert abs(similarity - (1 - edit_distance(word_pinyin, pinyin_list) / longest)) < 1e-9
+                assert similarity >= threshold - 1e-9
+            found += any(words[i] == target for i, _ in matches)
+        assert found > 0
+        assert index.length_tolerant_matches(["di4", "yi1"], tolerance=0) == []
+
+    def test_same_as_brute_force(self):
+        """结果与逐个计算所有目标词的编辑距离相同"""
+        rng = random.Random(5)
+        pool = SYLLABLES + ["zang1", "sang1", "li3", "DNA"]
+        for _ in range(20):
+            targets = {}
+            while len(targets) < 60:
+                length = rng.randint(1, 6)
+                word = ''.join(rng.choice("甲乙丙丁戊己庚辛壬癸") for _ in range(length))
+                targets[word] = ([rng.choice(SYLLABLES) for _ in range(length)], [],
+                                 rng.choice([0.5, 0.6, 0.65, 0.7, 0.8, 0.9]), [])
+            index = PinyinCandidateIndex(targets)
+            words = list(targets)
+            for _ in range(50):
+                word_pinyin = [rng.choice(pool) for _ in range(rng.randint(1, 7))]
+                expected = []
+                for i, target in enumerate(words):
+                    pinyin_list, _, threshold, _ = targets[target]
+                    if abs(len(pinyin_list) - len(word_pinyin)) != 1:
+                        continue
+                    similarity = 1 - edit_distance(word_pinyin, pinyin_list) / max(len(pinyin_list), len(word_pinyin))
+                    if similarity >= threshold - 1e-9:
+                        expected.append((i, similarity))
+                matches = index.length_tolerant_matches(word_pinyin)
+                assert [i for i, _ in matches] == [i for i, _ in expected]
+                assert np.allclose([m for _, m in matches], [m for _, m in expected])
+
+    def test_no_shared_syllables(self):
+        """阈值较低时不共享任何相同音节片段也可能达到阈值"""
+        targets = {"张三李四": (["zhang1", "san1", "li3", "si4"], [], 0.65, [])}
+        index = PinyinCandidateIndex(targets)
+        matches = index.length_tolerant_matches(["zang1", "sang1", "li3"])
+        assert [i for i, _ in matches] == [0]
+        assert abs(matches[0][1] - (1 - edit_distance(["zang1", "sang1", "li3"], targets["张三李四"][0]) / 4)) < 1e-9
+
+    def test_lookup_budget(self):
+        """不做候选过滤，数千个目标词全部进入索引时每次查找仍在毫秒级"""
+        rng = random.Random(7)
+        targets = {}
+        while len(targets) < 5000:
+            length = rng.randint(2, 6)
+            word = ''.join(chr(0x4e00 + rng.randrange(2000)) for _ in range(length))
+            targets[word] = ([rng.choice(SYLLABLES) for _ in range(length)], [], 0.6, [])
+        index = PinyinCandidateIndex(targets)
+        assert len(index.length_tolerant) == len(targets)
+        words = [[rng.choice(SYLLABLES) for _ in range(rng.randint(1, 7))] for _ in range(500)]
+        start = time.perf_counter()
+        for word_pinyin in words:
+            index.length_tolerant_matches(word_pinyin)
+        # 开发机上约 0.5ms/次，留出足够余量避免在慢机器上误报
+        assert (time.perf_counter() - start) / len(words) < 0.01
+
+    def test_high_thresholds_not_indexed(self):
+        """阈值 0.9 的 3 个字的目标词多一个字最多 0.75，不会进入索引"""
+        targets = {"第一灵": (["di4", "yi1", "ling2"], [], 0.9, []),
+                   "欧瑞康德": (["ou1", "rui4", "kang1", "de2"], [], 0.7, [])}
+        index = LengthTolerantIndex(targets, PinyinCandidateIndex(targets).syllable_table)
+        assert index.indexes == [1]
+        assert [i for i, _ in index.matches(["ou1", "rui4", "de2"])] == [1]
+        assert [i for i, _ in index.matches(["ou1", "rui4", "kang1", "kang1", "de2"])] == [1]
+        assert index.matches(["di4", "yi1", "ge4", "ling2"]) == []
@@ -0,0 +1,133 @@
+import threading
+import time
+import pytest
+from api.speech.progress import RecognitionProgress
+from api.speech.jobs import (
+    RecognitionJobManager,
+    JobQueueFullError,
+    JOB_QUEUED,
+    JOB_DONE,
+    JOB_FAILED
+)
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+class TestRecognitionJobManager:
+    @pytest.fixture
+    def manager(self):
+        return RecognitionJobManager(max_workers=1, max_queue_size=2, history_size=10)
+
+    def test_submit_returns_immediately(self, manager):
+        """提交任务不等待执行完成"""
+        release = threading.Event()
+        job = manager.submit("file_1", lambda progress: release.wait())
+        assert job.job_id
+        assert job.state in (JOB_QUEUED, "running")
+        release.set()
+        assert wait_for(lambda: job.state == JOB_DONE)
+
+    def test_failed_result_marks_job_failed(self, manager):
+        """返回非200结果或抛出异常时任务失败"""
+        job1 = manager.submit("file_1", lambda progress: {"code": 500, "message": "模型错误"})
+        job2 = manager.submit("file_2", lambda progress: 1 / 0)
+        assert wait_for(lambda: job1.finished and job2.finished)
+        assert job1.state == JOB_FAILED
+        assert job1.error == "模型错误"
+        assert job2.state == JOB_FAILED
+
+    def test_duplicate_submit_returns_active_job(self, manager):
+        """同一文件重复提交返回同一个任务"""
+        release = threading.Event()
+        job = manager.submit("file_1", lambda progress: release.wait())
+        assert manager.submit("file_1", lambda progress: release.wait()) is job
+        release.set()
+
+    def test_queue_backpressure(self, manager):
+        """队列满时拒绝提交"""
+        release = threading.Event()
+        running = manager.submit("file_0", lambda progress: release.wait())
+        assert wait_for(lambda: running.state == "running")
+        manager.submit("file_1", lambda progress: release.wait())
+        manager.submit("file_2", lambda progress: release.wait())
+        with pytest.raises(JobQueueFullError):
+            manager.submit("file_3", lambda progress: release.wait())
+        assert manager.get_stats()["queue_size"] == 2
+        release.set()
+
+    def test_lookup_by_file(self, manager):
+        job = manager.submit("file_1", lambda progress: None)
+        assert manager.get_job_by_file("file_1") is job
+        assert manager.get_job(job.job_id) is job
+        assert wait_for(lambda: job.state == JOB_DONE)
+        assert manager.get_job_by_file("file_1").to_dict()["status"] == "已完成"
+
+class TestRecognitionProgress:
+    def test_snapshot_and_events(self):
+        """订阅后先拿到快照，再收到增量事件"""
+        progress = RecognitionProgress()
+        progress.set_stage("recognizing", total_seconds=100)
+        progress.advance(50, segments=[{"text": "第一句"}], speakers=[])
+
+        events = []
+        snapshot, unsubscribe = progress.subscribe(events.append)
+        assert snapshot["segments"] == [{"text": "第一句"}]
+        assert 5 < snapshot["progress"] < 95
+
+        progress.advance(100, segments=[{"text": "第二句"}], speakers=[])
+        assert events[0]["type"] == "segments"
+        assert events[0]["data"]["start_index"] == 1
+        assert events[1]["data"]["decoded_seconds"] == 100
+
+        unsubscribe()
+        progress.set_stage("done")
+        assert len(events) == 2
+        assert progress.snapshot()["progress"] == 100
+
+class TestRecognitionBatch:
+    def test_longest_first_and_aggregate_progress(self):
+        manager = RecognitionJobManager(max_workers=1, max_queue_size=10, history_size=10)
+        started = []
+        release = threading.Event()
+
+        def run(file_id, progress):
+            started.append(file_id)
+            release.wait()
+
+        batch = manager.submit_batch([
+            {"file_id": "short", "duration": 60, "args": ("short",)},
+            {"file_id": "long", "duration": 600, "args": ("long",)},
+            {"file_id": "medium", "duration": 300, "args": ("medium",)},
+        ], run)
+        assert [job.file_id for job in batch.jobs] == ["long", "medium", "short"]
+        assert manager.get_batch(batch.batch_id) is batch
+
+        data = batch.to_dict()
+        assert data["total_seconds"] == 960
+        assert data["finished"] is False
+
+        release.set()
+        assert wait_for(lambda: batch.finished)
+        data = batch.to_dict()
+        assert started == ["long", "medium", "short"]
+        assert data["processed_seconds"] == 960
+        assert data["progress"] == 100
+        assert data["remaining_time"] == 0
+
+    def test_rejected_when_queue_full(self):
+        manager = RecognitionJobManager(max_workers=1, max_queue_size=1, history_size=10)
+        release = threading.Event()
+        running = manager.submit("running", lambda progress: release.wait())
+        assert wait_for(lambda: running.state == "running")
+        batch = manager.submit_batch([
+            {"file_id": "a", "duration": 10, "args": ()},
+            {"file_id": "b", "duration": 20, "args": ()},
+        ], lambda progress: release.wait())
+        assert [job.file_id for job in batch.jobs] == ["b"]
+        assert batch.rejected[0]["file_id"] == "a"
+        release.set()
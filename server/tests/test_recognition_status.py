@@ -0,0 +1,78 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+
+pytest.importorskip("funasr")  # files.service 导入识别服务
+
+from api import utils
+from api.files import operations, service
+from api.files.config import config
+from api.speech.jobs import JobQueueFullError
+from api.speech.storage import transcript_manager
+
+RESULT = {"code": 200, "message": "success", "data": {"language": "zh", "segments": [{"text": "你好"}]}}
+
+class ShiftedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(hours=1)
+
+class FakeJobs:
+    """记录提交时文件的状态，full 时拒绝任务"""
+    def __init__(self, file_service, full=False):
+        self.file_service = file_service
+        self.full = full
+        self.seen = []
+
+    def submit(self, file_id, func, *args):
+        self.seen.append(self.file_service.metadata.get_by_file_id(file_id)["status"])
+        if self.full:
+            raise JobQueueFullError("识别队列已满")
+        return self
+
+    def to_dict(self):
+        return {"job_id": "j1"}
+
+    def queue_position(self, job):
+        return 1
+
+@pytest.fixture
+def file_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "audio_dir", str(tmp_path / "audio"))
+    monkeypatch.setattr(config, "metadata_file", str(tmp_path / "metadata.json"))
+    monkeypatch.setattr(config, "upload_tmp_dir", str(tmp_path / "tmp"))
+    monkeypatch.setattr(transcript_manager, "transcripts_dir", str(tmp_path / "transcripts"))
+    os.makedirs(config.audio_dir)
+    file_service = service.FileService(str(tmp_path / "storage"))
+    file_service.metadata.metadata = {}
+    return file_service
+
+def upload(file_service, content):
+    options = {"original_filename": "会议.mp3", "language": "zh", "dedup": False}
+    return file_service.operations.save_uploaded_file(content, options)["data"]["file_id"]
+
+class TestRecognitionStatus:
+    def test_saved_when_queued_and_restored_when_rejected(self, file_service, monkeypatch):
+        file_id = upload(file_service, b"audio")
+        jobs = FakeJobs(file_service)
+        monkeypatch.setattr(service, "recognition_jobs", jobs)
+        assert file_service.start_recognition(file_id)["code"] == 200
+        assert jobs.seen == ["识别中"]  # 提交时已经保存
+
+        file_service.update_file_status(file_id, "失败")
+        jobs.full = True
+        assert file_service.start_recognition(file_id)["code"] == 503
+        assert file_service.metadata.get_by_file_id(file_id)["status"] == "失败"
+
+    def test_interrupted_recognitions_reset(self, file_service, monkeypatch):
+        done = upload(file_service, b"a")
+        # file_id 精确到秒，给第二个文件换一个时间戳
+        monkeypatch.setattr(operations, "datetime", ShiftedDatetime)
+        monkeypatch.setattr(utils, "datetime", ShiftedDatetime)
+        pending = upload(file_service, b"b")
+        transcript_manager.save_result(done, RESULT)
+        for file_id in (done, pending):
+            file_service.update_file_status(file_id, "识别中")
+        assert file_service.reset_interrupted_recognitions() == 2
+        assert file_service.metadata.get_by_file_id(done)["status"] == "已完成"
+        assert file_service.metadata.get_by_file_id(pending)["status"] == "已上传"
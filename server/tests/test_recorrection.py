@@ -0,0 +1,136 @@
+import json
+import os
+from api.speech import recorrection
+from api.speech.recorrection import ArchiveRecorrector, changed_targets
+from api.speech.storage import transcript_manager
+from api.speech.text_correction import TextCorrector
+from api.speech.transcript_index import TranscriptIndex
+
+def write_transcript(transcripts_dir, file_id, texts, edited=()):
+    segments = [{"text": text, "start_time": i} for i, text in enumerate(texts)]
+    for position in edited:
+        segments[position]["edited"] = True
+    content = {"code": 200, "message": "success",
+               "data": {"segments": segments, "full_text": " ".join(texts)}}
+    os.makedirs(transcripts_dir / file_id, exist_ok=True)
+    path = transcripts_dir / file_id / "original.json"
+    path.write_text(json.dumps(content, ensure_ascii=False), encoding="utf-8")
+    return path
+
+def read_segments(path):
+    return json.loads(path.read_text(encoding="utf-8"))["data"]["segments"]
+
+class TestTranscriptIndex:
+    def test_text_and_pinyin_lookup(self, tmp_path):
+        write_transcript(tmp_path, "a", ["他说林提很特别", "今天天气不错"])
+        write_transcript(tmp_path, "b", ["第一名来了"])
+        index = TranscriptIndex(str(tmp_path))
+        assert index.refresh() == 2
+        sentences = lambda ids: sorted(index.sentences[i][2] for i in ids)
+
+        assert sentences(index.containing("第一名")) == ["第一名来了"]
+        assert index.containing("第二名") == set()
+        assert sentences(index.sounding_like("灵体", ["ling2", "ti3"], 0.7)) == ["他说林提很特别"]
+        assert index.sounding_like("DNA", ["DNA"], 0.9) is None
+        assert index.sounding_like("灵体", ["ling2", "ti3"], 0.3) is None  # 阈值太低，无法筛选
+
+    def test_pinyin_lookup_with_inserted_character(self, tmp_path):
+        write_transcript(tmp_path, "a", ["欧瑞康康德来了", "今天天气不错"])
+        index = TranscriptIndex(str(tmp_path))
+        index.refresh()
+        pinyin_list = ["ou1", "rui4", "kang1", "de2"]
+        assert index.sounding_like("欧瑞康德", pinyin_list, 0.85, length_tolerance=1) == {0}
+        # 允许多一个字时按 5 个音节计算，0.75 已无法筛选
+        assert index.sounding_like("欧瑞康德", pinyin_list, 0.75, length_tolerance=1) is None
+
+    def test_incremental_refresh(self, tmp_path):
+        write_transcript(tmp_path, "a", ["林提"])
+        path = write_transcript(tmp_path, "b", ["第一名"])
+        index = TranscriptIndex(str(tmp_path))
+        index.refresh()
+        assert index.refresh() == 0
+
+        write_transcript(tmp_path, "b", ["第二名"])
+        os.utime(path, ns=(os.stat(path).st_mtime_ns + 10**9,) * 2)
+        os.remove(tmp_path / "a" / "original.json")
+        assert index.refresh() == 1
+        assert [text for _, _, text in index.sentences.values()] == ["第二名"]
+        assert index.containing("林提") == set()
+
+class TestArchiveRecorrector:
+    def test_only_affected_sentences_updated(self, tmp_path):
+        base_dir = tmp_path / "model"
+        transcripts = tmp_path / "transcripts"
+        base_dir.mkdir()
+        keywords = base_dir / "keywords"
+        keywords.write_text("心智 0.9\n", encoding="utf-8")
+        corrector = TextCorrector(base_dir=str(base_dir), segmenter_backend="window")
+        old_model = corrector.model
+
+        changed = write_transcript(transcripts, "a", ["他得了第1名", "林提很特别", "第1名又来了"], edited=[2])
+        untouched = write_transcript(transcripts, "b", ["今天天气不错"])
+        untouched_mtime = os.stat(untouched).st_mtime_ns
+
+        keywords.write_text("心智 0.9\n第一灵 第一名,第1名\n灵体 0.7\n", encoding="utf-8")
+        os.utime(keywords, ns=(os.stat(keywords).st_mtime_ns + 10**9,) * 2)
+        recorrector = ArchiveRecorrector(str(transcripts), corrector)
+        recorrector._last_model = old_model
+        status = recorrector.run()
+
+        assert changed_targets(old_model, corrector.model) == ["第一灵", "灵体"]
+        assert [s["text"] for s in read_segments(changed)] == ["他得了第一灵", "灵体很特别", "第1名又来了"]
+        assert json.loads(changed.read_text(encoding="utf-8"))["data"]["full_text"] == "他得了第一灵 灵体很特别 第1名又来了"
+        assert read_segments(changed)[0]["corrections"] == [
+            {"offset": 3, "length": 3, "original": "第1名", "target": "第一灵", "rule": "original", "similarity": None}]
+        assert "corrections" not in read_segments(changed)[2]
+        assert os.stat(untouched).st_mtime_ns == untouched_mtime
+        assert (status["state"], status["updated_sentences"], status["updated_files"]) == ("done", 2, 1)
+        assert status["skipped_edited"] == 1
+        assert status["candidate_sentences"] == 3
+
+        # 没有新的变化时不再处理
+        assert recorrector.run()["checked_sentences"] == 0
+
+    def test_full_text_rebuilt_from_segments(self, tmp_path):
+        """同样的原文出现在更早的手动修改段落中时，全文里只更新被纠正的段落"""
+        base_dir = tmp_path / "model"
+        transcripts = tmp_path / "transcripts"
+        base_dir.mkdir()
+        keywords = base_dir / "keywords"
+        keywords.write_text("心智 0.9\n", encoding="utf-8")
+        corrector = TextCorrector(base_dir=str(base_dir), segmenter_backend="window")
+        old_model = corrector.model
+
+        path = write_transcript(transcripts, "a", ["第1名又来了", "第1名"], edited=[0])
+        keywords.write_text("心智 0.9\n第一灵 第1名\n", encoding="utf-8")
+        os.utime(keywords, ns=(os.stat(keywords).st_mtime_ns + 10**9,) * 2)
+        recorrector = ArchiveRecorrector(str(transcripts), corrector)
+        recorrector._last_model = old_model
+        recorrector.run()
+
+        assert [s["text"] for s in read_segments(path)] == ["第1名又来了", "第一灵"]
+        assert json.loads(path.read_text(encoding="utf-8"))["data"]["full_text"] == "第1名又来了 第一灵"
+
+    def test_write_holds_transcript_lock(self, tmp_path, monkeypatch):
+        """重新读取到写回期间持有与保存编辑内容相同的转写文件锁"""
+        base_dir = tmp_path / "model"
+        transcripts = tmp_path / "transcripts"
+        base_dir.mkdir()
+        keywords = base_dir / "keywords"
+        keywords.write_text("心智 0.9\n", encoding="utf-8")
+        corrector = TextCorrector(base_dir=str(base_dir), segmenter_backend="window")
+        old_model = corrector.model
+
+        write_transcript(transcripts, "a", ["第1名来了"])
+        keywords.write_text("心智 0.9\n第一灵 第1名\n", encoding="utf-8")
+        os.utime(keywords, ns=(os.stat(keywords).st_mtime_ns + 10**9,) * 2)
+        held = []
+        write = recorrection._write_json_atomic
+        monkeypatch.setattr(recorrection, "_write_json_atomic",
+                            lambda path, content: (held.append(transcript_manager.lock("a").locked()),
+                                                   write(path, content)))
+        recorrector = ArchiveRecorrector(str(transcripts), corrector)
+        recorrector._last_model = old_model
+        assert recorrector.run()["updated_files"] == 1
+        assert held == [True]
+        assert not transcript_manager.lock("a").locked()
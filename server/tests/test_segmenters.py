@@ -0,0 +1,58 @@
+from api.speech.pinyin_index import PinyinCandidateIndex
+from api.speech.segmenters import DagSegmenter, PinyinTrieSegmenter, SlidingWindowSegmenter
+
+BASE_WORDS = ["我们", "今天", "讨论", "一下", "第一", "名字", "灵体"]
+
+class TestDagSegmenter:
+    def test_prefers_dictionary_words(self):
+        segmenter = DagSegmenter(["第一灵"], BASE_WORDS)
+        assert segmenter.cut("我们今天讨论一下") == ["我们", "今天", "讨论", "一下"]
+        assert segmenter.cut("第一灵的名字") == ["第一灵", "的", "名字"]
+
+    def test_unknown_characters_merged(self):
+        """词典外的连续单字合并为一个词，标点单独成词"""
+        segmenter = DagSegmenter([], BASE_WORDS)
+        assert segmenter.cut("我们林提，今天") == ["我们", "林提", "，", "今天"]
+        assert segmenter.cut("") == []
+
+    def test_unknown_run_split_by_match(self):
+        segmenter = DagSegmenter(["第一灵"], BASE_WORDS)
+        match = lambda word: word == "林提"
+        assert segmenter.cut("我们林提和", match) == ["我们", "林提", "和"]
+        assert segmenter.cut("我们林提和") == ["我们", "林提和"]
+
+    def test_custom_words_win_ties(self):
+        segmenter = DagSegmenter(["一灵"], ["第一", "灵体"])
+        assert segmenter.cut("第一灵体") == ["第一", "灵体"]
+        assert segmenter.cut("第一灵") == ["第", "一灵"]
+
+class TestSlidingWindowSegmenter:
+    def test_windows_follow_matches(self):
+        segmenter = SlidingWindowSegmenter([2, 3, 1])
+        assert segmenter.lengths == [3, 2]
+        match = lambda word: word in ("林提", "第一零")
+        assert segmenter.cut("说林提和第一零", match) == ["说", "林提", "和", "第一零"]
+
+    def test_without_match_splits_characters(self):
+        assert SlidingWindowSegmenter([2]).cut("林提") == ["林", "提"]
+
+class TestPinyinTrieSegmenter:
+    TARGETS = {
+        "灵体": (["ling2", "ti3"], [], 0.7, []),
+        "第一灵": (["di4", "yi1", "ling2"], [], 0.8, []),
+        "一灵": (["yi1", "ling2"], [], 0.8, []),
+    }
+
+    def make(self):
+        return PinyinTrieSegmenter(self.TARGETS, PinyinCandidateIndex(self.TARGETS).syllable_table)
+
+    def test_best_non_overlapping_matches(self):
+        """相似度相同时取更长的片段：第一零 而不是其中的 一零"""
+        segmenter = self.make()
+        assert segmenter.cut("林提说第一零来了") == ["林提", "说", "第一零", "来", "了"]
+        assert segmenter.cut("") == []
+
+    def test_match_confirms_windows(self):
+        segmenter = self.make()
+        match = lambda word: word != "第一零"
+        assert segmenter.cut("说第一零，灵体", match) == ["说", "第", "一零", "，", "灵体"]
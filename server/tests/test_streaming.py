@@ -0,0 +1,83 @@
+import numpy as np
+from api.speech import streaming
+from api.speech.streaming import StreamingSession, StreamingVad, pcm16_to_float, SAMPLES_PER_MS
+from api.speech.workers import stream_vad
+
+class ScriptedVad:
+    """按送入的块序号返回预设的 VAD 端点"""
+    def __init__(self, script):
+        self.script = script
+        self.calls = 0
+
+    def __call__(self, pcm, is_final=False):
+        result = self.script.get("final" if is_final else self.calls, [])
+        if not is_final:
+            self.calls += 1
+        return result
+
+def chunk(ms, value=0.0):
+    return np.full(ms * SAMPLES_PER_MS, value, dtype=np.float32)
+
+def transcribe(segment, language):
+    return f"{len(segment) // SAMPLES_PER_MS}ms"
+
+class TestStreamingSession:
+    def test_final_segment_audio(self):
+        """语音段结束后识别段首到段尾的音频"""
+        vad = ScriptedVad({1: [[150, -1]], 3: [[-1, 700]]})
+        session = StreamingSession(vad=vad, transcribe=transcribe, partial_interval_ms=0)
+        events = []
+        for _ in range(5):
+            events.extend(session.feed(chunk(200)))
+        assert [e["type"] for e in events] == ["final"]
+        assert events[0]["data"]["text"] == "550ms"
+        assert events[0]["data"]["start"] == 0.15
+        assert events[0]["data"]["end"] == 0.7
+
+    def test_partial_and_finish(self):
+        vad = ScriptedVad({0: [[0, -1]]})
+        session = StreamingSession(vad=vad, transcribe=transcribe, partial_interval_ms=400)
+        events = []
+        for _ in range(4):
+            events.extend(session.feed(chunk(200)))
+        assert [e["type"] for e in events] == ["partial", "partial"]
+        assert events[0]["data"]["text"] == "400ms"
+
+        events = session.finish()
+        assert events[-1]["type"] == "final"
+        assert events[-1]["data"]["text"] == "800ms"
+        assert session.segment_count == 1
+
+    def test_complete_segment_in_one_chunk(self):
+        vad = ScriptedVad({2: [[300, 500]]})
+        session = StreamingSession(vad=vad, transcribe=transcribe, partial_interval_ms=0)
+        events = [e for _ in range(3) for e in session.feed(chunk(200))]
+        assert events[0]["data"]["text"] == "200ms"
+
+    def test_idle_audio_trimmed(self):
+        """静音期间只保留最近几秒音频"""
+        session = StreamingSession(vad=ScriptedVad({}), transcribe=transcribe, partial_interval_ms=0)
+        for _ in range(100):
+            session.feed(chunk(200))
+        assert session.received_ms == 20000
+        assert len(session._buffer) <= session.keep_ms * SAMPLES_PER_MS
+
+    def test_pcm16_to_float(self):
+        frame = np.array([0, 16384, -32768], dtype='<i2').tobytes() + b'\x01'
+        assert np.allclose(pcm16_to_float(frame), [0, 0.5, -1])
+
+    def test_vad_runs_in_model_pool(self, monkeypatch):
+        """流式 VAD 通过模型进程池调用，状态随调用传入并保存返回的新状态"""
+        calls = []
+
+        def call(func, pcm, cache, is_final, chunk_ms):
+            calls.append((func, dict(cache), is_final, chunk_ms))
+            return [[0, -1]], {"chunks": cache.get("chunks", 0) + 1}
+
+        monkeypatch.setattr(streaming.model_pool, "call", call)
+        vad = StreamingVad(chunk_ms=200)
+        assert vad(chunk(200)) == [[0, -1]]
+        vad(chunk(200), is_final=True)
+        assert [c[0] for c in calls] == [stream_vad, stream_vad]
+        assert calls[1][1:] == ({"chunks": 1}, True, 200)
+        assert vad.cache == {"chunks": 2}
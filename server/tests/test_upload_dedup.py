@@ -0,0 +1,84 @@
+import hashlib
+import io
+import os
+from datetime import datetime, timedelta
+import pytest
+from api import utils
+from api.files import operations
+from api.files.config import config
+from api.files.dedup import ContentIndex
+from api.files.operations import FileOperations
+from api.speech.storage import transcript_manager
+
+RESULT = {"code": 200, "message": "success", "data": {"language": "zh", "segments": [{"text": "你好"}]}}
+
+class ShiftedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(hours=1)
+
+class TestUploadDedup:
+    @pytest.fixture
+    def ops(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(config, "audio_dir", str(tmp_path / "audio"))
+        monkeypatch.setattr(config, "metadata_file", str(tmp_path / "metadata.json"))
+        monkeypatch.setattr(config, "upload_tmp_dir", str(tmp_path / "tmp"))
+        monkeypatch.setattr(transcript_manager, "transcripts_dir", str(tmp_path / "transcripts"))
+        os.makedirs(config.audio_dir)
+        ops = FileOperations()
+        ops.metadata.metadata = {}
+        monkeypatch.setattr(operations, "content_index", ContentIndex())
+        return ops
+
+    @staticmethod
+    def shift_clock(monkeypatch):
+        """file_id 和存储文件名精确到秒，给后一次上传换一个时间戳"""
+        monkeypatch.setattr(operations, "datetime", ShiftedDatetime)
+        monkeypatch.setattr(utils, "datetime", ShiftedDatetime)
+
+    def upload(self, ops, content, **options):
+        return ops.save_uploaded_file(content, {"original_filename": "会议.mp3", "language": "zh", **options})["data"]
+
+    def test_streamed_upload(self, ops, tmp_path):
+        """按块写入文件对象，哈希与整体计算一致，不留下临时文件"""
+        content = os.urandom(3 * 1024 * 1024 + 7)
+        data = self.upload(ops, io.BytesIO(content))
+        assert data["size"] == len(content)
+        assert data["content_hash"] == hashlib.sha256(content).hexdigest()
+        with open(data["path"], 'rb') as f:
+            assert f.read() == content
+        assert os.listdir(config.upload_tmp_dir) == []
+
+    def test_size_limit(self, ops, monkeypatch):
+        monkeypatch.setattr(config, "max_upload_bytes", 1024)
+        result = ops.save_uploaded_file(io.BytesIO(b"x" * 2048), {"original_filename": "a.mp3"})
+        assert result["code"] == 413
+        assert os.listdir(config.audio_dir) == []
+        assert os.listdir(config.upload_tmp_dir) == []
+
+    def test_duplicate_reuses_audio_and_transcript(self, ops, monkeypatch):
+        first = self.upload(ops, b"same audio")
+        transcript_manager.save_result(first["file_id"], RESULT)
+        ops.update_file_status(first["file_id"], "已完成")
+
+        self.shift_clock(monkeypatch)
+        second = self.upload(ops, b"same audio")
+        assert second["file_id"] != first["file_id"]
+        assert second["duplicate_of"] == first["file_id"]
+        assert second["status"] == "已完成"
+        assert os.path.samefile(first["path"], second["path"])
+        assert transcript_manager.get_transcript(second["file_id"])["original"] == RESULT
+
+    def test_dedup_can_be_disabled(self, ops, monkeypatch):
+        first = self.upload(ops, b"same audio")
+        self.shift_clock(monkeypatch)
+        second = self.upload(ops, b"same audio", dedup=False)
+        assert "duplicate_of" not in second
+        assert second["status"] == "已上传"
+        assert not os.path.samefile(first["path"], second["path"])
+
+    def test_different_content_not_deduplicated(self, ops, monkeypatch):
+        self.upload(ops, b"audio one")
+        self.shift_clock(monkeypatch)
+        second = self.upload(ops, b"audio two")
+        assert "duplicate_of" not in second